@@ -13,12 +13,16 @@ from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, F
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.dialects.sqlite import insert
+from procurer_profiles import get_profile_store
+from procurement_index import get_procurement_index
+from text_normalizer import normalize_description
 
 # Load environment variables
 load_dotenv()
 
 # Database setup
-DATABASE_URL = "sqlite:///./procurement_data.db"
+DATABASE_PATH = "./procurement_data.db"
+DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
@@ -259,7 +263,7 @@ def parse_description(description):
         soup = BeautifulSoup(description, 'html.parser')
         
         # Extract clean text
-        clean_text = soup.get_text().strip()
+        clean_text = normalize_description(soup.get_text())
         
         # Limit length and add ellipsis
         if len(clean_text) > 300:
@@ -365,6 +369,11 @@ def load_procurement_data():
             
             session.commit()
             
+            # Fold new and changed notices into the per-procurer profiles
+            get_profile_store(DATABASE_PATH).record_notices(procurements)
+            # Embed new and changed notices for HangeGPT similarity search
+            get_procurement_index(DATABASE_PATH).add(procurements)
+            
         except Exception as e:
             session.rollback()
             print(f"Error processing feed: {e}")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Aggregate Answers for HangeGPT
+Analytical questions ("most common categories", "compare construction vs IT")
+are answered from GROUP BY queries over every matching procurement instead of
+a sample of rows:
+1. Plans: the dimension to group by, from the intent or the question wording,
+   and compared names matched to stored values ("IT" is "Technology & IT")
+2. Groups: counts and value statistics per group, folded into a bounded list
+"""
+
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+DIMENSIONS = ('category', 'county', 'procurer', 'month')
+# Groups listed in the response prompt; the rest are summed into one "Other" group
+MAX_GROUPS = 25
+
+_DIMENSION_WORDS = {
+    'category': r'categor(?:y|ies)|sectors?|kategoori\w*|valdkon\w*',
+    'county': r'count(?:y|ies)|regions?|maakon\w*',
+    'procurer': r'procurers?|buyers?|contracting authorit(?:y|ies)|organi[sz]ations?|hankija\w*',
+}
+# A grouping word just before the dimension ("by county", "most common procurement categories")
+# or an Estonian postposition just after it ("maakondade lõikes")
+_GROUPED = {
+    dimension: re.compile(
+        rf"\b(?:by|per|each|every|which|across|most common|most active|top|largest|biggest|busiest|kõige \w+)"
+        rf"\s+(?:\w+\s+){{0,2}}?(?:{words})\b|\b(?:{words})\s+(?:lõikes|kaupa)\b",
+        re.IGNORECASE)
+    for dimension, words in _DIMENSION_WORDS.items()
+}
+# Months only group on explicit wording, so "highest value procurements this month" stays a search
+_GROUPED['month'] = re.compile(
+    r"\b(?:by|per|each|every) month\b|\bmonthly\b|\btrends?\b|\bkuude (?:lõikes|kaupa)\b|\bigakuis\w*",
+    re.IGNORECASE)
+
+# "compare construction vs IT procurements", "võrdle ehitust ja IT-d"
+_COMPARE = re.compile(
+    r"\b(?:compare|comparing|comparison of|võrdle\w*)\s+(?P<first>.+?)\s+"
+    r"(?:vs\.?|versus|and|with|to|against|ja|ning|või)\s+(?P<second>.+?)"
+    r"(?=\s+(?:procurements?|tenders?|hanke\w*|hanked|values?|spending|in|over|by|this|last)\b|[?.!,]|$)",
+    re.IGNORECASE)
+
+# The dimension and stored value a name refers to, such as ('category', 'Technology & IT') for "IT"
+Resolver = Callable[[str], Optional[Tuple[str, str]]]
+
+def detect_compare(question: str, resolve: Optional[Resolver]) -> Optional[Tuple[str, List[str]]]:
+    """Dimension and values of a "compare X vs Y" question whose two names share a dimension"""
+    match = _COMPARE.search(question)
+    if match is None or resolve is None:
+        return None
+    resolved = [resolve(match.group(name)) for name in ('first', 'second')]
+    if None in resolved or resolved[0][0] != resolved[1][0]:
+        return None
+    return resolved[0][0], sorted({value for _, value in resolved})
+
+def detect_group_by(question: str, resolve: Optional[Resolver] = None) -> Optional[str]:
+    """Dimension the question asks to group by, if any"""
+    for dimension in DIMENSIONS:
+        if _GROUPED[dimension].search(question):
+            return dimension
+    compared = detect_compare(question, resolve)
+    return compared[0] if compared else None
+
+def plan_aggregate(intent: Dict[str, Any], question: str,
+                   resolve: Optional[Resolver] = None) -> Optional[Dict[str, Any]]:
+    """Aggregate plan for an intent: {"group_by": dimension, "values": groups to compare}"""
+    group_by = intent.get('group_by')
+    if group_by not in DIMENSIONS:
+        group_by = detect_group_by(question, resolve)
+    if group_by is None:
+        return None
+    values = [str(value).strip() for value in (intent.get('compare') or []) if value]
+    if not values:
+        compared = detect_compare(question, resolve)
+        if compared and compared[0] == group_by:
+            values = compared[1]
+    # Compared names are matched exactly, so each must be the value stored in the database
+    return {'group_by': group_by, 'values': sorted({_stored_value(value, group_by, resolve) for value in values})}
+
+def _stored_value(value: str, group_by: str, resolve: Optional[Resolver]) -> str:
+    resolved = resolve(value) if resolve is not None else None
+    return resolved[1] if resolved and resolved[0] == group_by else value
+
+def _combine(name: str, groups: List[Dict[str, Any]]) -> Dict[str, Any]:
+    valued = sum(group['valued_count'] for group in groups)
+    total = sum(group['total_value'] for group in groups)
+    largest = [group['max_value'] for group in groups if group['max_value'] is not None]
+    return {
+        'group': name,
+        'count': sum(group['count'] for group in groups),
+        'valued_count': valued,
+        'total_value': total,
+        'average_value': total / valued if valued else None,
+        'max_value': max(largest) if largest else None,
+    }
+
+def fold_groups(rows: List[Dict[str, Any]], group_by: str, max_groups: int = MAX_GROUPS) -> Dict[str, Any]:
+    """Order aggregate rows and fold the tail into one group.
+
+    Months are listed in order, other dimensions largest first.
+    """
+    groups = [dict(row, group=row['group'] or 'Unknown', total_value=row['total_value'] or 0.0) for row in rows]
+    if group_by == 'month':
+        groups.sort(key=lambda group: group['group'])
+    else:
+        groups.sort(key=lambda group: (-group['count'], -group['total_value'], group['group']))
+
+    listed = groups[:max_groups]
+    if len(groups) > max_groups:
+        listed.append(_combine(f"{len(groups) - max_groups} other groups", groups[max_groups:]))
+    return {'group_by': group_by, 'groups': listed, 'total': _combine('Total', groups)}
@@ -1,28 +1,60 @@
 import os
 import json
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, List, Any, Optional, Iterator, Union
 import pandas as pd
+import requests
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import create_engine, func, and_, or_
 import feedparser
 
 from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, AIMessageChunk
 from langchain_core.tools import tool
 from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
-from typing_extensions import TypedDict
+from typing_extensions import TypedDict, Annotated
 
 # Import database models
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from Home import Procurement, SessionLocal, ESTONIAN_COUNTIES
+from Home import Procurement, ESTONIAN_COUNTIES, DATABASE_PATH
+from agents.database import get_read_sessionmaker
+from agents.intent_parser import IntentParser
+from agents.response_cache import get_response_cache
+from agents.result_compactor import compact_results, DEFAULT_TOKEN_BUDGET
+from agents.aggregates import plan_aggregate, fold_groups
+from agents.conversation_memory import ConversationMemory, Turn, DEFAULT_MAX_TURNS, fit_to_budget
+from procurement_index import ProcurementIndex, get_procurement_index
+
+RSS_FEED_URL = 'https://riigihanked.riik.ee/rhr/api/public/v1/rss'
+
+# Results a retrieval branch reports when it does not finish in time
+BRANCH_FALLBACKS = {
+    "query_database": ("error", {"database": [], "count": 0}),
+    "query_rss_cache": ("rss_error", {"rss": [], "rss_count": 0}),
+    "query_similar": ("similar_error", {"similar": [], "similar_count": 0}),
+}
+
+# Index matches considered before filtering, and the best of them passed on to the answer
+SIMILAR_CANDIDATES = 200
+SIMILAR_RESULTS = 20
+
+def merge_query_results(current: Optional[Dict], update: Optional[Dict]) -> Optional[Dict]:
+    """Combine the results of retrieval branches that finish in the same step"""
+    if not update:
+        return current
+    return {**(current or {}), **update}
 
 class ChatState(TypedDict):
     messages: List[Any]
-    query_results: Optional[Dict]
+    query_results: Annotated[Optional[Dict], merge_query_results]
     user_intent: Optional[str]
+    data_version: Optional[str]
+    response_cached: Optional[bool]
     
 class HangeGPTAgent:
     def __init__(self):
@@ -31,7 +63,20 @@ class HangeGPTAgent:
             temperature=0.1,
             api_key=os.getenv('OPENAI_API_KEY')
         )
-        self.session = SessionLocal()
+        # Short-lived read-only sessions from the pool shared by all chat sessions
+        self.sessions = get_read_sessionmaker(DATABASE_PATH)
+        self.intent_parser = IntentParser(ESTONIAN_COUNTIES, get_category_suggestions())
+        self.response_cache = get_response_cache(embed=_question_embedder())
+        # Prompt tokens spent on query results in generate_response
+        self.result_token_budget = DEFAULT_TOKEN_BUDGET
+        # Seconds each retrieval branch may take before it is answered without
+        self.branch_timeout = 10.0
+        self._branch_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="hangegpt-branch")
+        self._similarity_index: Optional[ProcurementIndex] = None
+        # Seconds the parsed RSS feed is reused by every chat session before it is downloaded again
+        self.rss_ttl = 300.0
+        self._rss_feed: Optional[tuple] = None
+        self._rss_lock = threading.Lock()
         self.graph = self._create_graph()
         
     def _create_graph(self):
@@ -40,8 +85,9 @@ class HangeGPTAgent:
         
         # Add nodes
         workflow.add_node("analyze_intent", self.analyze_intent)
-        workflow.add_node("query_database", self.query_database)
-        workflow.add_node("query_rss_cache", self.query_rss_cache)
+        workflow.add_node("query_database", self._timed_branch("query_database"))
+        workflow.add_node("query_rss_cache", self._timed_branch("query_rss_cache"))
+        workflow.add_node("query_similar", self._timed_branch("query_similar"))
         workflow.add_node("generate_response", self.generate_response)
         
         # Add edges
@@ -52,11 +98,14 @@ class HangeGPTAgent:
             {
                 "database": "query_database",
                 "rss": "query_rss_cache",
-                "both": "query_database"
+                "similar": "query_similar",
+                "cached": END
             }
         )
+        # Both branches of a "both" route run in the same step, so generate_response runs once after both
         workflow.add_edge("query_database", "generate_response")
         workflow.add_edge("query_rss_cache", "generate_response")
+        workflow.add_edge("query_similar", "generate_response")
         workflow.add_edge("generate_response", END)
         
         return workflow.compile()
@@ -65,15 +114,46 @@ class HangeGPTAgent:
         """Analyze user intent and determine query strategy"""
         user_message = state["messages"][-1].content
         
+        conversation = _conversation_context(state["messages"][:-1])
+        # Formulaic opening questions are resolved locally without an LLM round-trip.
+        # A follow-up ("and in Tartu?") keeps filters from earlier turns, which only the LLM sees
+        intent_data = None if conversation else self.intent_parser.parse(user_message)
+        if intent_data is None:
+            intent_data = self._analyze_intent_with_llm(user_message, conversation)
+            if conversation:
+                # Read in the light of the conversation, the answer is neither served
+                # from the cache nor added to it
+                state["data_version"] = None
+        
+        # Grouping questions are answered from database aggregates, not row samples
+        aggregate = plan_aggregate(intent_data, user_message, self.intent_parser.resolve_value)
+        if aggregate:
+            intent_data = dict(intent_data, aggregate=aggregate, data_source="database")
+        state["user_intent"] = intent_data
+        
+        # The same intent over the same data has already been answered
+        if state.get("data_version"):
+            cached = self.response_cache.get_for_intent(intent_data, user_message, state["data_version"])
+            if cached is not None:
+                state["messages"].append(AIMessage(content=cached))
+                state["response_cached"] = True
+        
+        return state
+    
+    def _analyze_intent_with_llm(self, user_message: str, conversation: str = "") -> Dict:
         intent_prompt = f"""
         Analyze this user query about Estonian procurement data and determine the intent:
         
         Query: "{user_message}"
         
+        Conversation so far, for follow-up queries:
+        {conversation or "(none)"}
+        
         Determine:
         1. What type of data they want (categories, locations, values, dates, etc.)
         2. Any specific filters (city, county, category, value range, time period)
         3. Whether they want recent data (RSS) or historical analysis (database)
+        4. Whether they ask for statistics per category, county, procurer or month, and which ones they compare
         
         Return a JSON object with:
         {{
@@ -87,109 +167,214 @@ class HangeGPTAgent:
                 "value_max": number or null,
                 "days_back": number or null
             }},
+            "group_by": "category|county|procurer|month or null",
+            "compare": ["category or county names being compared"] or null,
+            "search_text": "subject of the procurements they describe (e.g. school renovation), in Estonian and English, or null",
             "output_type": "list|summary|chart|table"
         }}
+        
+        Categories: {", ".join(get_category_suggestions())}
         """
         
         response = self.llm.invoke([SystemMessage(content=intent_prompt)])
         
         try:
-            intent_data = json.loads(response.content)
-            state["user_intent"] = intent_data
+            return json.loads(response.content)
         except:
             # Fallback intent
-            state["user_intent"] = {
+            return {
                 "intent": "search",
                 "data_source": "both",
                 "filters": {},
                 "output_type": "list"
             }
-        
-        return state
     
-    def route_query(self, state: ChatState) -> str:
-        """Route query based on analyzed intent"""
+    def route_query(self, state: ChatState) -> Union[str, List[str]]:
+        """Route query based on analyzed intent; "both" fans out to both retrieval branches"""
+        if state.get("response_cached"):
+            return "cached"
+        
         intent = state.get("user_intent", {})
         data_source = intent.get("data_source", "both")
         
         if data_source == "rss":
-            return "rss"
+            branches = ["rss"]
         elif data_source == "database":
-            return "database"
+            branches = ["database"]
         else:
-            return "both"
+            branches = ["database", "rss"]
+        
+        # A described subject is matched by similarity over indexed notices, not by filters alone
+        if intent.get("search_text") and not intent.get("aggregate") and "database" in branches:
+            branches[branches.index("database")] = "similar"
+        
+        return branches[0] if len(branches) == 1 else branches
+    
+    def _timed_branch(self, name: str):
+        """Graph node running a retrieval branch with a deadline.
+        
+        A branch that misses it contributes an empty result with an error,
+        so a slow source delays the answer by at most branch_timeout.
+        """
+        error_key, empty = BRANCH_FALLBACKS[name]
+        
+        def run(state: ChatState) -> Dict:
+            future = self._branch_executor.submit(getattr(self, name), state)
+            try:
+                return future.result(timeout=self.branch_timeout)
+            except FutureTimeoutError:
+                return {"query_results": dict(empty, **{error_key: f"Timed out after {self.branch_timeout:g} seconds"})}
+        
+        return run
     
-    def query_database(self, state: ChatState) -> ChatState:
+    def query_database(self, state: ChatState) -> Dict:
         """Query the SQLite database based on filters"""
         intent = state.get("user_intent", {})
         filters = intent.get("filters", {})
         
+        session = self.sessions()
         try:
-            query = self.session.query(Procurement)
-            
-            # Apply filters
-            if filters.get("category"):
-                query = query.filter(Procurement.category.ilike(f"%{filters['category']}%"))
-            
-            if filters.get("county"):
-                query = query.filter(Procurement.county.ilike(f"%{filters['county']}%"))
-            
-            if filters.get("city"):
-                query = query.filter(Procurement.procurer.ilike(f"%{filters['city']}%"))
+            # Analytical questions are answered from aggregates over every matching row
+            if intent.get("aggregate"):
+                return {"query_results": self._query_aggregates(session, filters, intent["aggregate"])}
             
-            if filters.get("value_min"):
-                query = query.filter(Procurement.estimated_value >= filters['value_min'])
-            
-            if filters.get("value_max"):
-                query = query.filter(Procurement.estimated_value <= filters['value_max'])
-            
-            if filters.get("days_back"):
-                cutoff_date = datetime.now() - timedelta(days=filters['days_back'])
-                query = query.filter(Procurement.published >= cutoff_date)
+            query = self._apply_filters(session.query(Procurement), filters)
             
             # Execute query
             results = query.limit(50).all()
             
             # Convert to dict format
-            db_results = []
-            for r in results:
-                db_results.append({
-                    'id': r.id,
-                    'title': r.title,
-                    'clean_description': r.clean_description,
-                    'category': r.category,
-                    'county': r.county,
-                    'estimated_value': r.estimated_value,
-                    'procurer': r.procurer,
-                    'published': r.published.isoformat() if r.published else None,
-                    'link': r.link
-                })
+            db_results = [_procurement_dict(r) for r in results]
             
-            state["query_results"] = {
+            query_results = {
                 "database": db_results,
                 "count": len(db_results)
             }
             
         except Exception as e:
-            state["query_results"] = {
+            query_results = {
                 "database": [],
                 "error": str(e),
                 "count": 0
             }
+        finally:
+            session.close()
         
-        return state
+        # Only this branch's results, so it can run alongside query_rss_cache
+        return {"query_results": query_results}
     
-    def query_rss_cache(self, state: ChatState) -> ChatState:
-        """Query the RSS feed cache for recent data"""
+    @property
+    def similarity_index(self) -> ProcurementIndex:
+        """Embedding index of the procurements, opened on the first similarity search"""
+        if self._similarity_index is None:
+            self._similarity_index = get_procurement_index(DATABASE_PATH)
+        return self._similarity_index
+    
+    @similarity_index.setter
+    def similarity_index(self, index: ProcurementIndex):
+        self._similarity_index = index
+    
+    def query_similar(self, state: ChatState) -> Dict:
+        """Find the procurements most similar to the subject the user described"""
         intent = state.get("user_intent", {})
         filters = intent.get("filters", {})
         
+        session = self.sessions()
         try:
-            # Load RSS feed
-            feed = feedparser.parse('https://riigihanked.riik.ee/rhr/api/public/v1/rss')
+            scores = dict(self.similarity_index.search(intent["search_text"], k=SIMILAR_CANDIDATES))
+            results = []
+            if scores:
+                # The intent's filters still apply to the matches
+                query = session.query(Procurement).filter(Procurement.id.in_(list(scores)))
+                results = self._apply_filters(query, filters).all()
+            results.sort(key=lambda r: scores[r.id], reverse=True)
             
+            similar = [dict(_procurement_dict(r), similarity=f"{scores[r.id]:.2f}")
+                       for r in results[:SIMILAR_RESULTS]]
+            query_results = {
+                "similar": similar,
+                "similar_count": len(similar)
+            }
+            
+        except Exception as e:
+            query_results = {
+                "similar": [],
+                "similar_error": str(e),
+                "similar_count": 0
+            }
+        finally:
+            session.close()
+        
+        return {"query_results": query_results}
+    
+    @staticmethod
+    def _apply_filters(query, filters: Dict, skip: tuple = ()):
+        """Restrict a procurement query to the intent's filters"""
+        filters = {key: value for key, value in filters.items() if key not in skip}
+        
+        # Apply filters
+        if filters.get("category"):
+            query = query.filter(Procurement.category.ilike(f"%{filters['category']}%"))
+        
+        if filters.get("county"):
+            query = query.filter(Procurement.county.ilike(f"%{filters['county']}%"))
+        
+        if filters.get("city"):
+            query = query.filter(Procurement.procurer.ilike(f"%{filters['city']}%"))
+        
+        if filters.get("value_min"):
+            query = query.filter(Procurement.estimated_value >= filters['value_min'])
+        
+        if filters.get("value_max"):
+            query = query.filter(Procurement.estimated_value <= filters['value_max'])
+        
+        if filters.get("days_back"):
+            cutoff_date = datetime.now() - timedelta(days=filters['days_back'])
+            query = query.filter(Procurement.published >= cutoff_date)
+        
+        if filters.get("published_from"):
+            # Calendar periods ("this month") start at midnight on their first day
+            query = query.filter(Procurement.published >= datetime.fromisoformat(filters['published_from']))
+        
+        return query
+    
+    def _query_aggregates(self, session, filters: Dict, plan: Dict) -> Dict:
+        """Counts and value statistics per group over every matching procurement"""
+        group_by = plan["group_by"]
+        if group_by == "month":
+            dimension = func.strftime('%Y-%m', Procurement.published)
+        else:
+            dimension = getattr(Procurement, group_by)
+        
+        query = session.query(
+            dimension.label("group"),
+            func.count(Procurement.id).label("count"),
+            func.count(Procurement.estimated_value).label("valued_count"),
+            func.sum(Procurement.estimated_value).label("total_value"),
+            func.avg(Procurement.estimated_value).label("average_value"),
+            func.max(Procurement.estimated_value).label("max_value")
+        )
+        # Compared groups replace any filter on the grouped dimension
+        query = self._apply_filters(query, filters, skip=(group_by,) if plan["values"] else ())
+        if plan["values"]:
+            # Whole values only: a substring match would let "IT" also select "Security & Defense"
+            query = query.filter(func.lower(dimension).in_([value.lower() for value in plan["values"]]))
+        
+        rows = [dict(row._mapping) for row in query.group_by(dimension).all()]
+        aggregates = fold_groups(rows, group_by)
+        return {
+            "aggregates": aggregates,
+            "count": aggregates["total"]["count"]
+        }
+    
+    def query_rss_cache(self, state: ChatState) -> Dict:
+        """Query the RSS feed cache for recent data"""
+        intent = state.get("user_intent", {})
+        filters = intent.get("filters", {})
+        
+        try:
             rss_results = []
-            for entry in feed.entries[:50]:  # Limit to recent 50
+            for entry in self._rss_entries()[:50]:  # Limit to recent 50
                 # Apply basic filters
                 include = True
                 
@@ -211,41 +396,48 @@ class HangeGPTAgent:
                         'procurer': entry.get('author', 'Unknown')
                     })
             
-            if "query_results" not in state:
-                state["query_results"] = {}
-            
-            state["query_results"]["rss"] = rss_results
-            state["query_results"]["rss_count"] = len(rss_results)
+            query_results = {
+                "rss": rss_results,
+                "rss_count": len(rss_results)
+            }
             
         except Exception as e:
-            if "query_results" not in state:
-                state["query_results"] = {}
-            state["query_results"]["rss"] = []
-            state["query_results"]["rss_error"] = str(e)
-            state["query_results"]["rss_count"] = 0
+            query_results = {
+                "rss": [],
+                "rss_error": str(e),
+                "rss_count": 0
+            }
         
-        return state
+        return {"query_results": query_results}
+    
+    def _rss_entries(self) -> List:
+        """Entries of the RSS feed, downloaded at most once per rss_ttl seconds"""
+        # Concurrent questions wait for one download instead of each fetching the feed
+        with self._rss_lock:
+            if self._rss_feed is not None and time.monotonic() - self._rss_feed[0] < self.rss_ttl:
+                return self._rss_feed[1]
+            response = requests.get(RSS_FEED_URL, timeout=self.branch_timeout)
+            response.raise_for_status()
+            entries = feedparser.parse(response.content).entries
+            self._rss_feed = (time.monotonic(), entries)
+            return entries
     
     def generate_response(self, state: ChatState) -> ChatState:
         """Generate natural language response based on query results"""
         user_message = state["messages"][-1].content
         query_results = state.get("query_results", {})
-        intent = state.get("user_intent", {})
-        
-        # Prepare context for response generation
-        context = {
-            "user_query": user_message,
-            "intent": intent,
-            "results": query_results
-        }
+        conversation = _conversation_context(state["messages"][:-1])
         
         response_prompt = f"""
         You are HangeGPT, an AI assistant specialized in Estonian procurement data. 
         
         User asked: "{user_message}"
         
-        Query results:
-        {json.dumps(query_results, indent=2, default=str)}
+        Conversation so far:
+        {conversation or "(none)"}
+        
+        Query results (totals cover every matched procurement, the tables list the most relevant ones):
+        {compact_results(query_results, token_budget=self.result_token_budget)}
         
         Generate a helpful, conversational response that:
         1. Directly answers the user's question
@@ -255,6 +447,7 @@ class HangeGPTAgent:
         5. Uses a friendly, professional tone
         
         If no results found, explain why and suggest alternative searches.
+        Quote counts and totals from the summary lines rather than counting table rows.
         Format the response in a clear, readable way with bullet points or numbered lists when appropriate.
         """
         
@@ -267,24 +460,127 @@ class HangeGPTAgent:
     
     def chat(self, user_message: str, chat_history: List = None) -> str:
         """Main chat interface"""
-        if chat_history is None:
-            chat_history = []
+        # Repeated questions are answered from the cache until new data arrives
+        data_version = self.get_data_version()
+        cached = self._cached_answer(user_message, chat_history, data_version)
+        if cached is not None:
+            return cached
         
-        # Add user message to history
-        messages = chat_history + [HumanMessage(content=user_message)]
+        # Run the graph
+        final_state = self.graph.invoke(self._initial_state(user_message, chat_history, data_version))
+        response = final_state["messages"][-1].content
+        self._remember(user_message, final_state, data_version)
+        
+        # Return the AI response
+        return response
+    
+    def chat_stream(self, user_message: str, chat_history: List = None) -> Iterator[Dict[str, Any]]:
+        """Streaming chat interface.
         
-        # Create initial state
-        initial_state = {
+        Yields {"type": "status", "node": ..., "message": ...} as each graph
+        step finishes, {"type": "token", "content": ...} for every response
+        token as the LLM produces it, and finally {"type": "response",
+        "content": ...} with the complete answer.
+        """
+        data_version = self.get_data_version()
+        cached = self._cached_answer(user_message, chat_history, data_version)
+        if cached is not None:
+            yield {"type": "response", "content": cached, "cached": True}
+            return
+        
+        final_state = None
+        for mode, event in self.graph.stream(self._initial_state(user_message, chat_history, data_version),
+                                             stream_mode=["updates", "messages", "values"]):
+            if mode == "messages":
+                chunk, metadata = event
+                # Only answer tokens are streamed: not the intent JSON, and not the
+                # complete message the node returns once generation is done
+                if metadata.get("langgraph_node") == "generate_response" and \
+                        isinstance(chunk, AIMessageChunk) and chunk.content:
+                    yield {"type": "token", "content": chunk.content}
+            elif mode == "updates":
+                for node, update in event.items():
+                    message = _status_message(node, update)
+                    if message:
+                        yield {"type": "status", "node": node, "message": message}
+            else:
+                final_state = event
+        
+        response = final_state["messages"][-1].content
+        self._remember(user_message, final_state, data_version)
+        yield {"type": "response", "content": response, "cached": bool(final_state.get("response_cached"))}
+    
+    def _cached_answer(self, user_message: str, chat_history: Union[ConversationMemory, List, None],
+                       data_version: Optional[str]) -> Optional[str]:
+        """Cached answer to the same question, unless it may be a follow-up"""
+        # The same words can ask something else after earlier turns ("and in Tartu?"),
+        # so those are looked up by intent once analyze_intent has resolved them
+        if not data_version or chat_history:
+            return None
+        return self.response_cache.get_for_question(user_message, data_version)
+    
+    @staticmethod
+    def _initial_state(user_message: str, chat_history: Union[ConversationMemory, List, None],
+                       data_version: Optional[str]) -> ChatState:
+        # A ConversationMemory is already bounded; plain history lists are cut to the recent turns
+        if isinstance(chat_history, ConversationMemory):
+            history = chat_history.messages()
+        else:
+            history = list(chat_history or [])[-2 * DEFAULT_MAX_TURNS:]
+        
+        # Add user message to history
+        messages = history + [HumanMessage(content=user_message)]
+        return {
             "messages": messages,
             "query_results": None,
-            "user_intent": None
+            "user_intent": None,
+            "data_version": data_version,
+            "response_cached": False
         }
+    
+    def _remember(self, user_message: str, final_state: ChatState, data_version: Optional[str]):
+        """Cache a newly generated answer"""
+        # Answers built on a failed query are not worth repeating
+        query_results = final_state.get("query_results") or {}
+        if data_version and not final_state.get("response_cached") and \
+                not any(key in query_results for key in ("error", "rss_error", "similar_error")):
+            self.response_cache.put(user_message, final_state["user_intent"], data_version,
+                                    final_state["messages"][-1].content)
+    
+    def summarize_conversation(self, summary: str, turns: List[Turn], token_budget: int) -> str:
+        """Fold turns into the rolling conversation summary, for ConversationMemory"""
+        folded = "\n".join(f"User: {turn.question}\nHangeGPT: {turn.answer}" for turn in turns)
+        summary_prompt = f"""
+        Update the summary of a conversation about Estonian procurement data.
         
-        # Run the graph
-        final_state = self.graph.invoke(initial_state)
+        Current summary:
+        {summary or "(none)"}
         
-        # Return the AI response
-        return final_state["messages"][-1].content
+        New turns:
+        {folded}
+        
+        Return the updated summary in at most {token_budget * 3 // 4} words. Keep the filters,
+        procurements, values and conclusions the user may refer back to; drop pleasantries.
+        """
+        response = self.llm.invoke([SystemMessage(content=summary_prompt)])
+        return fit_to_budget(response.content, token_budget)
+    
+    def get_data_version(self) -> Optional[str]:
+        """Fingerprint of the procurement data, which changes when procurements are added or updated"""
+        session = self.sessions()
+        try:
+            count, last_published, last_created, total_value = session.query(
+                func.count(Procurement.id),
+                func.max(Procurement.published),
+                func.max(Procurement.created_at),
+                func.sum(Procurement.estimated_value)
+            ).one()
+            return f"{count}:{last_published}:{last_created}:{total_value}"
+        except Exception:
+            # Without a version nothing is cached
+            return None
+        finally:
+            session.close()
     
     def get_suggestions(self) -> List[str]:
         """Get sample questions users can ask"""
@@ -302,9 +598,76 @@ class HangeGPTAgent:
         ]
     
     def close(self):
-        """Close database session"""
-        if self.session:
-            self.session.close()
+        """Stop the retrieval workers; database sessions are closed after every query"""
+        self._branch_executor.shutdown(wait=False)
+
+def _procurement_dict(r: Procurement) -> Dict:
+    return {
+        'id': r.id,
+        'title': r.title,
+        'clean_description': r.clean_description,
+        'category': r.category,
+        'county': r.county,
+        'estimated_value': r.estimated_value,
+        'procurer': r.procurer,
+        'published': r.published.isoformat() if r.published else None,
+        'link': r.link
+    }
+
+def _conversation_context(messages: List[Any]) -> str:
+    """Earlier messages as prompt text"""
+    lines = []
+    for message in messages:
+        if isinstance(message, dict):
+            role, content = message.get("role"), message.get("content", "")
+        else:
+            role, content = message.type, message.content
+        if role in ("user", "human"):
+            lines.append(f"User: {content}")
+        elif role in ("assistant", "ai"):
+            lines.append(f"HangeGPT: {content}")
+        else:
+            lines.append(content)
+    return "\n".join(lines)
+
+def _status_message(node: str, update: Optional[Dict]) -> Optional[str]:
+    """Progress text for a finished graph step"""
+    update = update or {}
+    if node == "analyze_intent":
+        if update.get("response_cached"):
+            return "Found an earlier answer to the same question"
+        filters = {k: v for k, v in ((update.get("user_intent") or {}).get("filters") or {}).items() if v}
+        if filters:
+            return "Searching procurements: " + ", ".join(f"{k.replace('_', ' ')} {v}" for k, v in filters.items())
+        return "Searching procurements"
+    if node == "query_database":
+        return f"Found {(update.get('query_results') or {}).get('count', 0)} procurements in the database"
+    if node == "query_rss_cache":
+        return f"Found {(update.get('query_results') or {}).get('rss_count', 0)} procurements in the RSS feed"
+    if node == "query_similar":
+        return f"Found {(update.get('query_results') or {}).get('similar_count', 0)} similar procurements"
+    return None
+
+def _question_embedder():
+    """Embedding function for near-duplicate cache hits, enabled with HANGEGPT_SEMANTIC_CACHE=1"""
+    if os.getenv('HANGEGPT_SEMANTIC_CACHE') != '1':
+        return None
+    from langchain_openai import OpenAIEmbeddings
+    embeddings = OpenAIEmbeddings(model="text-embedding-3-small", api_key=os.getenv('OPENAI_API_KEY'))
+    return embeddings.embed_query
+
+# One agent per process: it keeps no conversation state, so every chat session
+# shares its compiled graph, LLM client connection pool and retrieval workers
+_shared_agent: Optional["HangeGPTAgent"] = None
+_shared_agent_lock = threading.Lock()
+
+def get_chat_agent() -> "HangeGPTAgent":
+    """Return the shared chat agent, created on first use"""
+    global _shared_agent
+    with _shared_agent_lock:
+        if _shared_agent is None:
+            _shared_agent = HangeGPTAgent()
+        return _shared_agent
 
 # Utility functions for the chat interface
 def create_chat_agent():
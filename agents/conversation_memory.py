@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Conversation Memory for HangeGPT
+Keeps the context sent with each question bounded however long a chat runs:
+1. The last turns verbatim, with a token count per turn
+2. Older turns folded into a rolling summary under a token budget
+3. Summaries written by a summarizer callable (the chat LLM), or extracted
+   from the folded turns when there is none
+
+Turns are folded in batches, so the summarizer runs once every few turns
+rather than after every answer.
+"""
+
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+from agents.result_compactor import CHARS_PER_TOKEN, estimate_tokens
+
+DEFAULT_MAX_TURNS = 6
+DEFAULT_SUMMARY_TOKENS = 300
+
+@dataclass
+class Turn:
+    """A question and its answer"""
+    question: str
+    answer: str
+    tokens: int
+
+# (previous summary, turns to fold in, token budget) -> new summary
+Summarizer = Callable[[str, List[Turn], int], str]
+
+def _shorten(text: str, limit: int) -> str:
+    text = ' '.join(text.split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + '…'
+
+def _first_sentence(text: str) -> str:
+    text = ' '.join(text.split())
+    end = text.find('. ')
+    return text[:end + 1] if end > 0 else text
+
+def extract_summary(summary: str, turns: List[Turn], token_budget: int) -> str:
+    """Summary without an LLM: each folded question with the first sentence of its answer"""
+    lines = summary.splitlines() if summary else []
+    lines.extend(f"- Q: {_shorten(turn.question, 150)} A: {_shorten(_first_sentence(turn.answer), 200)}"
+                 for turn in turns)
+    return fit_to_budget('\n'.join(lines), token_budget)
+
+def fit_to_budget(text: str, token_budget: int) -> str:
+    """Drop the oldest lines, then cut the text, until it fits the budget"""
+    lines = text.splitlines()
+    while len(lines) > 1 and estimate_tokens('\n'.join(lines)) > token_budget:
+        lines.pop(0)
+    text = '\n'.join(lines)
+    max_chars = token_budget * CHARS_PER_TOKEN
+    return text if len(text) <= max_chars else text[-max_chars:]
+
+class ConversationMemory:
+    """Recent turns verbatim plus a rolling summary of everything before them"""
+
+    def __init__(self, max_turns: int = DEFAULT_MAX_TURNS, summary_tokens: int = DEFAULT_SUMMARY_TOKENS,
+                 summarize: Optional[Summarizer] = None):
+        self.max_turns = max_turns
+        self.summary_tokens = summary_tokens
+        self.summarize = summarize
+        self.turns: List[Turn] = []
+        self.summary = ""
+        self.folded_turns = 0
+
+    def add_turn(self, question: str, answer: str) -> Turn:
+        """Record a finished turn, folding older turns into the summary when there are too many"""
+        turn = Turn(question, answer, estimate_tokens(question) + estimate_tokens(answer))
+        self.turns.append(turn)
+        if len(self.turns) > self.max_turns:
+            # Keep half of the turns, so the next fold is several turns away
+            keep = max(1, self.max_turns // 2)
+            self._fold(self.turns[:-keep])
+            self.turns = self.turns[-keep:]
+        return turn
+
+    def _fold(self, turns: List[Turn]):
+        summary = None
+        if self.summarize is not None:
+            try:
+                summary = self.summarize(self.summary, turns, self.summary_tokens)
+            except Exception:
+                # A failed summary call must not lose the conversation
+                summary = None
+        if summary:
+            self.summary = fit_to_budget(summary.strip(), self.summary_tokens)
+        else:
+            self.summary = extract_summary(self.summary, turns, self.summary_tokens)
+        self.folded_turns += len(turns)
+
+    def messages(self) -> List[BaseMessage]:
+        """Context to send ahead of the next question"""
+        messages: List[BaseMessage] = []
+        if self.summary:
+            messages.append(SystemMessage(content=f"Summary of the earlier conversation:\n{self.summary}"))
+        for turn in self.turns:
+            messages.extend([HumanMessage(content=turn.question), AIMessage(content=turn.answer)])
+        return messages
+
+    @property
+    def token_count(self) -> int:
+        """Tokens of context the next question is sent with"""
+        return estimate_tokens(self.summary) + sum(turn.tokens for turn in self.turns)
+
+    def clear(self):
+        self.turns = []
+        self.summary = ""
+        self.folded_turns = 0
+
+    def __len__(self) -> int:
+        return self.folded_turns + len(self.turns)
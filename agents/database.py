@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Read-only Database Access for HangeGPT
+Short-lived sessions on a connection pool shared by every chat session:
+1. Read-only SQLite connections (mode=ro and PRAGMA query_only)
+2. A bounded pool, so concurrent users wait for a connection instead of opening more
+3. A statement timeout that interrupts queries running past their deadline
+
+Each query opens a session and closes it straight after, so a failed query
+cannot leave a broken transaction behind and every query sees committed data.
+"""
+
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+POOL_SIZE = 5
+MAX_OVERFLOW = 10
+# Seconds to wait for a free pooled connection, and for SQLite write locks
+POOL_TIMEOUT = 10.0
+BUSY_TIMEOUT = 5.0
+STATEMENT_TIMEOUT = 5.0
+# SQLite virtual machine instructions between deadline checks
+_PROGRESS_INTERVAL = 10000
+
+def create_read_engine(db_path: str, statement_timeout: float = STATEMENT_TIMEOUT,
+                       pool_size: int = POOL_SIZE, max_overflow: int = MAX_OVERFLOW) -> Engine:
+    """Pooled read-only engine for an existing SQLite database"""
+    # Percent-encoded absolute path, opened as a read-only SQLite URI
+    path = Path(db_path).resolve().as_uri()[len('file://'):]
+    engine = create_engine(
+        f"sqlite:///file:{path}?mode=ro&uri=true",
+        poolclass=QueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=POOL_TIMEOUT,
+        # Pooled connections are handed between threads, never used by two at once
+        connect_args={'check_same_thread': False, 'timeout': BUSY_TIMEOUT},
+    )
+
+    @event.listens_for(engine, 'connect')
+    def _configure(dbapi_connection, connection_record):
+        dbapi_connection.execute('PRAGMA query_only = ON')
+        info = connection_record.info
+
+        # SQLite has no statement timeout; the progress handler aborts the
+        # running statement (OperationalError: interrupted) once it is overdue
+        def _overdue():
+            deadline = info.get('deadline')
+            return deadline is not None and time.monotonic() > deadline
+        dbapi_connection.set_progress_handler(_overdue, _PROGRESS_INTERVAL)
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _start_deadline(conn, cursor, statement, parameters, context, executemany):
+        # Rows are stepped while they are fetched, so the deadline lasts until checkin
+        conn.connection.info['deadline'] = time.monotonic() + statement_timeout
+
+    @event.listens_for(engine, 'checkin')
+    def _clear_deadline(dbapi_connection, connection_record):
+        connection_record.info.pop('deadline', None)
+
+    return engine
+
+_sessionmakers: Dict[str, sessionmaker] = {}
+_sessionmakers_lock = threading.Lock()
+
+def get_read_sessionmaker(db_path: str = "procurement_data.db") -> sessionmaker:
+    """Return the shared read-only session factory for a database, created on first use"""
+    key = str(Path(db_path).resolve())
+    with _sessionmakers_lock:
+        if key not in _sessionmakers:
+            _sessionmakers[key] = sessionmaker(bind=create_read_engine(db_path), autoflush=False)
+        return _sessionmakers[key]
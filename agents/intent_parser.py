@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Intent Parser for HangeGPT
+Deterministic fast path for formulaic chat questions, tried before the LLM:
+1. Categories by name and by English and Estonian keywords
+2. Counties and cities from the county gazetteer, including Estonian case endings
+3. Value ranges such as "over €100,000", "üle 100 000 euro" or "between 50k and 200k"
+4. Time periods: "last 14 days" or "viimase nädala jooksul" as days_back, and
+   calendar periods such as "this month" or "today" as published_from, the
+   midnight the period starts
+
+A query is resolved only when every word is accounted for by a filter or by
+known filler ("show me", "procurements", "hanked", ...). Anything else, and
+anything ambiguous such as two categories, is left to the LLM. Resolved
+queries are answered from the database alone unless they ask for the newest
+notices, which only the live RSS feed may have yet.
+"""
+
+import re
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any, Tuple
+
+# Estonian and English keywords per category; a trailing * matches any ending
+CATEGORY_KEYWORDS = {
+    "Technology & IT": ["ikt", "ict", "tech", "software", "hardware", "computer*", "digital", "digi*",
+                        "tarkvara*", "riistvara*", "arvuti*", "infotehnoloogia*", "infosüsteemi*"],
+    "Healthcare & Medical": ["health", "medicine", "hospital*", "meditsiini*", "tervis*", "haigla*",
+                             "ravimi*"],
+    "Construction & Infrastructure": ["building", "buildings", "renovation", "roads", "ehitus*", "ehitis*",
+                                      "remondi*", "remont*", "infrastruktuuri*", "teede*"],
+    "Professional Services": ["consulting", "consultancy", "legal", "audit", "konsultatsiooni*",
+                              "nõustamis*", "õigusabi*", "audiitor*"],
+    "Education & Training": ["schools", "koolitus*", "hariduse*", "haridus*", "õppe*"],
+    "Transportation": ["transport", "vehicles", "buses", "transpordi*", "sõiduki*", "bussi*"],
+    "Energy & Environment": ["environmental", "electricity", "energia*", "keskkonna*", "elektri*"],
+    "Security & Defense": ["defence", "turva*", "kaitse*", "julgeoleku*"],
+    "Food & Catering": ["toidu*", "toitlustus*"],
+    "Office & Supplies": ["stationery", "büroo*", "kontori*", "kontoritarbe*"],
+    "Maintenance & Cleaning": ["hoolduse*", "hooldus*", "koristus*", "puhastus*"],
+}
+
+# Acronyms that are also common words ("is it in Tallinn?") count only when written in capitals
+_ACRONYMS = {'IT': 'ict'}
+_ACRONYM = re.compile(r'(?<!\w)(?:' + '|'.join(_ACRONYMS) + r')(?!\w)')
+
+# Words that carry no filter, in English and Estonian
+FILLER_WORDS = set("""
+a all also an and any are at be by can could do does each every find for from get give i in is it's
+list latest look me my new of on open or please posted published public recent recently search see show
+the there these those to up was were what which with would you active announced available current
+tender tenders contract contracts notice notices opportunity opportunities category categories county
+region city value values valued eur euro euros worth total
+näita näidata näitaks leia leida otsi otsida kõik millised milliseid mis mida on olid kas ja või ning
+palun ka uued uusi uut viimased hiljutised avatud avaldatud avaldati aktiivsed maakonnas maakonna
+maakonnast linnas linna linnast piirkonnas kategooria kategoorias väärtus väärtusega väärtuses
+summa summaga eurot eurost jooksul
+""".split())
+
+# Any inflection of these is filler: "procurements", "services", "hanked", "riigihankeid"
+_FILLER_STEMS = re.compile(r'(?:procurement|tender|service|hange|hanke|hanki|riigihan|teenus)\w*$')
+
+_INTENT_WORDS = [
+    ('summarize', 'summary',
+     re.compile(r'(?<!\w)(?:summary|summarize|summarise|overview|kokkuvõte\w*|ülevaade|ülevaadet)(?!\w)')),
+    ('analyze', 'list',
+     re.compile(r'(?<!\w)(?:highest|largest|biggest|most expensive|top|suurima\w*|kallima\w*)(?!\w)')),
+]
+_OUTPUT_WORDS = [
+    ('table', re.compile(r'(?<!\w)(?:table|tabel\w*)(?!\w)')),
+    ('chart', re.compile(r'(?<!\w)(?:chart|graph|graafik\w*|diagramm\w*)(?!\w)')),
+]
+
+_CURRENCY = r'(?:€|eur(?:o|ot|ost|os|i)?|euros?)'
+_UNIT = r'(?:k|tuh(?:at|ande)?\.?|thousand|m|mln\.?|milj(?:on|onit|oni)?\.?|million|millions)(?!\w)'
+
+def _amount(name: str) -> str:
+    return (rf'(?:{_CURRENCY}\s*)?(?P<{name}>\d+(?:[ ,.]\d{{3}})*(?:[.,]\d+)?)(?!\d)'
+            rf'\s*(?P<{name}_unit>{_UNIT})?\s*(?:{_CURRENCY}(?!\w))?')
+
+_MIN_WORDS = (r'over|above|more than|greater than|at least|min(?:imum)?\.?|starting (?:at|from)|>=?|üle|'
+              r'rohkem kui|suurem kui|enam kui|vähemalt|alates')
+_MAX_WORDS = (r'under|below|less than|up to|at most|max(?:imum)?\.?|<=?|alla|kuni|vähem kui|väiksem kui|'
+              r'maksimaalselt|mitte üle')
+
+_VALUE_RANGE = re.compile(
+    rf'(?<!\w)(?:between|from|vahemikus)\s*{_amount("low")}\s*(?:and|to|[-–]|kuni|ja)\s*{_amount("high")}'
+)
+_VALUE_MIN = re.compile(rf'(?<![\w>])(?:{_MIN_WORDS})\s*{_amount("amount")}')
+_VALUE_MAX = re.compile(rf'(?<![\w<])(?:{_MAX_WORDS})\s*{_amount("amount")}')
+
+_UNIT_MULTIPLIERS = {'k': 1e3, 'tuh': 1e3, 'tho': 1e3, 'm': 1e6, 'mln': 1e6, 'mil': 1e6}
+_PERIOD_DAYS = {'day': 1, 'päe': 1, 'wee': 7, 'näd': 7, 'mon': 30, 'kuu': 30, 'yea': 365, 'aas': 365}
+
+_RELATIVE_PERIOD = re.compile(
+    r'(?<!\w)(?:(?:in )?(?:the )?(?:last|past|previous)|viimase[dl]?|eelmise[dl]?)\s+(?:(?P<count>\d+)\s+)?'
+    r'(?P<unit>days?|weeks?|months?|years?|päeva\w*|nädala\w*|kuu\w*|aasta\w*)(?!\w)'
+)
+_CURRENT_PERIOD = re.compile(
+    r'(?<!\w)(?:(?P<this>this|sel(?:lel|le)?|käesoleva[l]?)\s+(?P<unit>week|month|year|nädala\w*|kuu\w*|aasta\w*)'
+    r'|(?P<today>today|täna|tänased?|tänane)|(?P<yesterday>yesterday|eile|eilsed?|eilne)|(?P<thisyear>tänavu))(?!\w)'
+)
+
+# Words asking for the newest notices, which are worth the RSS feed round-trip
+_LIVE_WORDS = re.compile(
+    r'(?<!\w)(?:today|tonight|latest|newest|new|recent|recently|just|live|'
+    r'täna|tänased?|tänane|uued|uusi|uut|uusimad|värske\w*|viimased|hiljutised)(?!\w)'
+)
+
+_WORD = re.compile(r"[\w€'-]+")
+
+def _normalize(text: str) -> str:
+    return unicodedata.normalize('NFC', text).replace('\u00a0', ' ').lower()
+
+def _parse_amount(match: re.Match, name: str) -> float:
+    number = match.group(name)
+    if re.fullmatch(r'\d{1,3}(?:[ ,.]\d{3})+', number):
+        value = float(re.sub(r'[ ,.]', '', number))
+    else:
+        value = float(number.replace(',', '.'))
+    unit = match.group(f'{name}_unit')
+    if unit:
+        value *= _UNIT_MULTIPLIERS.get(unit[:3], _UNIT_MULTIPLIERS.get(unit[:1], 1))
+    return value
+
+def _keyword_pattern(keyword: str) -> str:
+    if keyword.endswith('*'):
+        return re.escape(keyword[:-1]) + r'\w*'
+    return re.escape(keyword) + 's?'
+
+class IntentParser:
+    """Resolve formulaic chat questions to the same intent structure the LLM returns"""
+
+    def __init__(self, counties: Dict[str, List[str]], categories: List[str]):
+        self.categories = list(categories)
+
+        category_patterns = []
+        for index, category in enumerate(self.categories):
+            # "Services" and "Supplies" alone say nothing about the category, and "IT" is an acronym
+            keywords = [word for word in re.split(r'[\s&]+', category.lower())
+                        if word and word not in ('services', 'supplies', 'it')]
+            keywords.extend(CATEGORY_KEYWORDS.get(category, []))
+            alternatives = [re.escape(category.lower())]
+            alternatives.extend(sorted(map(_keyword_pattern, keywords), key=len, reverse=True))
+            category_patterns.append(rf'(?P<category{index}>{"|".join(alternatives)})')
+        self._category_pattern = re.compile(r'(?<!\w)(?:' + '|'.join(category_patterns) + r')(?!\w)')
+
+        # "Harjumaa", "Harjumaal" and "Harju maakonnas" are the county, then towns, then a bare "Harju".
+        # A town named like a county stem ("Tartu", "Rapla") is the town unless written as the county
+        self._places: Dict[str, Tuple[str, str]] = {}
+        county_forms, bare_counties, towns = [], [], []
+        for index, county in enumerate(counties):
+            stem = re.escape((county[:-3] if county.lower().endswith('maa') else county).lower())
+            self._places[f'county{index}'] = self._places[f'stem{index}'] = ('county', county)
+            county_forms.append(rf'(?P<county{index}>{stem}(?:maa\w*|\s+maakon\w*))')
+            bare_counties.append(rf'(?P<stem{index}>{stem})')
+        cities = sorted({city for cities in counties.values() for city in cities}, key=len, reverse=True)
+        for index, city in enumerate(cities):
+            self._places[f'city{index}'] = ('city', city)
+            towns.append(rf'(?P<city{index}>{re.escape(city.lower())}(?:a|s|st|sse|ga|l|lt|le)?)')
+        self._place_pattern = re.compile(r'(?<!\w)(?:' + '|'.join(county_forms + towns + bare_counties) + r')(?!\w)')
+
+    def parse(self, message: str, now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """Intent for the message, or None when it needs the LLM"""
+        text = _normalize(_ACRONYM.sub(lambda match: _ACRONYMS[match.group()], message))
+        now = now or datetime.now()
+        spans: List[Tuple[int, int]] = []
+        filters: Dict[str, Any] = {}
+
+        def claim(match: re.Match):
+            spans.append(match.span())
+            return match
+
+        # Value ranges before single bounds, so "50k-200k" is not read as two numbers
+        for match in _VALUE_RANGE.finditer(text):
+            if 'value_min' in filters:
+                return None
+            claim(match)
+            filters['value_min'] = _parse_amount(match, 'low')
+            filters['value_max'] = _parse_amount(match, 'high')
+        text_without_ranges = self._blank(text, spans)
+        for key, pattern in (('value_min', _VALUE_MIN), ('value_max', _VALUE_MAX)):
+            for match in pattern.finditer(text_without_ranges):
+                if key in filters:
+                    return None
+                filters[key] = _parse_amount(claim(match), 'amount')
+
+        period = None
+        for match in _RELATIVE_PERIOD.finditer(text):
+            if period is not None:
+                return None
+            count = int(match.group('count') or 1)
+            period = ('days_back', count * _PERIOD_DAYS[match.group('unit')[:3]])
+            claim(match)
+        for match in _CURRENT_PERIOD.finditer(self._blank(text, spans)):
+            if period is not None:
+                return None
+            today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+            if match.group('today'):
+                start = today
+            elif match.group('yesterday'):
+                start = today - timedelta(days=1)
+            elif match.group('thisyear'):
+                start = today.replace(month=1, day=1)
+            else:
+                unit = match.group('unit')[:3]
+                if unit in ('wee', 'näd'):
+                    start = today - timedelta(days=now.weekday())
+                elif unit == 'kuu' or unit == 'mon':
+                    start = today.replace(day=1)
+                else:
+                    start = today.replace(month=1, day=1)
+            period = ('published_from', start.isoformat(sep=' '))
+            claim(match)
+        if period is not None:
+            filters[period[0]] = period[1]
+
+        for match in self._place_pattern.finditer(self._blank(text, spans)):
+            key, place = self._places[match.lastgroup]
+            if filters.setdefault(key, place) != place:
+                return None
+            claim(match)
+
+        for match in self._category_pattern.finditer(self._blank(text, spans)):
+            category = self.categories[int(match.lastgroup[len('category'):])]
+            if filters.setdefault('category', category) != category:
+                return None
+            claim(match)
+
+        intent, output_type = 'search', 'list'
+        for name, default_output, pattern in _INTENT_WORDS:
+            match = pattern.search(self._blank(text, spans))
+            if match:
+                intent, output_type = name, default_output
+                claim(match)
+        for name, pattern in _OUTPUT_WORDS:
+            match = pattern.search(self._blank(text, spans))
+            if match:
+                output_type = name
+                claim(match)
+
+        if not filters:
+            return None
+        for word in _WORD.findall(self._blank(text, spans)):
+            word = word.strip("'-")
+            if word and word not in FILLER_WORDS and not _FILLER_STEMS.match(word):
+                return None
+
+        return {
+            "intent": intent,
+            "data_source": "both" if _LIVE_WORDS.search(text) else "database",
+            "filters": filters,
+            "output_type": output_type
+        }
+
+    def resolve_value(self, phrase: str) -> Optional[Tuple[str, str]]:
+        """The category or county a name refers to ("ehitus", "IT", "Tartumaa"), as (dimension, value)"""
+        text = _normalize(_ACRONYM.sub(lambda match: _ACRONYMS[match.group()], phrase))
+        categories = {self.categories[int(match.lastgroup[len('category'):])]
+                      for match in self._category_pattern.finditer(text)}
+        counties = {self._places[match.lastgroup][1] for match in self._place_pattern.finditer(text)
+                    if self._places[match.lastgroup][0] == 'county'}
+        if len(categories) == 1 and not counties:
+            return 'category', categories.pop()
+        if len(counties) == 1 and not categories:
+            return 'county', counties.pop()
+        return None
+
+    @staticmethod
+    def _blank(text: str, spans: List[Tuple[int, int]]) -> str:
+        """Text with the claimed spans replaced by spaces, keeping offsets"""
+        chars = list(text)
+        for start, end in spans:
+            chars[start:end] = ' ' * (end - start)
+        return ''.join(chars)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Response Cache for HangeGPT
+Answers repeated questions without LLM calls or database queries:
+1. Responses keyed on the normalized intent plus the procurement data version
+2. TTL and LRU eviction
+3. Exact question matches, and optionally near-duplicates by embedding similarity
+
+Entries are only served for the data version they were answered from, so new
+procurements make every older answer unreachable until it is evicted.
+"""
+
+import json
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Sequence, Any
+
+import numpy as np
+
+@dataclass
+class CachedResponse:
+    """A generated answer and what it was generated from"""
+    response: str
+    data_version: str
+    intent_key: str
+    question_key: str
+    created_at: float
+    embedding: Optional[np.ndarray] = None
+
+def normalize_question(question: str) -> str:
+    return ' '.join(question.lower().split()).strip(' ?!.')
+
+def intent_key(intent: Dict[str, Any], question: str) -> str:
+    """Canonical JSON of an intent.
+
+    Without filters an intent says little about the answer ("most common
+    categories?" and "what is HangeGPT?" both search everything), so the
+    normalized question is part of the key.
+    """
+    filters = {}
+    for key, value in (intent.get('filters') or {}).items():
+        if value in (None, '', []):
+            continue
+        if isinstance(value, str):
+            value = value.strip().lower()
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = float(value)
+        filters[key] = value
+
+    canonical = {
+        'intent': intent.get('intent'),
+        'data_source': intent.get('data_source'),
+        'output_type': intent.get('output_type'),
+        'filters': filters,
+    }
+    if intent.get('aggregate'):
+        canonical['aggregate'] = intent['aggregate']
+    if intent.get('search_text'):
+        canonical['search_text'] = ' '.join(str(intent['search_text']).lower().split())
+    if not filters:
+        canonical['question'] = normalize_question(question)
+    return json.dumps(canonical, sort_keys=True, ensure_ascii=False, default=str)
+
+class ResponseCache:
+    """Thread-safe LRU cache of chat responses with a time-to-live"""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600,
+                 embed: Optional[Callable[[str], Sequence[float]]] = None,
+                 similarity_threshold: float = 0.95,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.embed = embed
+        self.similarity_threshold = similarity_threshold
+        self.clock = clock
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._questions: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        # The question looked up is usually the one stored next, so its embedding is kept
+        self._last_embedding = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(data_version: str, key: str) -> str:
+        return f"{data_version}\0{key}"
+
+    def _live(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self.clock() - entry.created_at > self.ttl_seconds:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None and self._questions.get(entry.question_key) == key:
+            del self._questions[entry.question_key]
+
+    def _count(self, entry: Optional[CachedResponse]) -> Optional[str]:
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry.response
+
+    def get_for_intent(self, intent: Dict[str, Any], question: str, data_version: str) -> Optional[str]:
+        """Cached response for a resolved intent"""
+        with self._lock:
+            return self._count(self._live(self._key(data_version, intent_key(intent, question))))
+
+    def get_for_question(self, question: str, data_version: str) -> Optional[str]:
+        """Cached response for the same question, or a near-duplicate when embeddings are enabled"""
+        with self._lock:
+            key = self._questions.get(self._key(data_version, normalize_question(question)))
+            entry = self._live(key) if key else None
+        if entry is None and self.embed is not None:
+            entry = self._nearest(self._embedding(question), data_version)
+        if entry is None:
+            # Not a miss yet: the intent lookup after analyze_intent may still hit
+            return None
+        with self._lock:
+            return self._count(entry)
+
+    def _embedding(self, question: str) -> np.ndarray:
+        question = normalize_question(question)
+        last = self._last_embedding
+        if last is not None and last[0] == question:
+            return last[1]
+        vector = np.asarray(self.embed(question), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        vector = vector / norm if norm else vector
+        self._last_embedding = (question, vector)
+        return vector
+
+    def _nearest(self, embedding: np.ndarray, data_version: str) -> Optional[CachedResponse]:
+        with self._lock:
+            candidates = [(key, entry) for key, entry in self._entries.items()
+                          if entry.data_version == data_version and entry.embedding is not None]
+            if not candidates:
+                return None
+            similarities = np.stack([entry.embedding for _, entry in candidates]) @ embedding
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.similarity_threshold:
+                return None
+            return self._live(candidates[best][0])
+
+    def put(self, question: str, intent: Dict[str, Any], data_version: str, response: str):
+        """Cache a response under its intent and question"""
+        embedding = self._embedding(question) if self.embed is not None else None
+        key = self._key(data_version, intent_key(intent, question))
+        question_key = self._key(data_version, normalize_question(question))
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = CachedResponse(response, data_version, key, question_key, self.clock(), embedding)
+            self._questions[question_key] = key
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._questions.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+# One cache per process, so a popular question asked in any session is answered once
+_shared_cache: Optional[ResponseCache] = None
+_shared_cache_lock = threading.Lock()
+
+def get_response_cache(embed: Optional[Callable[[str], Sequence[float]]] = None) -> ResponseCache:
+    """Return the shared response cache, created on first use"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = ResponseCache(embed=embed)
+        return _shared_cache
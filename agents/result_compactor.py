@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Result Compaction for HangeGPT
+Turns query results into a short prompt section instead of raw JSON rows:
+1. Counts, total values and date ranges over every matched row
+2. Totals by category and county
+3. The highest-value rows as a pipe table with truncated fields
+4. A token budget, filled round-robin from database and RSS rows
+5. Aggregate answers as a table of per-group statistics
+
+Aggregates always cover every row, so counts and totals stay exact when the
+table has to leave rows out.
+"""
+
+import math
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+# Rough size of a token in the Estonian and English text of procurement rows
+CHARS_PER_TOKEN = 4
+DEFAULT_TOKEN_BUDGET = 1500
+DEFAULT_TOP_N = 20
+# Category and county groups listed before the rest are folded into "others"
+MAX_GROUPS = 8
+
+DATABASE_COLUMNS = [('title', 90), ('procurer', 40), ('category', 30), ('county', 20),
+                    ('estimated_value', 14), ('published', 10), ('clean_description', 80), ('link', 100)]
+RSS_COLUMNS = [('title', 90), ('procurer', 40), ('published', 16), ('description', 80), ('link', 100)]
+SIMILAR_COLUMNS = [('similarity', 4)] + DATABASE_COLUMNS
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def _euros(value: float) -> str:
+    return f"€{value:,.0f}"
+
+def _truncate(value: Any, limit: int) -> str:
+    if value is None or value == '':
+        return '-'
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return _euros(value)
+    text = ' '.join(str(value).replace('|', '/').split())
+    if len(text) > limit:
+        text = text[:limit - 1].rstrip() + '…'
+    return text
+
+def _cell(row: Dict[str, Any], name: str, limit: int) -> str:
+    value = row.get(name)
+    if name == 'published' and value:
+        # ISO timestamps and RSS dates keep their date part whole
+        return str(value)[:limit].strip()
+    return _truncate(value, limit)
+
+def _row(row: Dict[str, Any], columns: List[Tuple[str, int]]) -> str:
+    return ' | '.join(_cell(row, name, limit) for name, limit in columns)
+
+def _header(columns: List[Tuple[str, int]]) -> str:
+    return ' | '.join(name for name, _ in columns)
+
+def _groups(rows: List[Dict[str, Any]], key: str) -> str:
+    counts = defaultdict(int)
+    totals = defaultdict(float)
+    for row in rows:
+        group = row.get(key) or 'Unknown'
+        counts[group] += 1
+        totals[group] += row.get('estimated_value') or 0
+
+    ordered = sorted(counts, key=lambda group: (-counts[group], -totals[group], group))
+    parts = [f"{group} {counts[group]} ({_euros(totals[group])})" for group in ordered[:MAX_GROUPS]]
+    others = ordered[MAX_GROUPS:]
+    if others:
+        parts.append(f"{len(others)} others {sum(counts[group] for group in others)} "
+                     f"({_euros(sum(totals[group] for group in others))})")
+    return '; '.join(parts)
+
+def summarize_database(rows: List[Dict[str, Any]], label: str = "Database") -> List[str]:
+    """Aggregate lines over all database rows"""
+    values = [row['estimated_value'] for row in rows if row.get('estimated_value')]
+    dates = sorted(str(row['published'])[:10] for row in rows if row.get('published'))
+
+    line = f"{label}: {len(rows)} procurements"
+    if values:
+        line += (f", {len(values)} with an estimated value totalling {_euros(sum(values))}"
+                 f" (average {_euros(sum(values) / len(values))}, largest {_euros(max(values))})")
+    if dates:
+        line += f", published {dates[0]} to {dates[-1]}"
+    return [line, f"By category: {_groups(rows, 'category')}", f"By county: {_groups(rows, 'county')}"]
+
+AGGREGATE_COLUMNS = ['procurements', 'with value', 'total value', 'average value', 'largest value']
+
+def _aggregate_row(group: Dict[str, Any]) -> str:
+    cells = [group['count'], group['valued_count'], group['total_value'], group['average_value'], group['max_value']]
+    return ' | '.join([_truncate(group['group'], 60)] +
+                      [str(cell) if isinstance(cell, int) else _truncate(cell, 20) for cell in cells])
+
+def summarize_aggregates(aggregates: Dict[str, Any]) -> List[str]:
+    """Per-group statistics computed over every matching procurement"""
+    group_by = aggregates['group_by']
+    lines = [f"Statistics over all {aggregates['total']['count']} matching procurements in the database, "
+             f"grouped by {group_by}:",
+             ' | '.join([group_by] + AGGREGATE_COLUMNS)]
+    lines.extend(_aggregate_row(group) for group in aggregates['groups'])
+    lines.append(_aggregate_row(aggregates['total']))
+    return lines
+
+def _by_value(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Highest estimated value first, then the most recently published"""
+    rows = sorted(rows, key=lambda row: str(row.get('published') or ''), reverse=True)
+    return sorted(rows, key=lambda row: row.get('estimated_value') or 0, reverse=True)
+
+def compact_results(query_results: Optional[Dict[str, Any]], token_budget: int = DEFAULT_TOKEN_BUDGET,
+                    top_n: int = DEFAULT_TOP_N) -> str:
+    """Prompt text for query results, within token_budget tokens where the aggregates allow"""
+    query_results = query_results or {}
+    database = query_results.get('database') or []
+    rss = query_results.get('rss') or []
+    similar = query_results.get('similar') or []
+
+    lines = []
+    for source, key in (('database', 'error'), ('RSS feed', 'rss_error'), ('similarity index', 'similar_error')):
+        if query_results.get(key):
+            lines.append(f"Error querying the {source}: {_truncate(query_results[key], 200)}")
+    if query_results.get('aggregates') and query_results['aggregates']['total']['count']:
+        lines.extend(summarize_aggregates(query_results['aggregates']))
+        return '\n'.join(lines)
+    if not database and not rss and not similar:
+        lines.append("No procurements matched the query.")
+        return '\n'.join(lines)
+
+    if database:
+        lines.extend(summarize_database(database))
+    if similar:
+        lines.extend(summarize_database(similar, "Similar notices"))
+    if rss:
+        lines.append(f"RSS feed: {len(rss)} recent procurements")
+
+    # Rows are taken in turn from each source while they fit, so neither crowds out the other
+    tables = []
+    if database:
+        tables.append(("Database procurements, highest estimated value first:", DATABASE_COLUMNS,
+                       _by_value(database)))
+    if similar:
+        tables.append(("Procurements most similar to the question, best match first:", SIMILAR_COLUMNS, similar))
+    if rss:
+        tables.append(("RSS feed procurements, newest first:", RSS_COLUMNS, rss))
+
+    used = estimate_tokens('\n'.join(lines))
+    candidates = []
+    for title, columns, rows in tables:
+        heading = f"{title}\n{_header(columns)}"
+        used += estimate_tokens(heading) + 1
+        candidates.append([_row(row, columns) for row in rows[:top_n]])
+    shown = [0] * len(tables)
+
+    filling = set(range(len(tables)))
+    while filling:
+        for index in sorted(filling):
+            if shown[index] == len(candidates[index]):
+                filling.discard(index)
+                continue
+            cost = estimate_tokens(candidates[index][shown[index]]) + 1
+            if used + cost > token_budget:
+                filling.discard(index)
+                continue
+            used += cost
+            shown[index] += 1
+
+    for (title, columns, rows), table_rows, count in zip(tables, candidates, shown):
+        if count:
+            lines.extend([title, _header(columns)])
+            lines.extend(table_rows[:count])
+        if len(rows) > count:
+            lines.append(f"({len(rows) - count} more not shown)")
+    return '\n'.join(lines)
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Document Chunking for Hange AI
+Map-reduce support for documents longer than the extraction prompt window:
+1. Split text into chunks on section headings and table boundaries
+2. Merge per-chunk extraction results deterministically, deduplicating
+   fields by field_name and reconciling their confidence scores
+
+Chunk boundaries are content-defined: whether a chunk ends after a section
+depends only on that section's text, so an amendment to one section changes
+the chunk containing it and leaves the others, and their cached results,
+untouched.
+"""
+
+import re
+import zlib
+from typing import Dict, List, Optional, Any
+
+# Part of the extraction prompt version, so changing the strategy invalidates cached results
+CHUNKING_VERSION = 'sections-v2'
+
+# Headings and extractor markers that start a new section, in raw or whitespace-collapsed text
+_SECTION_START = re.compile(
+    r'(?:(?<=\n)|(?<=[.:;!?] ))(?:\d{1,2}(?:\.\d{1,2})*\.? +[A-ZÕÄÖÜŠŽ]|[A-ZÕÄÖÜŠŽ]{3,}(?: [A-ZÕÄÖÜŠŽ]{2,})*:)'
+    r'|(?<!\S)(?:SHEET|HEADERS|HEADER|FOOTER|DATA SAMPLE|FORMULAS):'
+)
+
+# Places to break a section that is too long on its own: line and sentence ends
+_WEAK_BREAK = re.compile(r'(?<=\n)|(?<=[.!?] )')
+
+TABLE_CELL_SEPARATOR = ' | '
+
+def _section_starts(text: str) -> List[int]:
+    starts = {0}
+    starts.update(match.start() for match in _SECTION_START.finditer(text))
+
+    # Tables extracted one row per line start and end a section
+    offset = 0
+    previous_is_row = False
+    for line in text.splitlines(keepends=True):
+        is_row = TABLE_CELL_SEPARATOR in line
+        if is_row != previous_is_row and offset:
+            starts.add(offset)
+        previous_is_row = is_row
+        offset += len(line)
+
+    return sorted(starts)
+
+def _split_at(text: str, positions: List[int]) -> List[str]:
+    bounds = [0] + [p for p in positions if 0 < p < len(text)] + [len(text)]
+    return [text[start:end] for start, end in zip(bounds, bounds[1:]) if end > start]
+
+def _split_long(text: str, max_chars: int) -> List[str]:
+    """Split an oversized section at line or sentence ends, then at whitespace"""
+    pieces = []
+    for piece in _split_at(text, [match.start() for match in _WEAK_BREAK.finditer(text)]):
+        while len(piece) > max_chars:
+            cut = piece.rfind(' ', 1, max_chars + 1)
+            cut = cut + 1 if cut > 0 else max_chars
+            pieces.append(piece[:cut])
+            piece = piece[cut:]
+        if piece:
+            pieces.append(piece)
+    return pieces
+
+def _ends_chunk(piece: str, target_chars: int) -> bool:
+    """Content-defined anchor, hit with probability len(piece) / target_chars"""
+    return zlib.crc32(piece.encode('utf-8')) < len(piece) * 0xFFFFFFFF // target_chars
+
+def _pack(pieces: List[str], max_chars: int) -> List[str]:
+    """Join consecutive pieces into chunks of at most max_chars, ending chunks at anchors.
+
+    Chunks average about half of max_chars, so the hard limit rarely
+    decides a boundary and boundaries resynchronize right after an edit.
+    """
+    target_chars = max(1, max_chars // 2)
+    chunks = []
+    current = ''
+    for piece in pieces:
+        if current and len(current) + len(piece) > max_chars:
+            chunks.append(current)
+            current = ''
+        current += piece
+        if _ends_chunk(piece, target_chars):
+            chunks.append(current)
+            current = ''
+    if current:
+        chunks.append(current)
+    return chunks
+
+def split_into_chunks(text: str, max_chars: int) -> List[str]:
+    """Split text into chunks of at most max_chars, preferring section and table boundaries.
+
+    Concatenating the chunks gives back the original text.
+    """
+    if len(text) <= max_chars:
+        return [text] if text else []
+
+    pieces = []
+    for section in _split_at(text, _section_starts(text)):
+        if len(section) > max_chars:
+            pieces.extend(_split_long(section, max_chars))
+        else:
+            pieces.append(section)
+    return _pack(pieces, max_chars)
+
+def _normalize_key(value: Any) -> str:
+    return re.sub(r'\s+', ' ', str(value)).strip().lower()
+
+def _merge_field(merged: Dict[str, Any], field: Dict[str, Any]):
+    """Fold a repeated field into the first occurrence"""
+    # Independent sightings corroborate each other (noisy-or)
+    merged_confidence = float(merged.get('confidence_score') or 0.0)
+    confidence = float(field.get('confidence_score') or 0.0)
+    merged['confidence_score'] = round(1 - (1 - merged_confidence) * (1 - confidence), 4)
+
+    merged['required'] = bool(merged.get('required')) or bool(field.get('required'))
+
+    if field.get('options'):
+        options = list(merged.get('options') or [])
+        options.extend(option for option in field['options'] if option not in options)
+        merged['options'] = options
+
+    for key, value in field.items():
+        if value not in (None, '', []) and merged.get(key) in (None, '', []):
+            merged[key] = value
+
+def merge_extractions(results: List[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Reduce per-chunk extraction results, in chunk order, into one result"""
+    merged: Dict[str, Any] = {
+        'document_type': None,
+        'title': None,
+        'form_fields': [],
+        'requirements': [],
+        'sections': [],
+        'key_information': {}
+    }
+    fields_by_name: Dict[str, Dict[str, Any]] = {}
+    seen_requirements = set()
+    sections_by_title: Dict[str, Dict[str, Any]] = {}
+
+    for result in results:
+        if not result:
+            continue
+
+        for key in ('document_type', 'title'):
+            if not merged[key] and result.get(key) and result[key] != 'Untitled':
+                merged[key] = result[key]
+
+        for field in result.get('form_fields') or []:
+            name = _normalize_key(field.get('field_name', ''))
+            if not name:
+                continue
+            if name in fields_by_name:
+                _merge_field(fields_by_name[name], field)
+            else:
+                fields_by_name[name] = dict(field)
+                merged['form_fields'].append(fields_by_name[name])
+
+        for requirement in result.get('requirements') or []:
+            key = _normalize_key(requirement)
+            if key and key not in seen_requirements:
+                seen_requirements.add(key)
+                merged['requirements'].append(requirement)
+
+        for section in result.get('sections') or []:
+            title = _normalize_key(section.get('section_title', ''))
+            if title in sections_by_title:
+                existing = sections_by_title[title]
+                fields = existing.setdefault('fields', [])
+                fields.extend(f for f in section.get('fields') or [] if f not in fields)
+                if not existing.get('description') and section.get('description'):
+                    existing['description'] = section['description']
+            else:
+                sections_by_title[title] = dict(section, fields=list(section.get('fields') or []))
+                merged['sections'].append(sections_by_title[title])
+
+        for key, value in (result.get('key_information') or {}).items():
+            if value and not merged['key_information'].get(key):
+                merged['key_information'][key] = value
+
+    merged['document_type'] = merged['document_type'] or 'unknown'
+    merged['title'] = merged['title'] or 'Untitled'
+    return merged
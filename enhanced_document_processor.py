@@ -9,21 +9,30 @@ Implements all production recommendations:
 """
 
 import os
+import time
 import json
 import hashlib
-import tempfile
 import sqlite3
+import zipfile
+import atexit
+import threading
+import weakref
+from collections import OrderedDict
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple, Any
-from dataclasses import dataclass, asdict
-import pandas as pd
+from typing import Dict, List, Optional, Tuple, Any, Iterator, Iterable
+from dataclasses import dataclass, field
 import openpyxl
-from docx import Document
+from lxml import etree
 from openai import OpenAI
 from dotenv import load_dotenv
-import re
 import logging
 
+from document_chunking import CHUNKING_VERSION, split_into_chunks, merge_extractions
+from text_normalizer import normalize_document_text
+from field_rules import RULES_VERSION, RuleExtraction, extract_with_coverage as extract_rules_with_coverage
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -34,6 +43,68 @@ client = OpenAI()
 client.api_key = os.getenv('OPENAI_API_KEY')
 OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4.1-mini')
 
+EXTRACTION_SYSTEM_PROMPT = "You are an expert Estonian procurement document analyzer. Always return valid JSON with confidence scores."
+EXTRACTION_PROMPT = """
+        You are an expert document analyzer specializing in Estonian procurement documents. 
+        Analyze the following {document_type} document and extract all form fields with high accuracy.
+        
+        Document Content:
+        {content}
+        
+        Return a JSON structure with confidence scoring:
+        {{
+            "document_type": "specific document type",
+            "title": "document title",
+            "form_fields": [
+                {{
+                    "field_name": "snake_case_name",
+                    "field_type": "text|number|email|tel|date|checkbox|dropdown|textarea",
+                    "label": "human readable Estonian label",
+                    "required": true/false,
+                    "description": "detailed field description",
+                    "options": ["option1", "option2"], // only for dropdown/checkbox
+                    "validation": "validation rules (e.g., min_length:5, pattern:^[0-9]+$)",
+                    "confidence_score": 0.0-1.0,
+                    "source_text": "original text that led to this field"
+                }}
+            ],
+            "requirements": ["requirement 1", "requirement 2"],
+            "sections": [
+                {{
+                    "section_title": "section name",
+                    "fields": ["field1", "field2"],
+                    "description": "section purpose"
+                }}
+            ],
+            "key_information": {{
+                "deadline": "if mentioned",
+                "contact_person": "if mentioned",
+                "submission_method": "how to submit",
+                "evaluation_criteria": "evaluation details"
+            }}
+        }}
+        
+        Focus on:
+        1. Estonian language field labels and descriptions
+        2. Proper validation rules for Estonian formats (phone, ID, VAT)
+        3. High confidence scores for clearly identifiable fields
+        4. Detailed source text references
+        
+        Return only valid JSON.
+        """
+# Longer content is split into chunks of at most this many characters
+EXTRACTION_CONTENT_LIMIT = 12000
+
+# Bump whenever text extraction from files changes (XLSX/DOCX parsing, headers, merged cells)
+EXTRACTOR_VERSION = 'streaming-v2'
+
+# Changes whenever the prompt, content limit, chunking, text extractors or rules change,
+# so stale cache entries stop matching
+PROMPT_VERSION = hashlib.sha256(
+    f"{EXTRACTION_SYSTEM_PROMPT}\n{EXTRACTION_PROMPT}\n{EXTRACTION_CONTENT_LIMIT}\n{CHUNKING_VERSION}\n"
+    f"{EXTRACTOR_VERSION}\n{RULES_VERSION}".encode()
+).hexdigest()[:12]
+
 @dataclass
 class ExtractedField:
     """Represents an extracted form field with metadata"""
@@ -47,6 +118,7 @@ class ExtractedField:
     confidence_score: float = 0.0
     source_text: Optional[str] = None
     needs_review: bool = False
+    source_offset: Optional[int] = None
 
 @dataclass
 class DocumentAnalysis:
@@ -62,17 +134,66 @@ class DocumentAnalysis:
     cache_hit: bool = False
     needs_human_review: bool = False
 
+@dataclass
+class BatchDocumentResult:
+    """Outcome of one document in a batch, with per-stage timings in seconds"""
+    file_path: str
+    document_type: str
+    analysis: Optional[DocumentAnalysis] = None
+    error: Optional[str] = None
+    cache_hit: bool = False
+    cache_level: Optional[str] = None  # 'file' or 'content' on a cache hit
+    timings: Dict[str, float] = field(default_factory=dict)
+
+# Caches still open at interpreter exit get their pending statistics flushed.
+# The set holds weak references, so a cache that is no longer used can be garbage-collected.
+_open_caches: "weakref.WeakSet[DocumentCache]" = weakref.WeakSet()
+
+@atexit.register
+def _close_open_caches():
+    for cache in list(_open_caches):
+        cache.close()
+
 class DocumentCache:
-    """Caching system for document extraction results"""
+    """Caching system for document extraction results
+
+    Keeps one long-lived WAL-mode connection with an in-memory LRU tier in
+    front of it. Hit statistics are buffered and written in batches, and the
+    table is bounded by entry count, total bytes and age, evicting the least
+    recently accessed entries first.
     
-    def __init__(self, cache_db_path: str = "document_cache.db"):
+    Results are keyed by the preprocessed text, and a second index maps the
+    raw file bytes to that key so re-uploads skip text extraction. Both keys
+    are namespaced by model and prompt version.
+    """
+    
+    def __init__(self, cache_db_path: str = "document_cache.db", memory_size: int = 128,
+                 max_entries: int = 5000, max_bytes: int = 200 * 1024 * 1024,
+                 max_age_days: int = 90, stats_batch_size: int = 50,
+                 namespace: Optional[str] = None):
         self.cache_db_path = cache_db_path
+        self.namespace = namespace or f"{OPENAI_MODEL}:{PROMPT_VERSION}"
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.stats_batch_size = stats_batch_size
+        
+        self._lock = threading.RLock()
+        self._memory: OrderedDict = OrderedDict()  # content_hash -> extraction_result JSON
+        self._pending_hits: Dict[str, Tuple[int, str]] = {}  # content_hash -> (hits, last_accessed)
+        self._writes_since_eviction = 0
+        
+        self._conn = sqlite3.connect(self.cache_db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
         self._init_cache_db()
+        self.evict()
+        _open_caches.add(self)
     
     def _init_cache_db(self):
         """Initialize cache database"""
-        conn = sqlite3.connect(self.cache_db_path)
-        cursor = conn.cursor()
+        cursor = self._conn.cursor()
         
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS document_cache (
@@ -85,63 +206,362 @@ class DocumentCache:
                 last_accessed TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_document_cache_last_accessed
+            ON document_cache (last_accessed)
+        ''')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS document_file_index (
+                file_hash TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
         
-        conn.commit()
-        conn.close()
+        self._conn.commit()
+    
+    @staticmethod
+    def _timestamp() -> str:
+        """Current UTC time in SQLite CURRENT_TIMESTAMP format"""
+        return datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
     
     def get_content_hash(self, content: str) -> str:
         """Generate hash for document content"""
-        return hashlib.sha256(content.encode()).hexdigest()
+        return hashlib.sha256(f"{self.namespace}\0{content}".encode()).hexdigest()
+    
+    def get_file_hash(self, file_path: str, document_type: str) -> str:
+        """Generate hash for the raw file bytes and how they are parsed"""
+        digest = hashlib.sha256(f"{self.namespace}\0{document_type}\0".encode())
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def _remember(self, content_hash: str, result_json: str):
+        """Put a result in the in-memory LRU tier"""
+        self._memory[content_hash] = result_json
+        self._memory.move_to_end(content_hash)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+    
+    def _record_hit(self, content_hash: str):
+        """Buffer access statistics, writing them out in batches"""
+        hits, _ = self._pending_hits.get(content_hash, (0, None))
+        self._pending_hits[content_hash] = (hits + 1, self._timestamp())
+        if len(self._pending_hits) >= self.stats_batch_size:
+            self.flush_access_stats()
+    
+    def flush_access_stats(self):
+        """Write buffered access statistics in one transaction"""
+        with self._lock:
+            if not self._pending_hits:
+                return
+            pending = [(hits, last_accessed, content_hash)
+                       for content_hash, (hits, last_accessed) in self._pending_hits.items()]
+            self._pending_hits.clear()
+            with self._conn:
+                self._conn.executemany('''
+                    UPDATE document_cache 
+                    SET access_count = access_count + ?, 
+                        last_accessed = ? 
+                    WHERE content_hash = ?
+                ''', pending)
     
     def get_cached_result(self, content: str) -> Optional[Dict]:
         """Retrieve cached extraction result"""
-        content_hash = self.get_content_hash(content)
-        
-        conn = sqlite3.connect(self.cache_db_path)
-        cursor = conn.cursor()
+        return self._get_by_hash(self.get_content_hash(content))
+    
+    def get_cached_file_result(self, file_hash: str) -> Optional[Dict]:
+        """Retrieve cached extraction result for a file without extracting its text"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT content_hash FROM document_file_index WHERE file_hash = ?', (file_hash,)
+            ).fetchone()
+        if row is None:
+            return None
+        return self._get_by_hash(row[0])
+    
+    def _get_by_hash(self, content_hash: str) -> Optional[Dict]:
+        with self._lock:
+            result_json = self._memory.get(content_hash)
+            if result_json is not None:
+                self._memory.move_to_end(content_hash)
+            else:
+                row = self._conn.execute('''
+                    SELECT extraction_result 
+                    FROM document_cache 
+                    WHERE content_hash = ?
+                ''', (content_hash,)).fetchone()
+                if row is None:
+                    return None
+                result_json = row[0]
+                self._remember(content_hash, result_json)
+            
+            self._record_hit(content_hash)
         
-        cursor.execute('''
-            SELECT extraction_result, confidence_score 
-            FROM document_cache 
-            WHERE content_hash = ?
-        ''', (content_hash,))
+        extraction_result = json.loads(result_json)
+        extraction_result['cache_hit'] = True
+        logger.info(f"Cache hit for document hash: {content_hash[:8]}...")
+        return extraction_result
+    
+    def cache_result(self, content: str, document_type: str, extraction_result: Dict,
+                     file_hash: Optional[str] = None):
+        """Cache extraction result, optionally indexed by the raw file hash as well"""
+        content_hash = self.get_content_hash(content)
+        result_json = json.dumps(extraction_result)
         
-        result = cursor.fetchone()
+        with self._lock:
+            with self._conn:
+                self._conn.execute('''
+                    INSERT OR REPLACE INTO document_cache 
+                    (content_hash, document_type, extraction_result, confidence_score)
+                    VALUES (?, ?, ?, ?)
+                ''', (content_hash, document_type, result_json, 
+                      extraction_result.get('confidence_score', 0.0)))
+            self._remember(content_hash, result_json)
+            if file_hash:
+                self.index_file(file_hash, content_hash)
+            
+            self._writes_since_eviction += 1
+            if self._writes_since_eviction >= self.stats_batch_size:
+                self.evict()
         
-        if result:
-            # Update access statistics
+        logger.info(f"Cached result for document hash: {content_hash[:8]}...")
+        return content_hash
+    
+    @staticmethod
+    def _chunk_key(chunk: str, document_type: str) -> str:
+        # Kept apart from whole-document entries, which store scored results
+        return f"chunk\0{document_type}\0{chunk}"
+    
+    def get_cached_chunk(self, chunk: str, document_type: str) -> Optional[Dict]:
+        """Retrieve the cached extraction result for one chunk of a long document"""
+        extraction_result = self.get_cached_result(self._chunk_key(chunk, document_type))
+        if extraction_result:
+            extraction_result.pop('cache_hit', None)
+        return extraction_result
+    
+    def cache_chunk(self, chunk: str, document_type: str, extraction_result: Dict):
+        """Cache the extraction result for one chunk of a long document"""
+        self.cache_result(self._chunk_key(chunk, document_type), f"chunk:{document_type}", extraction_result)
+    
+    def index_file(self, file_hash: str, content_hash: str):
+        """Map a raw file hash to the content hash of its cached result"""
+        with self._lock:
+            with self._conn:
+                self._conn.execute('''
+                    INSERT OR REPLACE INTO document_file_index (file_hash, content_hash)
+                    VALUES (?, ?)
+                ''', (file_hash, content_hash))
+    
+    def evict(self) -> int:
+        """Evict expired entries, then least recently used ones over the entry or byte budget"""
+        with self._lock:
+            self.flush_access_stats()
+            self._writes_since_eviction = 0
+            
+            cursor = self._conn.cursor()
+            cursor.execute(
+                "SELECT content_hash FROM document_cache WHERE created_at < datetime('now', ?)",
+                (f'-{self.max_age_days} days',)
+            )
+            evicted = [row[0] for row in cursor.fetchall()]
+            
             cursor.execute('''
-                UPDATE document_cache 
-                SET access_count = access_count + 1, 
-                    last_accessed = CURRENT_TIMESTAMP 
-                WHERE content_hash = ?
-            ''', (content_hash,))
-            conn.commit()
+                SELECT content_hash, LENGTH(extraction_result) 
+                FROM document_cache 
+                WHERE created_at >= datetime('now', ?)
+                ORDER BY last_accessed DESC, access_count DESC
+            ''', (f'-{self.max_age_days} days',))
+            total_bytes = 0
+            for index, (content_hash, size) in enumerate(cursor.fetchall()):
+                total_bytes += size or 0
+                if index >= self.max_entries or total_bytes > self.max_bytes:
+                    evicted.append(content_hash)
+            
+            if evicted:
+                with self._conn:
+                    self._conn.executemany('DELETE FROM document_cache WHERE content_hash = ?',
+                                           [(content_hash,) for content_hash in evicted])
+                for content_hash in evicted:
+                    self._memory.pop(content_hash, None)
+            
+            # Drop file index entries whose result is gone
+            with self._conn:
+                self._conn.execute('''
+                    DELETE FROM document_file_index 
+                    WHERE content_hash NOT IN (SELECT content_hash FROM document_cache)
+                ''')
             
-            extraction_result = json.loads(result[0])
-            extraction_result['cache_hit'] = True
-            logger.info(f"Cache hit for document hash: {content_hash[:8]}...")
+            if evicted:
+                logger.info(f"Evicted {len(evicted)} document cache entries")
             
-        conn.close()
-        return extraction_result if result else None
+            return len(evicted)
     
-    def cache_result(self, content: str, document_type: str, extraction_result: Dict):
-        """Cache extraction result"""
-        content_hash = self.get_content_hash(content)
-        
-        conn = sqlite3.connect(self.cache_db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO document_cache 
-            (content_hash, document_type, extraction_result, confidence_score)
-            VALUES (?, ?, ?, ?)
-        ''', (content_hash, document_type, json.dumps(extraction_result), 
-              extraction_result.get('confidence_score', 0.0)))
-        
-        conn.commit()
-        conn.close()
-        logger.info(f"Cached result for document hash: {content_hash[:8]}...")
+    def close(self):
+        """Flush pending statistics and close the connection"""
+        with self._lock:
+            _open_caches.discard(self)
+            if self._conn is None:
+                return
+            try:
+                self.flush_access_stats()
+            finally:
+                self._conn.close()
+                self._conn = None
+
+_XLSX_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_OFFICE_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_PACKAGE_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+def _xlsx_sheet_parts(archive: zipfile.ZipFile) -> Dict[str, str]:
+    """Map sheet names to their worksheet XML part in the archive"""
+    workbook = etree.fromstring(archive.read('xl/workbook.xml'))
+    rels = etree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    targets = {rel.get('Id'): rel.get('Target') for rel in rels.iter(f'{{{_PACKAGE_REL_NS}}}Relationship')}
+    
+    parts = {}
+    for sheet in workbook.iter(f'{{{_XLSX_MAIN_NS}}}sheet'):
+        target = targets.get(sheet.get(f'{{{_OFFICE_REL_NS}}}id'))
+        if target:
+            parts[sheet.get('name')] = target.lstrip('/') if target.startswith('/') else f'xl/{target}'
+    return parts
+
+def _scan_xlsx_sheet_xml(archive: zipfile.ZipFile, part: str,
+                         formula_limit: int = 5) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """Stream one worksheet's XML, returning (formulas, validations) as (reference, formula) pairs"""
+    formulas, validations = [], []
+    row_tag = f'{{{_XLSX_MAIN_NS}}}row'
+    cell_tag = f'{{{_XLSX_MAIN_NS}}}c'
+    validation_tag = f'{{{_XLSX_MAIN_NS}}}dataValidation'
+    
+    with archive.open(part) as xml:
+        for _, element in etree.iterparse(xml, events=('end',), tag=(row_tag, cell_tag, validation_tag)):
+            if element.tag == cell_tag:
+                formula = element.findtext(f'{{{_XLSX_MAIN_NS}}}f')
+                # Cells sharing a formula carry an empty <f>; only the defining cell has text
+                if formula and len(formulas) < formula_limit:
+                    formulas.append((element.get('r'), formula))
+            elif element.tag == row_tag:
+                # Drop parsed rows so memory does not grow with the sheet
+                element.clear()
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+            else:
+                formula1 = element.findtext(f'{{{_XLSX_MAIN_NS}}}formula1')
+                if formula1:
+                    validations.append((element.get('sqref'), formula1))
+    
+    return formulas, validations
+
+_DOCX_MAIN_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+_OFFICE_DOCUMENT_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+
+def _w(tag: str) -> str:
+    return f'{{{_DOCX_MAIN_NS}}}{tag}'
+
+def _docx_main_part(archive: zipfile.ZipFile) -> str:
+    """Name of the main document part, normally word/document.xml"""
+    rels = etree.fromstring(archive.read('_rels/.rels'))
+    for rel in rels.iter(f'{{{_PACKAGE_REL_NS}}}Relationship'):
+        if rel.get('Type') == _OFFICE_DOCUMENT_REL:
+            return rel.get('Target').lstrip('/')
+    return 'word/document.xml'
+
+def _docx_part_targets(archive: zipfile.ZipFile, part: str) -> Dict[str, str]:
+    """Map relationship ids of a part to the part names they target"""
+    folder, name = part.rsplit('/', 1) if '/' in part else ('', part)
+    rels_part = f'{folder}/_rels/{name}.rels' if folder else f'_rels/{name}.rels'
+    if rels_part not in archive.namelist():
+        return {}
+    rels = etree.fromstring(archive.read(rels_part))
+    targets = {}
+    for rel in rels.iter(f'{{{_PACKAGE_REL_NS}}}Relationship'):
+        target = rel.get('Target')
+        targets[rel.get('Id')] = target.lstrip('/') if target.startswith('/') else f'{folder}/{target}'
+    return targets
+
+def _docx_paragraph_text(paragraph) -> str:
+    """Run text of a paragraph, with tabs and line breaks inside runs"""
+    run_tag = _w('r')
+    text = []
+    for element in paragraph.iter(_w('t'), _w('tab'), _w('br'), _w('cr')):
+        if element.tag == _w('t'):
+            text.append(element.text or '')
+        elif element.getparent().tag == run_tag:
+            # Tab stops in paragraph properties are also <w:tab>
+            text.append('\t' if element.tag == _w('tab') else '\n')
+    return ''.join(text)
+
+def _iter_docx_part(archive: zipfile.ZipFile, part: str,
+                    references: Optional[List[Tuple[str, str]]] = None) -> Iterator[str]:
+    """Stream one WordprocessingML part, yielding paragraphs and table rows in document order.
+    
+    A table row is yielded as its non-empty cells joined with " | ". A cell
+    spanning several grid columns is one <w:tc> and is read once, and the
+    continuation cells of a vertical merge are skipped. The headers and
+    footers referenced by section properties are appended to references as
+    ('HEADER' or 'FOOTER', relationship id).
+    """
+    paragraph_tag, row_tag, cell_tag, table_tag = _w('p'), _w('tr'), _w('tc'), _w('tbl')
+    reference_tags = {_w('headerReference'): 'HEADER', _w('footerReference'): 'FOOTER'}
+    rows: List[List[str]] = []   # cells of the rows being read, innermost table last
+    cells: List[List[str]] = []  # paragraphs of the cells being read, innermost last
+    
+    with archive.open(part) as xml:
+        for event, element in etree.iterparse(xml, events=('start', 'end'),
+                                              tag=(paragraph_tag, row_tag, cell_tag, table_tag, *reference_tags)):
+            if event == 'start':
+                if element.tag == row_tag:
+                    rows.append([])
+                elif element.tag == cell_tag:
+                    cells.append([])
+                continue
+            
+            if element.tag == paragraph_tag:
+                text = _docx_paragraph_text(element).strip()
+                if cells:
+                    if text:
+                        cells[-1].append(text)
+                elif text:
+                    yield text
+                element.clear()
+            elif element.tag == cell_tag:
+                paragraphs = cells.pop()
+                merge = element.find(f"{_w('tcPr')}/{_w('vMerge')}")
+                continues_merge = merge is not None and merge.get(_w('val')) != 'restart'
+                if paragraphs and not continues_merge:
+                    rows[-1].append(' '.join(paragraphs))
+            elif element.tag == row_tag:
+                row_cells = rows.pop()
+                if row_cells:
+                    row_text = ' | '.join(row_cells)
+                    # A nested table is part of the cell that contains it
+                    if cells:
+                        cells[-1].append(row_text)
+                    else:
+                        yield row_text
+                element.clear()
+            elif element.tag in reference_tags:
+                if references is not None:
+                    references.append((reference_tags[element.tag], element.get(f'{{{_OFFICE_REL_NS}}}id')))
+                continue
+            
+            # Drop finished top-level blocks so memory does not grow with the document
+            if not cells and element.getparent() is not None and element.getparent().tag == _w('body'):
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+
+# OpenAI request slots of the batch the current thread works for, set by process_documents
+_batch = threading.local()
+
+def _run_in_batch(llm_slots: Optional[threading.Semaphore], function, *args):
+    _batch.llm_slots = llm_slots
+    try:
+        return function(*args)
+    finally:
+        _batch.llm_slots = None
 
 class EnhancedDocumentProcessor:
     """Enhanced document processor with production features"""
@@ -150,58 +570,37 @@ class EnhancedDocumentProcessor:
         self.cache = DocumentCache()
         self.confidence_threshold = 0.7
         self.review_threshold = 0.5
+        # Rule results that score at least this, with every input attributed, skip OpenAI
+        self.rules_threshold = self.review_threshold
+        self.chunk_workers = 4
     
     def preprocess_text(self, text: str) -> str:
-        """Enhanced text preprocessing"""
-        # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Normalize Estonian characters
-        text = text.replace('õ', 'õ').replace('ä', 'ä').replace('ö', 'ö').replace('ü', 'ü')
-        
-        # Remove control characters
-        text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x84\x86-\x9f]', '', text)
-        
-        # Normalize currency symbols
-        text = re.sub(r'€|EUR|euro', 'EUR', text, flags=re.IGNORECASE)
-        
-        # Normalize phone numbers
-        text = re.sub(r'\+372\s*(\d{3,4})\s*(\d{4})', r'+372 \1 \2', text)
-        
-        return text.strip()
+        """Enhanced text preprocessing: NFC, control characters, whitespace, currency and phone numbers"""
+        return normalize_document_text(text)
     
-    def extract_text_from_docx(self, file_path: str) -> str:
-        """Enhanced DOCX text extraction"""
+    @staticmethod
+    def extract_text_from_docx(file_path: str) -> str:
+        """Enhanced DOCX text extraction
+        
+        Streams the document XML, so paragraphs and tables come out in
+        document order and memory stays flat however long the document is.
+        Headers and footers follow as HEADER:/FOOTER: lines, each part once.
+        """
         try:
-            doc = Document(file_path)
-            full_text = []
-            
-            # Extract paragraphs
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    full_text.append(paragraph.text.strip())
-            
-            # Extract tables
-            for table in doc.tables:
-                for row in table.rows:
-                    row_text = []
-                    for cell in row.cells:
-                        if cell.text.strip():
-                            row_text.append(cell.text.strip())
-                    if row_text:
-                        full_text.append(' | '.join(row_text))
-            
-            # Extract headers and footers
-            for section in doc.sections:
-                if section.header:
-                    for paragraph in section.header.paragraphs:
-                        if paragraph.text.strip():
-                            full_text.append(f"HEADER: {paragraph.text.strip()}")
+            with zipfile.ZipFile(file_path) as archive:
+                main_part = _docx_main_part(archive)
+                references: List[Tuple[str, str]] = []
+                full_text = list(_iter_docx_part(archive, main_part, references))
                 
-                if section.footer:
-                    for paragraph in section.footer.paragraphs:
-                        if paragraph.text.strip():
-                            full_text.append(f"FOOTER: {paragraph.text.strip()}")
+                # Extract headers and footers, shared between sections but listed once
+                targets = _docx_part_targets(archive, main_part)
+                seen_parts = set()
+                for prefix, reference in references:
+                    part = targets.get(reference)
+                    if not part or part in seen_parts or part not in archive.namelist():
+                        continue
+                    seen_parts.add(part)
+                    full_text.extend(f"{prefix}: {line}" for line in _iter_docx_part(archive, part))
             
             return '\n'.join(full_text)
             
@@ -209,64 +608,53 @@ class EnhancedDocumentProcessor:
             logger.error(f"Error extracting text from DOCX: {str(e)}")
             return None
     
-    def extract_text_from_xlsx(self, file_path: str) -> str:
-        """Enhanced XLSX text extraction with structure analysis"""
+    @staticmethod
+    def extract_text_from_xlsx(file_path: str) -> str:
+        """Enhanced XLSX text extraction with structure analysis
+        
+        Cell values are streamed from read-only worksheets and only the
+        header and sample rows are read. Formulas and data validations come
+        from one streaming pass over each sheet's XML, so memory stays flat
+        however large the workbook is.
+        """
         try:
-            workbook = openpyxl.load_workbook(file_path, data_only=True)
-            full_text = []
+            workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+            try:
+                sheet_rows = {}
+                for sheet in workbook.worksheets:
+                    # Headers are the first three rows, the data sample the next sixteen
+                    sheet_rows[sheet.title] = [
+                        [str(value) for value in row if value is not None]
+                        for row in sheet.iter_rows(min_row=1, max_row=19, values_only=True)
+                    ]
+            finally:
+                workbook.close()
             
-            for sheet_name in workbook.sheetnames:
-                sheet = workbook[sheet_name]
-                full_text.append(f"SHEET: {sheet_name}")
-                
-                # Analyze sheet structure
-                max_row = sheet.max_row
-                max_col = sheet.max_column
+            with zipfile.ZipFile(file_path) as archive:
+                sheet_parts = _xlsx_sheet_parts(archive)
+                full_text = []
                 
-                # Extract headers (first few rows)
-                headers = []
-                for row in range(1, min(4, max_row + 1)):
-                    row_data = []
-                    for col in range(1, max_col + 1):
-                        cell = sheet.cell(row=row, column=col)
-                        if cell.value is not None:
-                            row_data.append(str(cell.value))
-                    if row_data:
-                        headers.append(' | '.join(row_data))
-                
-                if headers:
-                    full_text.append("HEADERS:")
-                    full_text.extend(headers)
-                
-                # Extract data rows (sample)
-                data_rows = []
-                for row in range(4, min(max_row + 1, 20)):  # Sample first 16 data rows
-                    row_data = []
-                    for col in range(1, max_col + 1):
-                        cell = sheet.cell(row=row, column=col)
-                        if cell.value is not None:
-                            row_data.append(str(cell.value))
-                    if row_data and any(row_data):  # Only non-empty rows
-                        data_rows.append(' | '.join(row_data))
-                
-                if data_rows:
-                    full_text.append("DATA SAMPLE:")
-                    full_text.extend(data_rows[:5])  # First 5 data rows
-                
-                # Extract formulas and validation
-                formulas = []
-                for row in sheet.iter_rows():
-                    for cell in row:
-                        if hasattr(cell, 'data_type') and cell.data_type == 'f':
-                            formulas.append(f"FORMULA in {cell.coordinate}: {cell.value}")
-                        
-                        # Check for data validation
-                        if cell.data_validation and cell.data_validation.formula1:
-                            full_text.append(f"VALIDATION in {cell.coordinate}: {cell.data_validation.formula1}")
-                
-                if formulas:
-                    full_text.append("FORMULAS:")
-                    full_text.extend(formulas[:5])  # First 5 formulas
+                for sheet_name, rows in sheet_rows.items():
+                    full_text.append(f"SHEET: {sheet_name}")
+                    
+                    headers = [' | '.join(row_data) for row_data in rows[:3] if row_data]
+                    if headers:
+                        full_text.append("HEADERS:")
+                        full_text.extend(headers)
+                    
+                    data_rows = [' | '.join(row_data) for row_data in rows[3:] if row_data]
+                    if data_rows:
+                        full_text.append("DATA SAMPLE:")
+                        full_text.extend(data_rows[:5])  # First 5 data rows
+                    
+                    # Extract formulas and validation
+                    if sheet_name in sheet_parts:
+                        formulas, validations = _scan_xlsx_sheet_xml(archive, sheet_parts[sheet_name],
+                                                                     formula_limit=5)
+                        full_text.extend(f"VALIDATION in {ref}: {formula}" for ref, formula in validations)
+                        if formulas:
+                            full_text.append("FORMULAS:")
+                            full_text.extend(f"FORMULA in {ref}: ={formula}" for ref, formula in formulas)
             
             return '\n'.join(full_text)
             
@@ -274,6 +662,20 @@ class EnhancedDocumentProcessor:
             logger.error(f"Error extracting text from XLSX: {str(e)}")
             return None
     
+    @staticmethod
+    def extract_raw_text(file_path: str, document_type: str) -> Optional[str]:
+        """Extract raw text based on file type"""
+        if document_type == 'docx':
+            return EnhancedDocumentProcessor.extract_text_from_docx(file_path)
+        if document_type == 'xlsx':
+            return EnhancedDocumentProcessor.extract_text_from_xlsx(file_path)
+        # Try reading as text
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return f.read()
+        except:
+            raise ValueError(f"Unsupported file type: {document_type}")
+    
     def calculate_confidence_score(self, extracted_data: Dict) -> float:
         """Calculate confidence score for extraction"""
         score = 0.0
@@ -315,9 +717,16 @@ class EnhancedDocumentProcessor:
         return score / total_weight if total_weight > 0 else 0.0
     
     def extract_fields_with_fallback(self, content: str, document_type: str) -> Dict:
-        """Extract fields with fallback mechanisms"""
+        """Extract fields with rules first, calling OpenAI only when the rules fall short"""
+        rules = extract_rules_with_coverage(content, document_type)
+        rules_score = self.calculate_confidence_score(rules.result)
+        if self.rules_cover_document(rules, rules_score):
+            logger.info(f"Rule-based extraction covers the document ({rules.template_fields} template fields, "
+                        f"confidence {rules_score:.2f}), skipping OpenAI")
+            return rules.result
+        
         try:
-            # Primary extraction with OpenAI
+            # OpenAI extraction for documents the rules cannot parse completely
             result = self._extract_with_openai(content, document_type)
             
             if result and self.calculate_confidence_score(result) >= self.review_threshold:
@@ -328,158 +737,90 @@ class EnhancedDocumentProcessor:
         
         # Fallback to rule-based extraction
         logger.info("Using fallback rule-based extraction")
-        return self._extract_with_rules(content, document_type)
+        return rules.result
     
-    def _extract_with_openai(self, content: str, document_type: str) -> Dict:
-        """Extract fields using OpenAI with enhanced prompt"""
-        prompt = f"""
-        You are an expert document analyzer specializing in Estonian procurement documents. 
-        Analyze the following {document_type} document and extract all form fields with high accuracy.
+    def rules_cover_document(self, rules: RuleExtraction, rules_score: float) -> bool:
+        """Whether a rule-based result can be used without OpenAI.
         
-        Document Content:
-        {content[:12000]}  # Increased content limit
-        
-        Return a JSON structure with confidence scoring:
-        {{
-            "document_type": "specific document type",
-            "title": "document title",
-            "form_fields": [
-                {{
-                    "field_name": "snake_case_name",
-                    "field_type": "text|number|email|tel|date|checkbox|dropdown|textarea",
-                    "label": "human readable Estonian label",
-                    "required": true/false,
-                    "description": "detailed field description",
-                    "options": ["option1", "option2"], // only for dropdown/checkbox
-                    "validation": "validation rules (e.g., min_length:5, pattern:^[0-9]+$)",
-                    "confidence_score": 0.0-1.0,
-                    "source_text": "original text that led to this field"
-                }}
-            ],
-            "requirements": ["requirement 1", "requirement 2"],
-            "sections": [
-                {{
-                    "section_title": "section name",
-                    "fields": ["field1", "field2"],
-                    "description": "section purpose"
-                }}
-            ],
-            "key_information": {{
-                "deadline": "if mentioned",
-                "contact_person": "if mentioned",
-                "submission_method": "how to submit",
-                "evaluation_criteria": "evaluation details"
-            }}
-        }}
+        The document must be a template the rules parsed: it has placeholder,
+        checkbox or spreadsheet header fields and no blank the rules could not
+        attribute to a label. Keyword hits in free text alone never qualify.
+        """
+        return (rules.template_fields > 0
+                and rules.uncovered_inputs == 0
+                and rules_score >= self.rules_threshold)
+    
+    def _extract_with_openai(self, content: str, document_type: str) -> Dict:
+        """Extract fields using OpenAI, map-reducing over chunks for long documents"""
+        chunks = split_into_chunks(content, EXTRACTION_CONTENT_LIMIT)
+        if len(chunks) <= 1:
+            return self._extract_chunk_with_openai(content, document_type)
         
-        Focus on:
-        1. Estonian language field labels and descriptions
-        2. Proper validation rules for Estonian formats (phone, ID, VAT)
-        3. High confidence scores for clearly identifiable fields
-        4. Detailed source text references
+        # Chunks unchanged since an earlier version of the document come from the cache
+        results = [self.cache.get_cached_chunk(chunk, document_type) for chunk in chunks]
+        missing = [index for index, result in enumerate(results) if result is None]
+        logger.info(f"Extracting {len(missing)} of {len(chunks)} chunks of a {len(content)} character document")
         
-        Return only valid JSON.
-        """
+        if missing:
+            # Chunk threads share the slots of the batch this document belongs to
+            llm_slots = getattr(_batch, 'llm_slots', None)
+            with ThreadPoolExecutor(max_workers=min(self.chunk_workers, len(missing))) as executor:
+                extracted = executor.map(
+                    lambda index: _run_in_batch(llm_slots, self._extract_and_cache_chunk, chunks[index], document_type),
+                    missing)
+                for index, result in zip(missing, extracted):
+                    results[index] = result
+        return merge_extractions(results)
+    
+    def _extract_and_cache_chunk(self, chunk: str, document_type: str) -> Dict:
+        result = self._extract_chunk_with_openai(chunk, document_type)
+        self.cache.cache_chunk(chunk, document_type, result)
+        return result
+    
+    def _extract_chunk_with_openai(self, content: str, document_type: str) -> Dict:
+        """Extract fields from content that fits the prompt using OpenAI with enhanced prompt"""
+        prompt = EXTRACTION_PROMPT.format(document_type=document_type, content=content)
         
-        response = client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": "You are an expert Estonian procurement document analyzer. Always return valid JSON with confidence scores."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.1
-        )
+        with getattr(_batch, 'llm_slots', None) or nullcontext():
+            response = client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=[
+                    {"role": "system", "content": EXTRACTION_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.1
+            )
         
         return json.loads(response.choices[0].message.content)
     
     def _extract_with_rules(self, content: str, document_type: str) -> Dict:
-        """Fallback rule-based extraction"""
-        fields = []
-        requirements = []
-        
-        # Common Estonian procurement field patterns
-        field_patterns = {
-            'company_name': r'(ettevõtte?\s+nimi|firma\s+nimi|ärinimi)',
-            'registration_number': r'(registrikood|reg\.?\s*kood)',
-            'vat_number': r'(kmkr?\s+number|käibemaksu)',
-            'contact_person': r'(kontaktisik|vastutav\s+isik)',
-            'email': r'(e-?post|email)',
-            'phone': r'(telefon|tel\.?)',
-            'address': r'(aadress|asukoht)',
-        }
-        
-        for field_name, pattern in field_patterns.items():
-            if re.search(pattern, content, re.IGNORECASE):
-                fields.append({
-                    'field_name': field_name,
-                    'field_type': 'email' if 'email' in field_name else 'text',
-                    'label': field_name.replace('_', ' ').title(),
-                    'required': True,
-                    'description': f'Auto-detected {field_name}',
-                    'confidence_score': 0.6,
-                    'source_text': 'Rule-based detection'
-                })
-        
-        # Extract requirements
-        req_patterns = [
-            r'nõue[d]?:?\s*(.+)',
-            r'tingimus[ed]?:?\s*(.+)',
-            r'kriteerium[id]?:?\s*(.+)'
+        """Rule-based extraction: template parse and a single compiled scan"""
+        return extract_rules_with_coverage(content, document_type).result
+    
+    def _analysis_from_cache(self, cached_result: Dict, start_time: datetime) -> DocumentAnalysis:
+        """Build a DocumentAnalysis from a cached extraction result"""
+        processing_time = (datetime.now() - start_time).total_seconds()
+        # Remove cache_hit from cached_result to avoid conflict
+        cached_result_clean = {k: v for k, v in cached_result.items() if k != 'cache_hit'}
+        cached_result_clean['form_fields'] = [
+            ExtractedField(**field) for field in cached_result_clean.get('form_fields', [])
         ]
-        
-        for pattern in req_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            requirements.extend(matches[:3])  # Max 3 requirements
-        
-        return {
-            'document_type': document_type,
-            'title': 'Rule-based extraction',
-            'form_fields': fields,
-            'requirements': requirements,
-            'sections': [],
-            'key_information': {}
-        }
+        return DocumentAnalysis(
+            **cached_result_clean,
+            processing_time=processing_time,
+            cache_hit=True
+        )
     
-    def process_document(self, file_path: str, document_type: str = None) -> DocumentAnalysis:
-        """Main document processing method with all enhancements"""
-        start_time = datetime.now()
-        
-        # Determine document type
-        if not document_type:
-            ext = os.path.splitext(file_path)[1].lower()
-            document_type = ext[1:] if ext else 'unknown'
-        
-        # Extract text based on file type
-        if document_type == 'docx':
-            raw_text = self.extract_text_from_docx(file_path)
-        elif document_type == 'xlsx':
-            raw_text = self.extract_text_from_xlsx(file_path)
-        else:
-            # Try reading as text
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    raw_text = f.read()
-            except:
-                raise ValueError(f"Unsupported file type: {document_type}")
-        
-        if not raw_text:
-            raise ValueError("Could not extract text from document")
-        
-        # Preprocess text
-        processed_text = self.preprocess_text(raw_text)
-        
-        # Check cache first
-        cached_result = self.cache.get_cached_result(processed_text)
-        if cached_result:
-            processing_time = (datetime.now() - start_time).total_seconds()
-            # Remove cache_hit from cached_result to avoid conflict
-            cached_result_clean = {k: v for k, v in cached_result.items() if k != 'cache_hit'}
-            return DocumentAnalysis(
-                **cached_result_clean,
-                processing_time=processing_time,
-                cache_hit=True
-            )
-        
+    @staticmethod
+    def _resolve_document_type(file_path: str, document_type: Optional[str] = None) -> str:
+        if document_type:
+            return document_type
+        ext = os.path.splitext(file_path)[1].lower()
+        return ext[1:] if ext else 'unknown'
+    
+    def _analyze_text(self, processed_text: str, document_type: str, file_hash: str,
+                      start_time: datetime) -> DocumentAnalysis:
+        """Extract, score and cache fields for preprocessed text"""
         # Extract fields with fallback
         extraction_result = self.extract_fields_with_fallback(processed_text, document_type)
         
@@ -492,7 +833,7 @@ class EnhancedDocumentProcessor:
         extraction_result['needs_human_review'] = needs_review
         
         # Cache the result
-        self.cache.cache_result(processed_text, document_type, extraction_result)
+        self.cache.cache_result(processed_text, document_type, extraction_result, file_hash=file_hash)
         
         # Calculate processing time
         processing_time = (datetime.now() - start_time).total_seconds()
@@ -513,6 +854,127 @@ class EnhancedDocumentProcessor:
             needs_human_review=needs_review
         )
     
+    def process_document(self, file_path: str, document_type: str = None) -> DocumentAnalysis:
+        """Main document processing method with all enhancements"""
+        start_time = datetime.now()
+        document_type = self._resolve_document_type(file_path, document_type)
+        
+        # Re-uploads of the same file are answered before any text extraction
+        file_hash = self.cache.get_file_hash(file_path, document_type)
+        cached_result = self.cache.get_cached_file_result(file_hash)
+        if cached_result:
+            return self._analysis_from_cache(cached_result, start_time)
+        
+        raw_text = self.extract_raw_text(file_path, document_type)
+        if not raw_text:
+            raise ValueError("Could not extract text from document")
+        
+        # Preprocess text
+        processed_text = self.preprocess_text(raw_text)
+        
+        # Check cache for the same content from a different file
+        cached_result = self.cache.get_cached_result(processed_text)
+        if cached_result:
+            self.cache.index_file(file_hash, self.cache.get_content_hash(processed_text))
+            return self._analysis_from_cache(cached_result, start_time)
+        
+        return self._analyze_text(processed_text, document_type, file_hash, start_time)
+    
+    def process_documents(self, file_paths: Iterable[str], text_workers: Optional[int] = None,
+                          llm_workers: int = 4, use_processes: bool = True) -> Iterator[BatchDocumentResult]:
+        """Process a batch of documents, yielding results as they complete.
+        
+        Text extraction is CPU-bound and runs in a process pool; LLM
+        extraction is I/O-bound and runs in a thread pool. Every OpenAI
+        request of the batch, chunks included, shares llm_workers slots.
+        Cache hits are yielded first, and a file that appears more than once
+        is extracted once. Per-document failures are reported in the result
+        rather than raised.
+        """
+        pending = {}
+        # file hash -> later results for the same file, answered when its extraction finishes
+        duplicates: Dict[str, List[BatchDocumentResult]] = {}
+        llm_slots = threading.BoundedSemaphore(max(1, llm_workers))
+        text_pool = (ProcessPoolExecutor if use_processes else ThreadPoolExecutor)(max_workers=text_workers)
+        llm_pool = ThreadPoolExecutor(max_workers=max(1, llm_workers))
+        
+        try:
+            for file_path in file_paths:
+                start_time = datetime.now()
+                result = BatchDocumentResult(file_path=file_path,
+                                             document_type=self._resolve_document_type(file_path))
+                try:
+                    lookup_start = time.perf_counter()
+                    file_hash = self.cache.get_file_hash(file_path, result.document_type)
+                    cached_result = self.cache.get_cached_file_result(file_hash)
+                    result.timings['cache_lookup'] = time.perf_counter() - lookup_start
+                except Exception as e:
+                    result.error = str(e)
+                    yield result
+                    continue
+                
+                if cached_result:
+                    result.analysis = self._analysis_from_cache(cached_result, start_time)
+                    result.cache_hit, result.cache_level = True, 'file'
+                    result.timings['total'] = result.analysis.processing_time
+                    yield result
+                    continue
+                
+                if file_hash in duplicates:
+                    duplicates[file_hash].append(result)
+                    continue
+                duplicates[file_hash] = []
+                future = text_pool.submit(_extract_text_worker, file_path, result.document_type)
+                pending[future] = ('text', result, file_hash, start_time)
+            
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, result, file_hash, start_time = pending.pop(future)
+                    try:
+                        if stage == 'text':
+                            raw_text, result.timings['text_extraction'] = future.result()
+                            if not raw_text:
+                                raise ValueError("Could not extract text from document")
+                            
+                            processed_text = self.preprocess_text(raw_text)
+                            cached_result = self.cache.get_cached_result(processed_text)
+                            if not cached_result:
+                                llm_future = llm_pool.submit(_run_in_batch, llm_slots, self._timed_analyze_text,
+                                                             processed_text, result.document_type, file_hash,
+                                                             start_time)
+                                pending[llm_future] = ('llm', result, file_hash, start_time)
+                                continue
+                            
+                            self.cache.index_file(file_hash, self.cache.get_content_hash(processed_text))
+                            result.analysis = self._analysis_from_cache(cached_result, start_time)
+                            result.cache_hit, result.cache_level = True, 'content'
+                        else:
+                            result.analysis, result.timings['llm_extraction'] = future.result()
+                    except Exception as e:
+                        logger.error(f"Error processing {result.file_path}: {str(e)}")
+                        result.error = str(e)
+                    
+                    result.timings['total'] = (datetime.now() - start_time).total_seconds()
+                    yield result
+                    
+                    for duplicate in duplicates.pop(file_hash, []):
+                        duplicate.analysis, duplicate.error = result.analysis, result.error
+                        if result.analysis is not None:
+                            duplicate.cache_hit, duplicate.cache_level = True, 'file'
+                        duplicate.timings['total'] = (datetime.now() - start_time).total_seconds()
+                        yield duplicate
+        finally:
+            for future in pending:
+                future.cancel()
+            text_pool.shutdown(wait=False, cancel_futures=True)
+            llm_pool.shutdown(wait=False, cancel_futures=True)
+    
+    def _timed_analyze_text(self, *args) -> Tuple[DocumentAnalysis, float]:
+        start = time.perf_counter()
+        analysis = self._analyze_text(*args)
+        return analysis, time.perf_counter() - start
+    
     def validate_extracted_fields(self, fields: List[ExtractedField]) -> List[Dict[str, str]]:
         """Validate extracted fields and return validation errors"""
         errors = []
@@ -611,6 +1073,12 @@ class EnhancedDocumentProcessor:
         
         return html
 
+def _extract_text_worker(file_path: str, document_type: str) -> Tuple[Optional[str], float]:
+    """Process pool entry point for process_documents: extract raw text and time it"""
+    start = time.perf_counter()
+    raw_text = EnhancedDocumentProcessor.extract_raw_text(file_path, document_type)
+    return raw_text, time.perf_counter() - start
+
 # Example usage and testing
 if __name__ == "__main__":
     processor = EnhancedDocumentProcessor()
@@ -620,4 +1088,5 @@ if __name__ == "__main__":
     print(f"Cache database: {processor.cache.cache_db_path}")
     print(f"Confidence threshold: {processor.confidence_threshold}")
     print(f"Review threshold: {processor.review_threshold}")
+    print(f"Rules threshold: {processor.rules_threshold}")
 
@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+"""
+Rule-based Field Extraction for Hange AI
+Compiled Estonian procurement vocabulary, scanned in a single pass:
+1. Form field labels (company, registry code, VAT, contacts, bank, price, ...)
+2. Requirement lists introduced by "Nõuded:", "Tingimused:", "Kriteeriumid:" and similar
+3. Key information with a value, such as dated deadlines and named contact persons
+4. Form templates: "Label: ____" placeholders, "[ ] option" checkboxes, numbered
+   section headings and spreadsheet HEADERS rows with their validations
+
+Every match carries its offsets and a source_text snippet from the document.
+"""
+
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Any
+
+# Part of the document cache key; bump whenever the rules or the planner change their output
+RULES_VERSION = 'scanner-v2'
+
+@dataclass(frozen=True)
+class FieldRule:
+    """A form field recognized by its label"""
+    field_name: str
+    field_type: str
+    label: str
+    pattern: str
+    validation: Optional[str] = None
+
+FIELD_RULES = [
+    FieldRule('company_name', 'text', 'Ettevõtte nimi',
+              r'ettevõtte?\s+nimi|firma\s+nimi|ärinimi|pakkuja\s+nimi|taotleja\s+nimi|organisatsiooni\s+nimi'),
+    FieldRule('registration_number', 'text', 'Registrikood',
+              r'registrikood|reg\.?\s*kood|registreerimisnumber', 'pattern:^[0-9]{8}$'),
+    FieldRule('vat_number', 'text', 'KMKR number',
+              r'kmkr?\s+(?:nr|number)|käibemaksukohustuslase\s+(?:nr|number)|käibemaksu\w*\s+reg\w*',
+              'pattern:^EE[0-9]{9}$'),
+    FieldRule('contact_person', 'text', 'Kontaktisik',
+              r'kontaktisik\w*|vastutav\s+isik|esindaja\s+nimi'),
+    FieldRule('email', 'email', 'E-post',
+              r'e-?post\w*(?:\s+aadress)?|e-?mail|meiliaadress'),
+    FieldRule('phone', 'tel', 'Telefon',
+              r'telefon\w*|tel\.|mobiil\w*', 'pattern:^\\+?[0-9 ]{7,15}$'),
+    FieldRule('address', 'text', 'Aadress',
+              r'(?:post|juriidiline\s+|tegevus)?aadress|asukoht'),
+    FieldRule('personal_code', 'text', 'Isikukood',
+              r'isikukood', 'pattern:^[1-6][0-9]{10}$'),
+    FieldRule('bank_account', 'text', 'Arvelduskonto',
+              r'arvelduskonto|pangakonto|iban'),
+    FieldRule('total_price', 'number', 'Pakkumuse maksumus',
+              r'pakkumuse\s+(?:kogu)?maksumus|kogumaksumus|kogusumma'),
+    FieldRule('signature', 'text', 'Allkiri',
+              r'allkiri|allkirjastaja'),
+    FieldRule('position', 'text', 'Ametikoht',
+              r'ametikoht|amet(?=\s*:)'),
+    FieldRule('date', 'date', 'Kuupäev',
+              r'kuupäev'),
+]
+
+# Words that introduce a requirement list. They are matched without a leading word boundary so
+# compounds such as "kvalifitseerimistingimused" count, and the match starts at the trigger
+_REQUIREMENT_TRIGGER = r'nõu(?:e|ded)|tingimus(?:ed)?|kriteeriumi?d?|kohustus(?:ed)?'
+
+# A requirement ends at a sentence end (not a list number such as "1."), the next upper-case
+# heading or the end of text
+_REQUIREMENT_END = r'(?=(?<!\b\d)(?<!\b\d\d)[.!?](?:\s|$)|\s+(?-i:[A-ZÕÄÖÜŠŽ]{3,}(?:\s[A-ZÕÄÖÜŠŽ]{2,})*):|$)'
+
+_DATE = r'\d{1,2}\.\d{1,2}\.\d{4}(?:\s*(?:kell\s*)?\d{1,2}[:.]\d{2})?'
+_NAME = r'(?-i:[A-ZÕÄÖÜŠŽ][a-zõäöüšž-]+\s+[A-ZÕÄÖÜŠŽ][a-zõäöüšž-]+)'
+
+# List items inside a requirement: "- item", "• item", "1) item", "a) item"
+_BULLET = re.compile(r'(?:^|\s)(?:[-•*▪–]|\d{1,2}[.)]|[a-z]\))\s+')
+
+MAX_REQUIREMENT_LENGTH = 300
+SNIPPET_LENGTH = 80
+
+def _build_scanner() -> re.Pattern:
+    # Compound words end in these, so they need no leading word boundary
+    alternatives = [
+        rf'(?P<deadline>tähtaeg\w*\s*:?\s*(?P<deadline_value>{_DATE}))(?!\w)',
+        rf'(?P<requirement>(?:{_REQUIREMENT_TRIGGER})\s*[:–-]\s*'
+        rf'(?P<requirement_text>.{{1,{MAX_REQUIREMENT_LENGTH}}}?{_REQUIREMENT_END}'
+        rf'|.{{1,{MAX_REQUIREMENT_LENGTH}}}(?=\s|$)))',
+    ]
+    # Labels must be whole words; a named contact is tried before the bare contact label
+    labels = [rf'(?P<contact>kontaktisik\w*\s*:?\s*(?P<contact_value>{_NAME}))(?!\w)']
+    labels.extend(rf'(?P<{rule.field_name}>{rule.pattern})(?!\w)' for rule in FIELD_RULES)
+    alternatives.append(r'(?<!\w)(?:' + '|'.join(labels) + ')')
+    return re.compile('|'.join(alternatives), re.IGNORECASE | re.DOTALL)
+
+_SCANNER = _build_scanner()
+_RULES_BY_NAME = {rule.field_name: rule for rule in FIELD_RULES}
+
+@dataclass
+class RuleMatch:
+    """One match of the scanner"""
+    kind: str  # 'field', 'requirement' or 'key_information'
+    name: str
+    start: int
+    end: int
+    text: str
+    value: Optional[str] = None
+
+def scan(content: str) -> List[RuleMatch]:
+    """Scan content once and return every rule match in document order"""
+    matches = []
+    for match in _SCANNER.finditer(content):
+        name = match.lastgroup
+        if name == 'requirement':
+            matches.append(RuleMatch('requirement', name, match.start(), match.end(), match.group(),
+                                     match.group('requirement_text').strip()))
+        elif name in ('deadline', 'contact'):
+            matches.append(RuleMatch('key_information', name, match.start(), match.end(), match.group(),
+                                     match.group(f'{name}_value')))
+        else:
+            matches.append(RuleMatch('field', name, match.start(), match.end(), match.group()))
+    return matches
+
+def source_snippet(content: str, start: int, length: int = SNIPPET_LENGTH) -> str:
+    """Text from start up to about length characters, cut at a word boundary"""
+    end = start + length
+    if end >= len(content):
+        return content[start:].strip()
+    cut = content.rfind(' ', start, end)
+    return content[start:cut if cut > start else end].strip()
+
+def split_requirements(text: str) -> List[str]:
+    """Split a requirement list into its bullet items"""
+    items = [item.strip(' ;,') for item in _BULLET.split(text)]
+    return [item for item in items if item]
+
+# Template inputs: blank placeholders and checkboxes
+_INPUT = re.compile(r'(?P<placeholder>_{3,}|\.{5,}|…{2,})|(?P<checkbox>\[ ?[xX✓]? ?\])')
+
+_UPPER = 'A-ZÕÄÖÜŠŽ'
+_LOWER = 'a-zõäöüšž'
+
+# Upper-case headings, optionally numbered, followed by a capitalized word, list item,
+# checkbox or the end of text; extractor markers are not headings
+_HEADING = re.compile(
+    rf'(?<!\S)(?:\d{{1,2}}\.\s+)?'
+    rf'(?!(?:SHEET|HEADERS?|FOOTER|DATA|SAMPLE|FORMULAS?|VALIDATION)\b)'
+    rf'(?P<title>[{_UPPER}]{{2,}}(?:\s+(?:-\s+)?[{_UPPER}]{{2,}})*)'
+    rf':?(?=\s+(?:[{_UPPER}][{_LOWER}]|\[|-\s|\d{{1,2}}\.\s)|\s*$)'
+)
+
+# "Label (hint):" right before an input
+_LABEL_END = re.compile(r'\s*(?:\((?P<hint>[^()]*)\))?\s*:\s*$')
+_CAPITALIZED = re.compile(rf'(?<!\S)[{_UPPER}]')
+_SENTENCE_END = re.compile(r'[.!?;]\s|\n')
+MAX_LABEL_WORDS = 6
+MAX_OPTION_WORDS = 8
+
+# A known field rule ending right at the end of a label, so "Kontaktisiku telefon" is a phone number
+_RULE_LABEL = re.compile(
+    r'(?<!\w)(?:' + '|'.join(rf'(?P<{rule.field_name}>{rule.pattern})' for rule in FIELD_RULES) + r')(?=\s*:$)',
+    re.IGNORECASE
+)
+
+_DATE_LABEL = re.compile(r'kuupäev|tähtaeg', re.IGNORECASE)
+_NUMBER_LABEL = re.compile(r'kogus|hind|maksumus|summa|kokku|suurus|kestus|protsent|(?<!\w)(?:arv|eur|kuud|päeva?d?|tundi)(?!\w)|€|%',
+                           re.IGNORECASE)
+_TEXTAREA_LABEL = re.compile(r'kirjeldus|kirjeldage|selgitus|põhjendus|kogemus|märkus|tähemärki', re.IGNORECASE)
+_LENGTH_HINT = re.compile(r'(?P<bound>min|max)\w*\.?\s*(?P<length>\d+)\s*tähemärki', re.IGNORECASE)
+
+# Spreadsheet markers written by the XLSX text extractor
+_SHEET = re.compile(r'(?<!\S)SHEET:[ \t]*(?P<name>[^\n]*?)(?=\s+(?:HEADERS|DATA SAMPLE|FORMULAS):|\n|$)')
+_HEADERS = re.compile(
+    r'(?<!\S)HEADERS:\s*(?P<cells>.*?)(?=\s+(?:DATA SAMPLE|FORMULAS|SHEET):|\s+(?:FORMULA|VALIDATION) in |\n\s*\n|$)',
+    re.DOTALL
+)
+_CELL_RULE = re.compile(r'(?<!\S)(?P<kind>FORMULA|VALIDATION) in \$?(?P<column>[A-Z]{1,3})\$?\d+:\s*(?P<formula>\S+)')
+
+TEMPLATE_CONFIDENCE = 0.85
+SCAN_CONFIDENCE = 0.6
+
+_ASCII_FOLD = str.maketrans('õäöüšžÕÄÖÜŠŽ', 'oaouszOAOUSZ')
+
+def _field_name(label: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '_', label.translate(_ASCII_FOLD).lower()).strip('_') or 'field'
+
+def _column_letter(index: int) -> str:
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+def _rule_for_label(label: str) -> Optional[FieldRule]:
+    match = _RULE_LABEL.search(label + ':')
+    return _RULES_BY_NAME[match.lastgroup] if match else None
+
+def _infer_type(label: str, hint: Optional[str], multiline: bool = True) -> str:
+    text = f'{label} {hint or ""}'
+    if _DATE_LABEL.search(text):
+        return 'date'
+    if _NUMBER_LABEL.search(text):
+        return 'number'
+    if multiline and _TEXTAREA_LABEL.search(text):
+        return 'textarea'
+    return 'text'
+
+def _label_before(content: str, boundary: int, position: int) -> Optional[Tuple[int, str, Optional[str]]]:
+    """The label ending right before position, as (start, label, hint).
+
+    A label is "Label (hint):", starting at its last capitalized word after the
+    last sentence end, or a known field label without the colon.
+    """
+    segment = content[boundary:position]
+    end = _LABEL_END.search(segment)
+    if not end:
+        rule_match = _RULE_LABEL.search(segment.rstrip() + ':')
+        if not rule_match:
+            return None
+        return boundary + rule_match.start(), rule_match.group(), None
+
+    text = segment[:end.start()]
+    sentence_ends = [match.end() for match in _SENTENCE_END.finditer(text)]
+    offset = sentence_ends[-1] if sentence_ends else 0
+    words = list(re.finditer(r'\S+', text[offset:]))[-MAX_LABEL_WORDS:]
+    if not words:
+        return None
+    capitalized = [word for word in words if _CAPITALIZED.match(word.group())]
+    first = capitalized[-1] if capitalized else words[max(0, len(words) - 3)]
+    start = offset + first.start()
+    label = ' '.join(text[start:].split())
+    if not re.search(r'\w', label):
+        return None
+    return boundary + start, label, end.group('hint')
+
+def _option_text(text: str) -> str:
+    text = _SENTENCE_END.split(text, 1)[0]
+    return ' '.join(text.split()[:MAX_OPTION_WORDS]).strip(' ,;:')
+
+@dataclass
+class TemplateExtraction:
+    """Fields found in a form template and the inputs the rules could not attribute"""
+    fields: List[Dict[str, Any]]
+    sections: List[Dict[str, Any]]
+    title: Optional[str]
+    uncovered_inputs: int
+
+class _TemplateBuilder:
+    def __init__(self, content: str):
+        self.content = content
+        self.fields: List[Dict[str, Any]] = []
+        self.names: Dict[str, int] = {}
+
+    def add(self, label: str, start: int, hint: Optional[str] = None, field_type: Optional[str] = None,
+            options: Optional[List[str]] = None, required: bool = True, validation: Optional[str] = None,
+            description: Optional[str] = None, multiline: bool = True) -> Dict[str, Any]:
+        rule = _rule_for_label(label)
+        if rule:
+            name, field_type, validation = rule.field_name, field_type or rule.field_type, validation or rule.validation
+        else:
+            name, field_type = _field_name(label), field_type or _infer_type(label, hint, multiline)
+            length = _LENGTH_HINT.search(hint or '')
+            if length and not validation:
+                validation = f"{length.group('bound').lower()}_length:{length.group('length')}"
+
+        # The same label twice, such as a phone number for both the company and the contact
+        self.names[name] = self.names.get(name, 0) + 1
+        if self.names[name] > 1:
+            name = f'{name}_{self.names[name]}'
+
+        field = {
+            'field_name': name,
+            'field_type': field_type,
+            'label': label,
+            'required': required,
+            'description': description or hint or f'Template field "{label}"',
+            'validation': validation,
+            'options': options,
+            'confidence_score': TEMPLATE_CONFIDENCE,
+            'source_text': source_snippet(self.content, start),
+            'source_offset': start
+        }
+        self.fields.append(field)
+        return field
+
+def _parse_inputs(builder: _TemplateBuilder, headings: List[Tuple[int, int, str]]) -> int:
+    """Turn placeholders and checkboxes into fields, returning the number left unattributed"""
+    content = builder.content
+    heading_starts = [start for start, _, _ in headings]
+    inputs = list(_INPUT.finditer(content))
+    uncovered = 0
+    cursor = 0
+    previous_placeholder = False
+    index = 0
+
+    def segment_start(position: int) -> int:
+        heading = bisect_right(heading_starts, position) - 1
+        return max(cursor, headings[heading][1] if heading >= 0 and headings[heading][1] <= position else 0)
+
+    def next_heading(position: int) -> int:
+        heading = bisect_right(heading_starts, position)
+        return heading_starts[heading] if heading < len(heading_starts) else len(content)
+
+    while index < len(inputs):
+        slot = inputs[index]
+        boundary = segment_start(slot.start())
+        label = _label_before(content, boundary, slot.start())
+
+        if slot.lastgroup == 'placeholder':
+            if label:
+                builder.add(label[1], label[0], label[2])
+            elif content[boundary:slot.start()].strip() or not previous_placeholder:
+                # A blank with text that is not a label, or with no label at all
+                uncovered += 1
+            # Otherwise the blank continues the previous field, as in "Aadress: ____ ____"
+            cursor = slot.end()
+            previous_placeholder = True
+            index += 1
+            continue
+
+        # A run of checkboxes is one group of options
+        options = []
+        while index < len(inputs) and inputs[index].lastgroup == 'checkbox':
+            marker = inputs[index]
+            following = inputs[index + 1] if index + 1 < len(inputs) else None
+            stop = following.start() if following else len(content)
+            heading_start = next_heading(marker.end())
+            newline = content.find('\n', marker.end(), stop)
+            stop = min(stop, heading_start, newline if newline >= 0 else stop)
+            if following and following.lastgroup == 'placeholder' and stop == following.start():
+                # The next field's label can follow the option on the same line
+                next_label = _label_before(content, marker.end(), stop)
+                if next_label:
+                    stop = next_label[0]
+            option = _option_text(content[marker.end():stop])
+            if option:
+                options.append((marker.start(), option))
+            cursor = stop
+            index += 1
+            if not following or heading_start < following.start():
+                break
+
+        if not options:
+            uncovered += 1
+        elif label:
+            builder.add(label[1], label[0], label[2], field_type='dropdown',
+                        options=[option for _, option in options])
+        else:
+            for start, option in options:
+                builder.add(option, start, field_type='checkbox', required=False,
+                            description=f'Checkbox "{option}"')
+        previous_placeholder = False
+
+    return uncovered
+
+def _parse_sheets(builder: _TemplateBuilder) -> List[Dict[str, Any]]:
+    """Turn spreadsheet HEADERS rows into fields, one section per sheet"""
+    content = builder.content
+    sheets = [(match.start(), match.group('name').strip()) for match in _SHEET.finditer(content)] or [(0, None)]
+    bounds = [start for start, _ in sheets[1:]] + [len(content)]
+    sections = []
+
+    for (start, name), end in zip(sheets, bounds):
+        cell_rules: Dict[Tuple[str, str], str] = {}
+        for match in _CELL_RULE.finditer(content, start, end):
+            cell_rules.setdefault((match.group('kind'), match.group('column')), match.group('formula'))
+
+        section_fields = []
+        for headers in _HEADERS.finditer(content, start, end):
+            cells = [' '.join(cell.split()) for cell in headers.group('cells').split('|')]
+            for column, cell in enumerate(cells):
+                if not cell:
+                    continue
+                letter = _column_letter(column)
+                formula = cell_rules.get(('FORMULA', letter))
+                validation = cell_rules.get(('VALIDATION', letter))
+                field = builder.add(
+                    cell, headers.start('cells') + headers.group('cells').find(cell.split()[0]),
+                    field_type='number' if formula else None,
+                    required=not formula,
+                    validation=f'formula:{validation}' if validation else None,
+                    description=f'Calculated as {formula}' if formula else f'Column {letter}',
+                    multiline=False
+                )
+                section_fields.append(field['field_name'])
+
+        if section_fields:
+            sections.append({'section_title': name or 'Sheet', 'fields': section_fields, 'description': ''})
+    return sections
+
+def extract_template(content: str) -> TemplateExtraction:
+    """Parse a label/placeholder form template or a spreadsheet export"""
+    headings = [(match.start(), match.end(), match.group('title')) for match in _HEADING.finditer(content)
+                if sum(char.isalpha() for char in match.group('title')) >= 4]
+    builder = _TemplateBuilder(content)
+    sections = _parse_sheets(builder)
+    sheet_fields = len(builder.fields)
+    uncovered = _parse_inputs(builder, headings)
+
+    # Placeholder fields belong to the heading above them
+    heading_starts = [start for start, _, _ in headings]
+    sections_by_title: Dict[str, Dict[str, Any]] = {}
+    for field in builder.fields[sheet_fields:]:
+        heading = bisect_right(heading_starts, field['source_offset']) - 1
+        if heading < 0:
+            continue
+        title = headings[heading][2]
+        if title not in sections_by_title:
+            sections_by_title[title] = {'section_title': title, 'fields': [], 'description': ''}
+            sections.append(sections_by_title[title])
+        sections_by_title[title]['fields'].append(field['field_name'])
+
+    # The first heading before any field is the document title
+    first_field = min((field['source_offset'] for field in builder.fields), default=len(content))
+    title = next((heading[2] for heading in headings if heading[0] < first_field and heading[2] not in sections_by_title),
+                 None)
+    if not title and sections and builder.fields[:sheet_fields]:
+        title = sections[0]['section_title']
+
+    return TemplateExtraction(builder.fields, sections, title, uncovered)
+
+@dataclass
+class RuleExtraction:
+    """A rule-based extraction result with how much of the document the rules account for"""
+    result: Dict[str, Any]
+    template_fields: int
+    uncovered_inputs: int
+
+def extract_with_coverage(content: str, document_type: str) -> RuleExtraction:
+    """Build an extraction result from the template parse and a single scan of the content"""
+    template = extract_template(content)
+    fields: List[Dict[str, Any]] = list(template.fields)
+    seen_fields = {field['field_name'] for field in fields}
+    requirements: List[str] = []
+    seen_requirements = set()
+    key_information: Dict[str, Any] = {}
+
+    def add_field(field_name: str, match: RuleMatch):
+        if field_name in seen_fields:
+            return
+        seen_fields.add(field_name)
+        rule = _RULES_BY_NAME[field_name]
+        fields.append({
+            'field_name': rule.field_name,
+            'field_type': rule.field_type,
+            'label': rule.label,
+            'required': True,
+            'description': f'Auto-detected from "{match.text}"',
+            'validation': rule.validation,
+            'confidence_score': SCAN_CONFIDENCE,
+            'source_text': source_snippet(content, match.start),
+            'source_offset': match.start
+        })
+
+    for match in scan(content):
+        if match.kind == 'field':
+            add_field(match.name, match)
+        elif match.kind == 'requirement':
+            for requirement in split_requirements(match.value):
+                key = requirement.lower()
+                if key not in seen_requirements:
+                    seen_requirements.add(key)
+                    requirements.append(requirement)
+        else:
+            if match.name == 'contact':
+                # "Kontaktisik: Mari Maasikas" is both key information and a form field
+                add_field('contact_person', match)
+                key_information.setdefault('contact_person', match.value)
+            else:
+                key_information.setdefault('deadline', match.value)
+
+    fields.sort(key=lambda field: field['source_offset'])
+    result = {
+        'document_type': document_type,
+        'title': template.title or 'Rule-based extraction',
+        'form_fields': fields,
+        'requirements': requirements,
+        'sections': template.sections,
+        'key_information': key_information
+    }
+    return RuleExtraction(result, len(template.fields), template.uncovered_inputs)
+
+def extract_fields(content: str, document_type: str) -> Dict[str, Any]:
+    """Rule-based extraction result without coverage details"""
+    return extract_with_coverage(content, document_type).result
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Notification Engine for Hange AI
+Headless matching and delivery run, shared by the Streamlit page and the CLI runner:
+1. Fetch the RSS feed and skip procurements that were already processed
+2. Classify new procurements in parallel
+3. Match them against the compiled subscriptions and queue digests
+4. Flush due digests, reporting per-stage timings
+"""
+
+import os
+import re
+import time
+import sqlite3
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Callable, Iterable
+
+import feedparser
+from dotenv import load_dotenv
+
+from notifications.matcher import SubscriptionMatcher, load_active_subscriptions
+from notifications.outbox import NotificationOutbox, create_deliverer
+
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4.1-mini')
+
+RSS_FEED_URL = 'https://riigihanked.riik.ee/rhr/api/public/v1/rss'
+DEFAULT_DB_PATH = 'procurement.db'
+
+_client = None
+
+def get_openai_client():
+    """Create the OpenAI client on first use so dry runs and imports need no key"""
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+    return _client
+
+def init_email_database(db_path: str = DEFAULT_DB_PATH):
+    """Initialize email notification database"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    # Email subscriptions table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS email_subscriptions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT UNIQUE NOT NULL,
+            sectors TEXT NOT NULL,
+            keywords TEXT,
+            min_value INTEGER DEFAULT 0,
+            max_value INTEGER DEFAULT 10000000,
+            active BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_notification TIMESTAMP,
+            notification_frequency TEXT DEFAULT 'daily'
+        )
+    ''')
+
+    # Notification history table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS notification_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            subscription_id INTEGER,
+            procurement_id TEXT,
+            procurement_title TEXT,
+            sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            email_status TEXT DEFAULT 'sent',
+            delivery_attempts INTEGER DEFAULT 0,
+            FOREIGN KEY (subscription_id) REFERENCES email_subscriptions (id)
+        )
+    ''')
+
+    # Databases created before delivery retries lack the attempt counter
+    columns = [row[1] for row in cursor.execute('PRAGMA table_info(notification_history)')]
+    if 'delivery_attempts' not in columns:
+        cursor.execute('ALTER TABLE notification_history ADD COLUMN delivery_attempts INTEGER DEFAULT 0')
+
+    # Procurement cache for matching
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS procurement_matches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            procurement_id TEXT UNIQUE,
+            title TEXT,
+            description TEXT,
+            category TEXT,
+            estimated_value INTEGER,
+            deadline DATE,
+            procurer TEXT,
+            url TEXT,
+            processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    conn.commit()
+    conn.close()
+
+def classify_procurement(title, description):
+    """Classify procurement using OpenAI"""
+    try:
+        prompt = f"""Classify the following Estonian procurement into one of these categories:
+
+        Categories:
+        - Construction & Infrastructure
+        - Technology & IT
+        - Healthcare & Medical
+        - Education & Research
+        - Energy & Utilities
+        - Transportation
+        - Environmental Services
+        - Professional Services
+        - Sports & Recreation
+        - Other
+
+        Title: {title}
+        Description: {description}
+
+        Return only the category name."""
+
+        response = get_openai_client().chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=[
+                {"role": "system", "content": "You are a procurement classifier."},
+                {"role": "user", "content": prompt}
+            ]
+        )
+        return response.choices[0].message.content.strip()
+    except Exception as e:
+        return "Other"
+
+def extract_estimated_value(description):
+    """Extract estimated value from procurement description"""
+    try:
+        # Look for EUR amounts in various formats
+        patterns = [
+            r'(\d+(?:\s?\d{3})*)\s*EUR',
+            r'(\d+(?:\s?\d{3})*)\s*€',
+            r'EUR\s*(\d+(?:\s?\d{3})*)',
+            r'€\s*(\d+(?:\s?\d{3})*)',
+            r'(\d+(?:\s?\d{3})*)\s*euro'
+        ]
+
+        for pattern in patterns:
+            match = re.search(pattern, description, re.IGNORECASE)
+            if match:
+                value_str = match.group(1).replace(' ', '')
+                return int(value_str)
+
+        return 0
+    except:
+        return 0
+
+def get_processed_procurement_ids(cursor: sqlite3.Cursor, procurement_ids: Iterable[str]) -> set:
+    """Return the subset of procurement IDs already in procurement_matches"""
+    procurement_ids = list(procurement_ids)
+    processed = set()
+    # Stay well under SQLite's bound-parameter limit
+    for i in range(0, len(procurement_ids), 500):
+        chunk = procurement_ids[i:i + 500]
+        cursor.execute(
+            f'SELECT procurement_id FROM procurement_matches WHERE procurement_id IN ({",".join("?" * len(chunk))})',
+            chunk
+        )
+        processed.update(row[0] for row in cursor.fetchall())
+    return processed
+
+def _connect_read_only(db_path: str) -> sqlite3.Connection:
+    """Read-only connection for a dry run; a missing database reads as an empty one"""
+    if not os.path.exists(db_path):
+        return sqlite3.connect(':memory:')
+    return sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True)
+
+def _table_names(conn: sqlite3.Connection) -> set:
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+@contextmanager
+def _timed(timings: Dict[str, float], stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = round(time.perf_counter() - start, 4)
+
+def run_notification_check(db_path: str = DEFAULT_DB_PATH, feed_url: str = RSS_FEED_URL,
+                           workers: int = 4, dry_run: bool = False, deliverer=None,
+                           classify: Callable[[str, str], str] = classify_procurement) -> Dict[str, Any]:
+    """Run one matching and delivery pass and return a JSON-serializable summary.
+
+    In dry-run mode nothing is written and no email is sent: the database
+    is opened read-only and its schema is not created, so missing tables
+    count as no subscriptions and nothing processed. The summary reports
+    what would have been queued. Errors propagate to the caller.
+    """
+    started_at = datetime.now()
+    timings: Dict[str, float] = {}
+    summary: Dict[str, Any] = {
+        'started_at': started_at.isoformat(),
+        'dry_run': dry_run,
+        'workers': workers,
+    }
+
+    if dry_run:
+        conn = _connect_read_only(db_path)
+    else:
+        init_email_database(db_path)
+        conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.cursor()
+        tables = _table_names(conn)
+
+        with _timed(timings, 'fetch_feed'):
+            feed = feedparser.parse(feed_url)
+
+        with _timed(timings, 'compile_subscriptions'):
+            matcher = SubscriptionMatcher(load_active_subscriptions(conn) if 'email_subscriptions' in tables else [])
+            outbox = NotificationOutbox(conn)
+
+        # Keep only feed entries with a procurement ID that have not been processed yet
+        with _timed(timings, 'lookup_processed'):
+            feed_entries = {}
+            for entry in feed.entries:
+                procurement_id = re.search(r'/procurement/(\d+)', entry.link)
+                if procurement_id:
+                    feed_entries.setdefault(procurement_id.group(1), entry)
+
+            processed_ids = (get_processed_procurement_ids(cursor, feed_entries.keys())
+                             if 'procurement_matches' in tables else set())
+            new_entries = [(pid, entry) for pid, entry in feed_entries.items() if pid not in processed_ids]
+
+        # Classification is one LLM round-trip per procurement, so it runs concurrently
+        with _timed(timings, 'classify'):
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+                categories = list(executor.map(lambda item: classify(item[1].title, item[1].description),
+                                               new_entries))
+
+        procurement_rows = []
+        matches = []
+        with _timed(timings, 'match'):
+            for (procurement_id, entry), category in zip(new_entries, categories):
+                estimated_value = extract_estimated_value(entry.description)
+                creator = entry.get('dc_creator', '') or entry.get('creator', '')
+
+                procurement_rows.append(
+                    (procurement_id, entry.title, entry.description, category, estimated_value, creator, entry.link)
+                )
+
+                # Match against all subscriptions in a single pass and queue for the next digest
+                text_to_search = entry.title + ' ' + entry.description
+                for sub in matcher.match(category, estimated_value, text_to_search):
+                    matches.append((sub.id, procurement_id, entry.title))
+
+        summary.update({
+            'feed_entries': len(feed.entries),
+            'new_procurements': len(new_entries),
+            'subscriptions': len(matcher),
+            'matches': len(matches),
+            'matched_subscriptions': len({sub_id for sub_id, _, _ in matches}),
+        })
+
+        if dry_run:
+            summary['delivery'] = None
+        else:
+            # Store procurements and queue matches in a single transaction
+            with _timed(timings, 'store'):
+                with conn:
+                    cursor.executemany('''
+                        INSERT INTO procurement_matches
+                        (procurement_id, title, description, category, estimated_value, procurer, url)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ''', procurement_rows)
+                    outbox.enqueue_many(matches)
+
+            # Send digests to subscriptions that are due per their notification frequency
+            with _timed(timings, 'deliver'):
+                summary['delivery'] = outbox.flush(deliverer or create_deliverer())
+    finally:
+        conn.close()
+
+    summary['timings'] = timings
+    summary['total_time'] = round((datetime.now() - started_at).total_seconds(), 4)
+    return summary
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Subscription Matcher for Hange AI email notifications
+Compiles all active subscriptions once per run into:
+1. A sector -> subscriptions index
+2. A multi-keyword (Aho-Corasick) automaton over every subscriber's keywords
+3. Value-range intervals grouped by distinct range
+Each procurement is then matched against all subscriptions in a single pass.
+"""
+
+import sqlite3
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Iterable
+
+@dataclass
+class Subscription:
+    """Active email subscription with its filters parsed once"""
+    id: int
+    email: str
+    sectors: List[str]
+    keywords: List[str] = field(default_factory=list)
+    min_value: int = 0
+    max_value: int = 10000000
+    last_notification: Optional[datetime] = None
+    notification_frequency: str = 'daily'
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> 'Subscription':
+        keywords = [k.strip().lower() for k in row['keywords'].split(',')] if row['keywords'] else []
+        # An empty keyword matches any text, same as having no keyword filter
+        if '' in keywords:
+            keywords = []
+        last_notification = datetime.fromisoformat(row['last_notification']) if row['last_notification'] else None
+        return cls(
+            id=row['id'],
+            email=row['email'],
+            sectors=[s.strip() for s in row['sectors'].split(',')],
+            keywords=keywords,
+            min_value=row['min_value'],
+            max_value=row['max_value'],
+            last_notification=last_notification,
+            notification_frequency=row['notification_frequency']
+        )
+
+def load_active_subscriptions(conn: sqlite3.Connection) -> List[Subscription]:
+    """Load and parse all active subscriptions in one query"""
+    previous_factory = conn.row_factory
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = conn.execute('''
+            SELECT id, email, sectors, keywords, min_value, max_value,
+                   last_notification, notification_frequency
+            FROM email_subscriptions
+            WHERE active = 1
+        ''').fetchall()
+    finally:
+        conn.row_factory = previous_factory
+    return [Subscription.from_row(row) for row in rows]
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton reporting which keywords occur in a text"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+
+        for keyword in keywords:
+            self._add(keyword)
+        self._build_failure_links()
+
+    def _add(self, keyword: str):
+        node = 0
+        for char in keyword:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        if keyword not in self._output[node]:
+            self._output[node].append(keyword)
+
+    def _build_failure_links(self):
+        # Breadth-first from the root's children, whose failure link is the root
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text: str) -> set:
+        """Return the set of keywords found in text"""
+        found = set()
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                found.update(output[node])
+        return found
+
+class SubscriptionMatcher:
+    """Matches procurements against every active subscription at once.
+
+    Subscriptions are represented as bits of a Python int, so combining
+    the sector, keyword and value-range constraints is a handful of
+    bitwise ANDs regardless of how many subscribers there are.
+    """
+
+    def __init__(self, subscriptions: List[Subscription]):
+        self.subscriptions = subscriptions
+        self._sector_masks: Dict[str, int] = {}
+        self._keyword_masks: Dict[str, int] = {}
+        self._no_keyword_mask = 0
+        range_masks: Dict[tuple, int] = {}
+
+        for index, sub in enumerate(subscriptions):
+            bit = 1 << index
+            for sector in sub.sectors:
+                self._sector_masks[sector] = self._sector_masks.get(sector, 0) | bit
+            if sub.keywords:
+                for keyword in sub.keywords:
+                    self._keyword_masks[keyword] = self._keyword_masks.get(keyword, 0) | bit
+            else:
+                self._no_keyword_mask |= bit
+            value_range = (sub.min_value, sub.max_value)
+            range_masks[value_range] = range_masks.get(value_range, 0) | bit
+
+        self._automaton = KeywordAutomaton(self._keyword_masks)
+
+        # Distinct ranges sorted by lower bound; subscribers mostly share a few
+        self._ranges = sorted(range_masks.items())
+        self._range_mins = [value_range[0] for value_range, _ in self._ranges]
+
+    def __len__(self) -> int:
+        return len(self.subscriptions)
+
+    def _value_mask(self, value: float) -> int:
+        mask = 0
+        for (min_value, max_value), range_mask in self._ranges[:bisect_right(self._range_mins, value)]:
+            if value <= max_value:
+                mask |= range_mask
+        return mask
+
+    def _keyword_mask(self, text: str) -> int:
+        mask = self._no_keyword_mask
+        if self._keyword_masks:
+            for keyword in self._automaton.find(text.lower()):
+                mask |= self._keyword_masks[keyword]
+        return mask
+
+    def match(self, category: str, estimated_value: float, text: str) -> List[Subscription]:
+        """Return subscriptions whose sector, value range and keywords all match"""
+        mask = self._sector_masks.get(category, 0)
+        if mask:
+            mask &= self._value_mask(estimated_value)
+        if mask:
+            mask &= self._keyword_mask(text)
+
+        matches = []
+        while mask:
+            low_bit = mask & -mask
+            matches.append(self.subscriptions[low_bit.bit_length() - 1])
+            mask ^= low_bit
+        return matches
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Notification Outbox for Hange AI email notifications
+1. Matches are queued per subscription in notification_history
+2. Digests are flushed according to each subscription's notification_frequency
+3. Delivery goes through one pooled SMTP connection with batching and retries
+4. Failed digests stay queued for the next flush, and are marked failed
+   only after MAX_DELIVERY_ATTEMPTS flushes could not deliver them
+"""
+
+import os
+import time
+import smtplib
+import sqlite3
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from typing import Dict, List, Optional, Tuple, Any, Callable
+
+logger = logging.getLogger(__name__)
+
+# Minimum time between two digests for each notification frequency
+FREQUENCY_INTERVALS = {
+    'daily': timedelta(days=1),
+    'weekly': timedelta(days=7),
+}
+
+# Flushes that may try to deliver a match before it is given up as failed
+MAX_DELIVERY_ATTEMPTS = 5
+
+@dataclass
+class Digest:
+    """All queued matches for one subscription, delivered as one email"""
+    subscription_id: int
+    email: str
+    subscription_info: Dict[str, Any]
+    history_ids: List[int] = field(default_factory=list)
+    procurements: List[Dict[str, Any]] = field(default_factory=list)
+
+def build_digest_body(procurements: List[Dict], subscription_info: Dict) -> str:
+    """Build the plain-text digest body sent to a subscriber"""
+    email_content = f"""
+        Dear Subscriber,
+
+        We found {len(procurements)} new procurement opportunities matching your criteria:
+
+        Sectors: {subscription_info['sectors']}
+        Keywords: {subscription_info.get('keywords') or 'Any'}
+        Value Range: €{subscription_info['min_value']:,} - €{subscription_info['max_value']:,}
+
+        Matching Procurements:
+        """
+
+    for proc in procurements:
+        email_content += f"""
+
+        Title: {proc['title']}
+        Category: {proc['category']}
+        Estimated Value: €{proc['estimated_value'] or 0:,}
+        Procurer: {proc['procurer']}
+        Deadline: {proc.get('deadline') or 'Not specified'}
+        URL: {proc['url']}
+
+        ---
+        """
+
+    email_content += """
+
+        Best regards,
+        Hange AI Team
+
+        To unsubscribe or modify your preferences, visit: https://hange-ai.streamlit.app/
+        """
+
+    return email_content
+
+def build_digest_message(sender: str, email: str, procurements: List[Dict], subscription_info: Dict) -> MIMEMultipart:
+    """Build the digest email for a subscriber"""
+    message = MIMEMultipart()
+    message['From'] = sender
+    message['To'] = email
+    message['Subject'] = f"Hange AI: {len(procurements)} new procurement opportunities"
+    message.attach(MIMEText(build_digest_body(procurements, subscription_info), 'plain', 'utf-8'))
+    return message
+
+@dataclass
+class SMTPConfig:
+    """SMTP connection settings"""
+    host: str
+    port: int = 587
+    username: Optional[str] = None
+    password: Optional[str] = None
+    sender: str = 'noreply@hange.ai'
+    use_tls: bool = True
+    timeout: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> Optional['SMTPConfig']:
+        """Read settings from SMTP_* environment variables, None if SMTP_SERVER is unset"""
+        host = os.getenv('SMTP_SERVER')
+        if not host:
+            return None
+        return cls(
+            host=host,
+            port=int(os.getenv('SMTP_PORT', '587')),
+            username=os.getenv('SMTP_USERNAME'),
+            password=os.getenv('SMTP_PASSWORD'),
+            sender=os.getenv('SMTP_FROM', 'noreply@hange.ai'),
+            use_tls=os.getenv('SMTP_USE_TLS', 'true').lower() in ('1', 'true', 'yes'),
+        )
+
+class SMTPDeliverer:
+    """Sends messages over a single reused SMTP connection.
+
+    The connection is opened lazily, reused for up to batch_size messages
+    and then recycled. Transient failures reconnect and retry with
+    exponential backoff; permanent 5xx rejections are not retried.
+    """
+
+    def __init__(self, config: SMTPConfig, batch_size: int = 50, max_retries: int = 3,
+                 retry_delay: float = 1.0, smtp_factory: Callable[..., smtplib.SMTP] = smtplib.SMTP):
+        self.config = config
+        self.sender = config.sender
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.smtp_factory = smtp_factory
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._sent_on_connection = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _connect(self) -> smtplib.SMTP:
+        smtp = self.smtp_factory(self.config.host, self.config.port, timeout=self.config.timeout)
+        if self.config.use_tls:
+            smtp.starttls()
+        if self.config.username:
+            smtp.login(self.config.username, self.config.password or '')
+        return smtp
+
+    def _connection(self) -> smtplib.SMTP:
+        if self._smtp is not None and self._sent_on_connection >= self.batch_size:
+            self.close()
+        if self._smtp is None:
+            self._smtp = self._connect()
+            self._sent_on_connection = 0
+        return self._smtp
+
+    def close(self):
+        """Close the pooled connection"""
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+    def send(self, message: MIMEMultipart) -> Tuple[bool, Optional[str]]:
+        """Send one message, returning (success, error)"""
+        error = None
+        for attempt in range(self.max_retries):
+            try:
+                self._connection().send_message(message)
+                self._sent_on_connection += 1
+                return True, None
+            except smtplib.SMTPRecipientsRefused as e:
+                return False, f"Recipient refused: {e.recipients}"
+            except smtplib.SMTPResponseException as e:
+                error = f"{e.smtp_code} {e.smtp_error!r}"
+                if e.smtp_code >= 500:
+                    return False, error
+            except (smtplib.SMTPException, OSError) as e:
+                error = str(e)
+
+            # Drop the connection so the retry starts from a fresh one
+            self.close()
+            if attempt < self.max_retries - 1:
+                time.sleep(self.retry_delay * (2 ** attempt))
+
+        return False, error
+
+class LoggingDeliverer:
+    """Stand-in deliverer that only logs messages when SMTP is not configured"""
+
+    sender = 'noreply@hange.ai'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        pass
+
+    def send(self, message: MIMEMultipart) -> Tuple[bool, Optional[str]]:
+        logger.info(f"Email notification prepared for {message['To']}: {message['Subject']}")
+        return True, None
+
+def create_deliverer(config: Optional[SMTPConfig] = None):
+    """Create an SMTP deliverer, or a logging one if SMTP is not configured"""
+    config = config or SMTPConfig.from_env()
+    if config is None:
+        return LoggingDeliverer()
+    return SMTPDeliverer(config)
+
+class NotificationOutbox:
+    """Per-subscription queue of matches on top of notification_history"""
+
+    def __init__(self, conn: sqlite3.Connection, max_attempts: int = MAX_DELIVERY_ATTEMPTS):
+        self.conn = conn
+        self.max_attempts = max_attempts
+
+    def enqueue(self, subscription_id: int, procurement_id: str, procurement_title: str):
+        """Queue a match for the subscription's next digest"""
+        self.enqueue_many([(subscription_id, procurement_id, procurement_title)])
+
+    def enqueue_many(self, matches: List[Tuple[int, str, str]]):
+        """Queue (subscription_id, procurement_id, procurement_title) matches in one statement"""
+        self.conn.executemany('''
+            INSERT INTO notification_history
+            (subscription_id, procurement_id, procurement_title, email_status)
+            VALUES (?, ?, ?, 'queued')
+        ''', matches)
+
+    def due_digests(self, now: Optional[datetime] = None) -> List[Digest]:
+        """Group queued matches into digests for subscriptions that are due"""
+        now = now or datetime.now()
+        cursor = self.conn.execute('''
+            SELECT h.id, h.subscription_id, h.procurement_id, h.procurement_title,
+                   s.email, s.sectors, s.keywords, s.min_value, s.max_value,
+                   s.last_notification, s.notification_frequency,
+                   m.category, m.estimated_value, m.procurer, m.deadline, m.url
+            FROM notification_history h
+            JOIN email_subscriptions s ON s.id = h.subscription_id
+            LEFT JOIN procurement_matches m ON m.procurement_id = h.procurement_id
+            WHERE h.email_status = 'queued' AND s.active = 1
+            ORDER BY h.subscription_id, h.id
+        ''')
+
+        digests: Dict[int, Digest] = {}
+        skipped = set()
+        for (history_id, sub_id, procurement_id, title, email, sectors, keywords, min_value, max_value,
+             last_notification, frequency, category, estimated_value, procurer, deadline, url) in cursor:
+            if sub_id in skipped:
+                continue
+
+            digest = digests.get(sub_id)
+            if digest is None:
+                interval = FREQUENCY_INTERVALS.get(frequency)
+                if last_notification and interval and now - datetime.fromisoformat(last_notification) < interval:
+                    skipped.add(sub_id)
+                    continue
+                digest = digests[sub_id] = Digest(
+                    subscription_id=sub_id,
+                    email=email,
+                    subscription_info={
+                        'sectors': sectors,
+                        'keywords': keywords,
+                        'min_value': min_value,
+                        'max_value': max_value
+                    }
+                )
+
+            digest.history_ids.append(history_id)
+            digest.procurements.append({
+                'procurement_id': procurement_id,
+                'title': title,
+                'category': category or 'Other',
+                'estimated_value': estimated_value,
+                'procurer': procurer or 'Unknown',
+                'deadline': deadline,
+                'url': url or f"https://riigihanked.riik.ee/rhr-web/#/procurement/{procurement_id}/general-info"
+            })
+
+        return list(digests.values())
+
+    def _record_statuses(self, statuses: List[Tuple[str, int]], notified: List[int], now: datetime):
+        """Write delivery statuses and last-notification times in one transaction"""
+        sent = [(history_id,) for status, history_id in statuses if status == 'sent']
+        failed = [(self.max_attempts, history_id) for status, history_id in statuses if status != 'sent']
+        with self.conn:
+            self.conn.executemany('''
+                UPDATE notification_history
+                SET email_status = 'sent', sent_at = CURRENT_TIMESTAMP,
+                    delivery_attempts = COALESCE(delivery_attempts, 0) + 1
+                WHERE id = ?
+            ''', sent)
+            # A failed match is retried by later flushes until it runs out of attempts
+            self.conn.executemany('''
+                UPDATE notification_history
+                SET delivery_attempts = COALESCE(delivery_attempts, 0) + 1,
+                    email_status = CASE WHEN COALESCE(delivery_attempts, 0) + 1 >= ?
+                                        THEN 'failed' ELSE 'queued' END
+                WHERE id = ?
+            ''', failed)
+            self.conn.executemany('''
+                UPDATE email_subscriptions
+                SET last_notification = ?
+                WHERE id = ?
+            ''', [(now.isoformat(sep=' '), subscription_id) for subscription_id in notified])
+
+    def flush(self, deliverer, now: Optional[datetime] = None, commit_every: int = 50) -> Dict[str, int]:
+        """Deliver all due digests and record per-message status.
+
+        Statuses are written in bulk every commit_every digests, so a crash
+        mid-run re-sends at most one batch rather than losing track of it.
+        Digests that could not be delivered are tried again on the next flush.
+        """
+        now = now or datetime.now()
+        summary = {'digests': 0, 'sent': 0, 'failed': 0, 'matches': 0}
+        statuses: List[Tuple[str, int]] = []
+        notified: List[int] = []
+
+        with deliverer:
+            for digest in self.due_digests(now):
+                message = build_digest_message(deliverer.sender, digest.email,
+                                               digest.procurements, digest.subscription_info)
+                success, error = deliverer.send(message)
+
+                summary['digests'] += 1
+                summary['matches'] += len(digest.history_ids)
+                if success:
+                    summary['sent'] += 1
+                    notified.append(digest.subscription_id)
+                else:
+                    summary['failed'] += 1
+                    logger.warning(f"Digest delivery to {digest.email} failed: {error}")
+                status = 'sent' if success else 'failed'
+                statuses.extend((status, history_id) for history_id in digest.history_ids)
+
+                if summary['digests'] % commit_every == 0:
+                    self._record_statuses(statuses, notified, now)
+                    statuses, notified = [], []
+
+        if statuses:
+            self._record_statuses(statuses, notified, now)
+
+        return summary
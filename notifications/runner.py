@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Scheduled Notification Runner for Hange AI
+Runs the notification engine headless, once or on a fixed interval:
+
+    python -m notifications.runner --interval 900 --workers 8
+    python -m notifications.runner --dry-run --output summary.json
+
+Each run prints a JSON summary with per-stage timings.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+
+# Allow running as a script as well as with python -m
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notifications.engine import run_notification_check, RSS_FEED_URL, DEFAULT_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Match new procurements against email subscriptions and send digests")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="SQLite database with subscriptions (default: %(default)s)")
+    parser.add_argument('--feed-url', default=RSS_FEED_URL, help="RSS feed URL or file path")
+    parser.add_argument('--workers', type=int, default=4, help="Parallel classification workers (default: %(default)s)")
+    parser.add_argument('--dry-run', action='store_true', help="Match without storing procurements or sending email")
+    parser.add_argument('--interval', type=float, default=0,
+                        help="Seconds between runs; 0 runs once and exits (default: %(default)s)")
+    parser.add_argument('--output', help="Append each JSON summary to this file instead of stdout")
+    return parser.parse_args(argv)
+
+def write_summary(summary, output=None):
+    line = json.dumps(summary, ensure_ascii=False, default=str)
+    if output:
+        with open(output, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+    else:
+        print(line, flush=True)
+
+def main(argv=None) -> int:
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    args = parse_args(argv)
+
+    while True:
+        next_run = time.monotonic() + args.interval
+        try:
+            summary = run_notification_check(
+                db_path=args.db,
+                feed_url=args.feed_url,
+                workers=args.workers,
+                dry_run=args.dry_run
+            )
+        except Exception as e:
+            logger.error(f"Notification run failed: {str(e)}")
+            summary = {'error': str(e)}
+        write_summary(summary, args.output)
+
+        if not args.interval:
+            return 1 if 'error' in summary else 0
+
+        try:
+            time.sleep(max(0.0, next_run - time.monotonic()))
+        except KeyboardInterrupt:
+            return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
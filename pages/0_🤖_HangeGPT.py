@@ -7,11 +7,12 @@ from datetime import datetime
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from agents.chat_agent import (
-    create_chat_agent, 
+    get_chat_agent, 
     get_county_suggestions, 
     get_category_suggestions,
     format_procurement_result
 )
+from agents.conversation_memory import ConversationMemory
 
 st.set_page_config(
     page_title="HangeGPT - AI Chat Assistant",
@@ -76,17 +77,16 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource(show_spinner='Initializing HangeGPT...')
 def initialize_chat_agent():
-    """Initialize the chat agent with caching"""
-    if 'chat_agent' not in st.session_state:
-        with st.spinner('Initializing HangeGPT...'):
-            st.session_state.chat_agent = create_chat_agent()
-    return st.session_state.chat_agent
+    """Chat agent shared by all sessions; each session keeps only its own chat history"""
+    return get_chat_agent()
 
 def initialize_chat_history():
     """Initialize chat history"""
     if 'chat_history' not in st.session_state:
-        st.session_state.chat_history = []
+        # Recent turns plus a rolling summary of older ones, so long chats keep a bounded context
+        st.session_state.chat_history = ConversationMemory(summarize=initialize_chat_agent().summarize_conversation)
         st.session_state.chat_messages = []
 
 def add_message(role: str, content: str):
@@ -116,6 +116,35 @@ def display_chat_history():
             </div>
             """, unsafe_allow_html=True)
 
+def ask(query: str, user_input: str = None):
+    """Queue a question; its answer is streamed below the chat history on the next run"""
+    add_message('user', user_input or query)
+    st.session_state.pending_query = {'query': query, 'user_input': user_input}
+
+def stream_response(chat_agent, query: str) -> str:
+    """Render HangeGPT's progress and answer as they are generated"""
+    placeholder = st.empty()
+    timestamp = datetime.now().strftime("%H:%M")
+    steps = []
+    response = ""
+    for event in chat_agent.chat_stream(query, st.session_state.chat_history):
+        if event['type'] == 'status':
+            steps.append(event['message'])
+            body = '<br>'.join(f"⏳ {step}" for step in steps)
+        elif event['type'] == 'token':
+            response += event['content']
+            body = response + "▌"
+        else:
+            response = event['content']
+            body = response
+        placeholder.markdown(f"""
+        <div class="ai-message">
+            <strong>HangeGPT ({timestamp}):</strong><br>
+            {body}
+        </div>
+        """, unsafe_allow_html=True)
+    return response
+
 def main():
     # Header
     st.markdown("""
@@ -140,10 +169,7 @@ def main():
         for suggestion in suggestions[:5]:
             if st.button(suggestion, key=f"suggestion_{suggestion[:20]}", use_container_width=True):
                 # Add suggestion as user message and get response
-                add_message('user', suggestion)
-                with st.spinner('HangeGPT is thinking...'):
-                    response = chat_agent.chat(suggestion, st.session_state.chat_history)
-                add_message('assistant', response)
+                ask(suggestion)
                 st.rerun()
         
         st.markdown("---")
@@ -187,10 +213,14 @@ def main():
             </div>
             """, unsafe_allow_html=True)
         
+        memory = st.session_state.chat_history
+        st.caption(f"🧠 Context sent with each question: ~{memory.token_count} tokens "
+                   f"({len(memory.turns)} recent turns{' + summary' if memory.summary else ''})")
+        
         # Clear chat button
         if st.button("🗑️ Clear Chat", use_container_width=True):
             st.session_state.chat_messages = []
-            st.session_state.chat_history = []
+            st.session_state.chat_history.clear()
             st.rerun()
     
     # Main chat interface
@@ -216,6 +246,21 @@ def main():
     # Display chat history
     display_chat_history()
     
+    # Stream the answer to the latest question
+    pending = st.session_state.pop('pending_query', None)
+    if pending:
+        try:
+            response = stream_response(chat_agent, pending['query'])
+            add_message('assistant', response)
+            
+            # Update chat history for context
+            st.session_state.chat_history.add_turn(pending['user_input'] or pending['query'], response)
+        
+        except Exception as e:
+            error_message = f"I apologize, but I encountered an error: {str(e)}. Please try rephrasing your question."
+            add_message('assistant', error_message)
+        st.rerun()
+    
     st.markdown('</div>', unsafe_allow_html=True)
     
     # Chat input
@@ -237,31 +282,14 @@ def main():
     
     # Handle user input
     if send_button and user_input:
-        # Add user message
-        add_message('user', user_input)
+        # Apply filters if selected
+        enhanced_query = user_input
+        if selected_counties:
+            enhanced_query += f" (focus on counties: {', '.join(selected_counties)})"
+        if selected_categories:
+            enhanced_query += f" (focus on categories: {', '.join(selected_categories)})"
         
-        # Get AI response
-        with st.spinner('HangeGPT is analyzing your request...'):
-            try:
-                # Apply filters if selected
-                enhanced_query = user_input
-                if selected_counties:
-                    enhanced_query += f" (focus on counties: {', '.join(selected_counties)})"
-                if selected_categories:
-                    enhanced_query += f" (focus on categories: {', '.join(selected_categories)})"
-                
-                response = chat_agent.chat(enhanced_query, st.session_state.chat_history)
-                add_message('assistant', response)
-                
-                # Update chat history for context
-                st.session_state.chat_history.extend([
-                    {'role': 'user', 'content': user_input},
-                    {'role': 'assistant', 'content': response}
-                ])
-                
-            except Exception as e:
-                error_message = f"I apologize, but I encountered an error: {str(e)}. Please try rephrasing your question."
-                add_message('assistant', error_message)
+        ask(enhanced_query, user_input)
         
         # Clear input and rerun
         st.session_state.user_input = ""
@@ -275,37 +303,25 @@ def main():
     with col1:
         if st.button("📊 Latest Procurements", use_container_width=True):
             query = "Show me the latest procurements from today"
-            add_message('user', query)
-            with st.spinner('Getting latest data...'):
-                response = chat_agent.chat(query, st.session_state.chat_history)
-                add_message('assistant', response)
+            ask(query)
             st.rerun()
     
     with col2:
         if st.button("🏗️ Construction Projects", use_container_width=True):
             query = "Show me all construction and infrastructure procurements"
-            add_message('user', query)
-            with st.spinner('Finding construction projects...'):
-                response = chat_agent.chat(query, st.session_state.chat_history)
-                add_message('assistant', response)
+            ask(query)
             st.rerun()
     
     with col3:
         if st.button("💰 High Value Deals", use_container_width=True):
             query = "Show me procurements with values over €100,000"
-            add_message('user', query)
-            with st.spinner('Finding high value procurements...'):
-                response = chat_agent.chat(query, st.session_state.chat_history)
-                add_message('assistant', response)
+            ask(query)
             st.rerun()
     
     with col4:
         if st.button("🏛️ Tallinn Procurements", use_container_width=True):
             query = "Show me all procurements in Tallinn"
-            add_message('user', query)
-            with st.spinner('Finding Tallinn procurements...'):
-                response = chat_agent.chat(query, st.session_state.chat_history)
-                add_message('assistant', response)
+            ask(query)
             st.rerun()
     
     # Tips section
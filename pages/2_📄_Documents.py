@@ -14,12 +14,19 @@ import openpyxl
 from fpdf import FPDF
 import base64
 import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from document_chunking import split_into_chunks, merge_extractions
 
 # Load environment variables
 load_dotenv()
 client = OpenAI()
 client.api_key = os.getenv('OPENAI_API_KEY')
 OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
+# Longer documents are extracted in chunks of this many characters
+DOCUMENT_CHUNK_SIZE = 8000
 
 st.set_page_config(page_title="Document Processing", layout="wide")
 
@@ -59,12 +66,30 @@ def init_documents_db():
 def extract_document_fields_with_openai(document_content, document_type):
     """Extract form fields from document content using OpenAI LLM"""
     try:
-        prompt = f"""
+        chunks = split_into_chunks(document_content, DOCUMENT_CHUNK_SIZE)
+        if len(chunks) <= 1:
+            return extract_chunk_fields(document_content, document_type)
+        
+        # Extract chunks concurrently and merge them into one result
+        with ThreadPoolExecutor(max_workers=min(4, len(chunks))) as executor:
+            results = list(executor.map(lambda chunk: extract_chunk_fields(chunk, document_type), chunks))
+        return merge_extractions(results)
+        
+    except json.JSONDecodeError as e:
+        st.error(f"Error parsing OpenAI response as JSON: {str(e)}")
+        return None
+    except Exception as e:
+        st.error(f"Error extracting fields with OpenAI: {str(e)}")
+        return None
+
+def extract_chunk_fields(document_content, document_type):
+    """Extract form fields from one chunk of document content using OpenAI LLM"""
+    prompt = f"""
         You are an expert document analyzer specializing in Estonian procurement documents. 
         Analyze the following {document_type} document content and extract all form fields, requirements, and fillable sections.
         
         Document Content:
-        {document_content[:8000]}  # Limit content to avoid token limits
+        {document_content}
         
         Please extract and return a JSON structure with the following information:
         {{
@@ -108,26 +133,18 @@ def extract_document_fields_with_openai(document_content, document_type):
         
         Return only valid JSON.
         """
-        
-        response = client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": "You are an expert document analyzer for Estonian procurement documents. Always return valid JSON."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.1
-        )
-        
-        # Parse the JSON response
-        extracted_data = json.loads(response.choices[0].message.content)
-        return extracted_data
-        
-    except json.JSONDecodeError as e:
-        st.error(f"Error parsing OpenAI response as JSON: {str(e)}")
-        return None
-    except Exception as e:
-        st.error(f"Error extracting fields with OpenAI: {str(e)}")
-        return None
+    
+    response = client.chat.completions.create(
+        model=OPENAI_MODEL,
+        messages=[
+            {"role": "system", "content": "You are an expert document analyzer for Estonian procurement documents. Always return valid JSON."},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.1
+    )
+    
+    # Parse the JSON response
+    return json.loads(response.choices[0].message.content)
 
 def extract_text_from_docx(file_path):
     """Extract text content from DOCX file"""
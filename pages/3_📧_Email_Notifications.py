@@ -2,172 +2,29 @@ import streamlit as st
 import sqlite3
 import pandas as pd
 from datetime import datetime, timedelta
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import feedparser
-import re
-import json
-from openai import OpenAI
 import os
-from dotenv import load_dotenv
+import sys
 
-# Load environment variables
-load_dotenv()
-client = OpenAI()
-client.api_key = os.getenv('OPENAI_API_KEY')
-OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4.1-mini')
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-st.set_page_config(page_title="Email Notifications", layout="wide")
-
-def init_email_database():
-    """Initialize email notification database"""
-    conn = sqlite3.connect('procurement.db')
-    cursor = conn.cursor()
-    
-    # Email subscriptions table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS email_subscriptions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            email TEXT UNIQUE NOT NULL,
-            sectors TEXT NOT NULL,
-            keywords TEXT,
-            min_value INTEGER DEFAULT 0,
-            max_value INTEGER DEFAULT 10000000,
-            active BOOLEAN DEFAULT TRUE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            last_notification TIMESTAMP,
-            notification_frequency TEXT DEFAULT 'daily'
-        )
-    ''')
-    
-    # Notification history table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS notification_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            subscription_id INTEGER,
-            procurement_id TEXT,
-            procurement_title TEXT,
-            sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            email_status TEXT DEFAULT 'sent',
-            FOREIGN KEY (subscription_id) REFERENCES email_subscriptions (id)
-        )
-    ''')
-    
-    # Procurement cache for matching
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS procurement_matches (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            procurement_id TEXT UNIQUE,
-            title TEXT,
-            description TEXT,
-            category TEXT,
-            estimated_value INTEGER,
-            deadline DATE,
-            procurer TEXT,
-            url TEXT,
-            processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
-
-def classify_procurement(title, description):
-    """Classify procurement using OpenAI"""
-    try:
-        prompt = f"""Classify the following Estonian procurement into one of these categories:
-        
-        Categories:
-        - Construction & Infrastructure
-        - Technology & IT
-        - Healthcare & Medical
-        - Education & Research
-        - Energy & Utilities
-        - Transportation
-        - Environmental Services
-        - Professional Services
-        - Sports & Recreation
-        - Other
-
-        Title: {title}
-        Description: {description}
-
-        Return only the category name."""
+from notifications.engine import init_email_database, run_notification_check
+from notifications.outbox import build_digest_message, create_deliverer
 
-        response = client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": "You are a procurement classifier."},
-                {"role": "user", "content": prompt}
-            ]
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        return "Other"
-
-def extract_estimated_value(description):
-    """Extract estimated value from procurement description"""
-    try:
-        # Look for EUR amounts in various formats
-        patterns = [
-            r'(\d+(?:\s?\d{3})*)\s*EUR',
-            r'(\d+(?:\s?\d{3})*)\s*€',
-            r'EUR\s*(\d+(?:\s?\d{3})*)',
-            r'€\s*(\d+(?:\s?\d{3})*)',
-            r'(\d+(?:\s?\d{3})*)\s*euro'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, description, re.IGNORECASE)
-            if match:
-                value_str = match.group(1).replace(' ', '')
-                return int(value_str)
-        
-        return 0
-    except:
-        return 0
+st.set_page_config(page_title="Email Notifications", layout="wide")
 
 def send_email_notification(email, procurements, subscription_info):
     """Send email notification to subscriber"""
     try:
-        # For demo purposes, we'll just log the email
-        # In production, implement actual SMTP sending
-        
-        email_content = f"""
-        Dear Subscriber,
-        
-        We found {len(procurements)} new procurement opportunities matching your criteria:
-        
-        Sectors: {subscription_info['sectors']}
-        Keywords: {subscription_info.get('keywords', 'Any')}
-        Value Range: €{subscription_info['min_value']:,} - €{subscription_info['max_value']:,}
-        
-        Matching Procurements:
-        """
+        # Delivered over SMTP when SMTP_SERVER is configured, otherwise only logged
+        with create_deliverer() as deliverer:
+            message = build_digest_message(deliverer.sender, email, procurements, subscription_info)
+            success, error = deliverer.send(message)
         
-        for proc in procurements:
-            email_content += f"""
+        if not success:
+            st.error(f"Error sending email: {error}")
+            return False
         
-        Title: {proc['title']}
-        Category: {proc['category']}
-        Estimated Value: €{proc['estimated_value']:,}
-        Procurer: {proc['procurer']}
-        Deadline: {proc['deadline']}
-        URL: {proc['url']}
-        
-        ---
-        """
-        
-        email_content += """
-        
-        Best regards,
-        Hange AI Team
-        
-        To unsubscribe or modify your preferences, visit: https://hange-ai.streamlit.app/
-        """
-        
-        # Log the email (in production, send via SMTP)
         st.success(f"Email notification prepared for {email} with {len(procurements)} matches")
         
         return True
@@ -179,89 +36,13 @@ def send_email_notification(email, procurements, subscription_info):
 def check_procurement_matches():
     """Check for new procurements and send notifications"""
     try:
-        # Fetch latest RSS feed
-        feed = feedparser.parse('https://riigihanked.riik.ee/rhr/api/public/v1/rss')
+        summary = run_notification_check()
         
-        conn = sqlite3.connect('procurement.db')
-        cursor = conn.cursor()
-        
-        new_matches = 0
-        
-        for entry in feed.entries:
-            procurement_id = re.search(r'/procurement/(\d+)', entry.link)
-            if not procurement_id:
-                continue
-            
-            procurement_id = procurement_id.group(1)
-            
-            # Check if already processed
-            cursor.execute('SELECT id FROM procurement_matches WHERE procurement_id = ?', (procurement_id,))
-            if cursor.fetchone():
-                continue
-            
-            # Classify and extract info
-            category = classify_procurement(entry.title, entry.description)
-            estimated_value = extract_estimated_value(entry.description)
-            creator = entry.get('dc_creator', '') or entry.get('creator', '')
-            
-            # Store procurement
-            cursor.execute('''
-                INSERT INTO procurement_matches 
-                (procurement_id, title, description, category, estimated_value, procurer, url)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (procurement_id, entry.title, entry.description, category, estimated_value, creator, entry.link))
-            
-            # Find matching subscriptions
-            cursor.execute('SELECT * FROM email_subscriptions WHERE active = 1')
-            subscriptions = cursor.fetchall()
-            
-            for sub in subscriptions:
-                sub_id, email, sectors, keywords, min_val, max_val, active, created_at, last_notif, freq = sub
-                
-                # Check sector match
-                user_sectors = [s.strip() for s in sectors.split(',')]
-                if category not in user_sectors:
-                    continue
-                
-                # Check value range
-                if estimated_value < min_val or estimated_value > max_val:
-                    continue
-                
-                # Check keywords
-                if keywords:
-                    keyword_list = [k.strip().lower() for k in keywords.split(',')]
-                    text_to_search = (entry.title + ' ' + entry.description).lower()
-                    if not any(keyword in text_to_search for keyword in keyword_list):
-                        continue
-                
-                # Check notification frequency
-                if last_notif:
-                    last_notification = datetime.fromisoformat(last_notif)
-                    if freq == 'daily' and (datetime.now() - last_notification).days < 1:
-                        continue
-                    elif freq == 'weekly' and (datetime.now() - last_notification).days < 7:
-                        continue
-                
-                # Record notification
-                cursor.execute('''
-                    INSERT INTO notification_history 
-                    (subscription_id, procurement_id, procurement_title)
-                    VALUES (?, ?, ?)
-                ''', (sub_id, procurement_id, entry.title))
-                
-                # Update last notification time
-                cursor.execute('''
-                    UPDATE email_subscriptions 
-                    SET last_notification = CURRENT_TIMESTAMP 
-                    WHERE id = ?
-                ''', (sub_id,))
-                
-                new_matches += 1
-        
-        conn.commit()
-        conn.close()
+        delivery = summary['delivery']
+        if delivery['failed']:
+            st.warning(f"{delivery['failed']} of {delivery['digests']} digest emails could not be delivered")
         
-        return new_matches
+        return summary['matches']
         
     except Exception as e:
         st.error(f"Error checking matches: {str(e)}")
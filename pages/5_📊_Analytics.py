@@ -12,7 +12,8 @@ import numpy as np
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from Home import Procurement, SessionLocal, engine
+from Home import Procurement, SessionLocal, engine, DATABASE_PATH
+from procurer_profiles import get_profile_store
 
 st.set_page_config(
     page_title="Analytics - Hange AI",
@@ -165,6 +166,21 @@ def create_county_analysis(df):
     
     return county_stats, fig_map
 
+def create_procurer_leaderboard(metric, top_k):
+    """Build the procurer leaderboard from the pre-aggregated profiles"""
+    profiles = get_profile_store(DATABASE_PATH).top_procurers(metric, top_k)
+    if not profiles:
+        return None
+    
+    leaderboard = pd.DataFrame(profiles)
+    leaderboard['top_category'] = leaderboard['category_mix'].apply(
+        lambda mix: max(mix, key=mix.get) if mix else None
+    )
+    leaderboard = leaderboard.drop(columns=['category_mix'])
+    leaderboard.columns = ['Procurer', 'Notices', 'Valued Notices', 'Total Value',
+                           'Median Value', 'Last Seen', 'Top Category']
+    return leaderboard
+
 def create_category_trends(df):
     """Analyze category trends over time"""
     if df.empty:
@@ -342,6 +358,34 @@ def main():
     
     st.markdown('</div>', unsafe_allow_html=True)
     
+    # Procurer Leaderboard
+    st.markdown('<div class="analytics-section">', unsafe_allow_html=True)
+    st.subheader("🏢 Procurer Leaderboard")
+    
+    metric_labels = {
+        'total_value': 'Total Value',
+        'notice_count': 'Number of Notices',
+        'median_value': 'Median Value',
+        'last_seen': 'Most Recently Active'
+    }
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        leaderboard_metric = st.selectbox(
+            "Rank procurers by",
+            list(metric_labels.keys()),
+            format_func=metric_labels.get
+        )
+    with col2:
+        leaderboard_size = st.number_input("Top", min_value=5, max_value=100, value=10, step=5)
+    
+    leaderboard = create_procurer_leaderboard(leaderboard_metric, int(leaderboard_size))
+    if leaderboard is not None:
+        st.dataframe(leaderboard, use_container_width=True)
+    else:
+        st.info("No procurer profiles available")
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+    
     # Category Trends
     st.markdown('<div class="analytics-section">', unsafe_allow_html=True)
     st.subheader("📊 Category Trends Analysis")
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Procurement Similarity Index for Hange AI
+Local embedding index over procurement titles and clean descriptions:
+1. Hashed word and word-stem features, a lexical stand-in for a semantic model
+2. Vectors appended to a float32 file and memory-mapped for search
+3. Incremental upserts on ingest, skipping notices whose text is unchanged
+4. Top-K cosine similarity from a single matrix-vector product
+
+The hashed embedder keeps the index local, free of API keys and deterministic.
+It matches shared words and stems, not meaning. An embedder that replaces it
+(such as the OpenAI embeddings used for the response cache) must come with a
+new EMBEDDER_VERSION, which rebuilds the stored vectors.
+"""
+
+import json
+import logging
+import re
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIM = 256
+# Stored with the index; vectors from another embedder are rebuilt
+EMBEDDER_VERSION = 'hashed-words-v1'
+# Estonian inflects by suffix, so the first letters of a word stand in for its stem
+STEM_LENGTH = 5
+TITLE_WEIGHT = 2.0
+
+_WORD = re.compile(r'[^\W\d_]{3,}')
+# Words every notice shares, which would make all notices look alike
+_STOP_WORDS = frozenset('''
+    the and for with from that this our all are was were our their your
+    procurement procurements tender tenders contract contracts service services public notice
+    ning või mis kui see seda kes oma ole ära
+    hange hanke hanked hanget hangete riigihange riigihanke teenus teenuse teenused leping lepingu
+'''.split())
+
+def _features(text: str) -> List[str]:
+    words = [word for word in _WORD.findall(text.lower()) if word not in _STOP_WORDS]
+    stems = [word[:STEM_LENGTH] for word in words]
+    return words + stems + [f"{a} {b}" for a, b in zip(stems, stems[1:])]
+
+def embed_text(title: str, description: str = '', dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """Unit-length hashed feature vector of a notice"""
+    vector = np.zeros(dim, dtype=np.float32)
+    for text, weight in ((title or '', TITLE_WEIGHT), (description or '', 1.0)):
+        for feature in _features(text):
+            digest = zlib.crc32(feature.encode('utf-8'))
+            # The hash also picks a sign, so colliding features tend to cancel out
+            vector[digest % dim] += weight if digest & 0x80000000 else -weight
+    # Sublinear term frequency, so one repeated word does not dominate
+    vector = np.sign(vector) * np.log1p(np.abs(vector))
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+def _digest(notice: Dict) -> int:
+    return zlib.crc32(f"{notice.get('title') or ''}\0{notice.get('clean_description') or ''}".encode('utf-8'))
+
+class ProcurementIndex:
+    """Append-only, memory-mapped embedding index of procurement notices.
+
+    A notice whose text changes gets a new row; its old row stays in the
+    file but is masked out of searches.
+    """
+
+    def __init__(self, index_dir: str, dim: int = EMBEDDING_DIM):
+        self.index_dir = Path(index_dir)
+        self.dim = dim
+        self._lock = threading.RLock()
+        self._vectors_path = self.index_dir / 'vectors.f32'
+        self._ids_path = self.index_dir / 'ids.tsv'
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._digests: Dict[str, int] = {}
+        self._live = np.zeros(0, dtype=bool)
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._open()
+
+    def _open(self):
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        meta_path = self.index_dir / 'meta.json'
+        meta = {'embedder': EMBEDDER_VERSION, 'dim': self.dim}
+        if not meta_path.exists() or json.loads(meta_path.read_text()) != meta:
+            # A new or incompatible index starts empty
+            self._vectors_path.write_bytes(b'')
+            self._ids_path.write_text('')
+            meta_path.write_text(json.dumps(meta))
+
+        entries = [line.split('\t') for line in self._ids_path.read_text(encoding='utf-8').splitlines()]
+        # Vectors are written before ids, so a torn append leaves at most unlisted vectors
+        rows = min(len(entries), self._vectors_path.stat().st_size // (4 * self.dim))
+        if rows != len(entries) or self._vectors_path.stat().st_size != rows * 4 * self.dim:
+            # Drop the unfinished append, so later appends stay aligned
+            with open(self._vectors_path, 'r+b') as f:
+                f.truncate(rows * 4 * self.dim)
+            self._ids_path.write_text(''.join(f"{i}\t{d}\n" for i, d in entries[:rows]), encoding='utf-8')
+        for procurement_id, digest in entries[:rows]:
+            self._ids.append(procurement_id)
+            self._rows[procurement_id] = len(self._ids) - 1
+            self._digests[procurement_id] = int(digest)
+        self._live = np.zeros(rows, dtype=bool)
+        self._live[list(self._rows.values())] = True
+        self._map()
+
+    def _map(self):
+        if self._ids:
+            self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode='r', shape=(len(self._ids), self.dim))
+        else:
+            self._vectors = np.zeros((0, self.dim), dtype=np.float32)
+
+    def _append(self, ids: List[str], digests: List[int], vectors: np.ndarray):
+        with open(self._vectors_path, 'ab') as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        with open(self._ids_path, 'a', encoding='utf-8') as f:
+            f.writelines(f"{procurement_id}\t{digest}\n" for procurement_id, digest in zip(ids, digests))
+
+        live = np.ones(len(ids), dtype=bool)
+        for procurement_id, digest in zip(ids, digests):
+            if procurement_id in self._rows:
+                self._live[self._rows[procurement_id]] = False
+            self._ids.append(procurement_id)
+            self._rows[procurement_id] = len(self._ids) - 1
+            self._digests[procurement_id] = digest
+        self._live = np.concatenate([self._live, live])
+        self._map()
+
+    def add(self, notices: Iterable[Dict]) -> int:
+        """Index new and changed notices ({'id', 'title', 'clean_description'}); returns how many were embedded"""
+        with self._lock:
+            pending: Dict[str, Tuple[int, Dict]] = {}
+            for notice in notices:
+                procurement_id = notice.get('id')
+                if not procurement_id:
+                    continue
+                digest = _digest(notice)
+                if self._digests.get(str(procurement_id)) != digest:
+                    pending[str(procurement_id)] = (digest, notice)
+            if not pending:
+                return 0
+
+            vectors = np.stack([embed_text(notice.get('title'), notice.get('clean_description'), self.dim)
+                                for _, notice in pending.values()])
+            self._append(list(pending), [digest for digest, _ in pending.values()], vectors)
+            return len(pending)
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """The k notices most similar to the query, as (procurement id, cosine similarity), best first"""
+        vector = embed_text(query, dim=self.dim)
+        with self._lock:
+            vectors, live, ids = self._vectors, self._live, self._ids
+        if not len(ids) or not vector.any():
+            return []
+
+        scores = np.asarray(vectors @ vector)
+        scores[~live] = -np.inf
+        k = min(k, int(live.sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(ids[row], float(scores[row])) for row in top if scores[row] > 0]
+
+    def backfill(self, db_path: str) -> int:
+        """Index procurements already in the database"""
+        conn = sqlite3.connect(db_path)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'procurements'")
+            if not cursor.fetchone():
+                return 0
+            cursor.execute('SELECT id, title, clean_description FROM procurements')
+            added = self.add({'id': r[0], 'title': r[1], 'clean_description': r[2]} for r in cursor)
+        finally:
+            conn.close()
+        if added:
+            logger.info(f"Indexed {added} procurements for similarity search")
+        return added
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+# Process-wide indexes so ingest and every chat session share one memory map
+_indexes: Dict[str, ProcurementIndex] = {}
+_indexes_lock = threading.Lock()
+
+def get_procurement_index(db_path: str = "procurement_data.db") -> ProcurementIndex:
+    """Return the shared similarity index for a database, backfilled from it on first use"""
+    with _indexes_lock:
+        if db_path not in _indexes:
+            index = ProcurementIndex(str(Path(db_path).with_suffix('.index')))
+            index.backfill(db_path)
+            _indexes[db_path] = index
+        return _indexes[db_path]
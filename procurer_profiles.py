@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Procurer Profiles for Hange AI
+Incrementally maintained per-procurer spend profiles:
+1. Notice count, total and median estimated value
+2. Category mix and last-seen date
+3. Cached leaderboards for fast top-K lookups by any metric
+"""
+
+import json
+import sqlite3
+import threading
+import logging
+from bisect import insort, bisect_left
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROFILE_METRICS = ('notice_count', 'total_value', 'median_value', 'valued_count', 'last_seen')
+
+@dataclass
+class ProcurerProfile:
+    """Aggregated spend profile for a single procurer"""
+    procurer: str
+    notice_count: int = 0
+    valued_count: int = 0
+    total_value: float = 0.0
+    median_value: Optional[float] = None
+    category_mix: Dict[str, int] = field(default_factory=dict)
+    last_seen: Optional[datetime] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+class ProcurerProfileStore:
+    """Per-procurer profiles kept up to date on every ingest.
+
+    Profiles are persisted in SQLite next to the procurements table and
+    mirrored in memory. Each notice's contribution is remembered so a
+    re-ingested notice with a changed value or category is moved rather
+    than double counted. Leaderboards are sorted once per change and then
+    served by slicing, so polling top-K costs no rescans.
+    """
+
+    def __init__(self, db_path: str = "procurement_data.db"):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._profiles: Dict[str, ProcurerProfile] = {}
+        self._notices: Dict[str, Tuple[str, str, Optional[float], Optional[datetime]]] = {}
+        self._procurer_notices: Dict[str, set] = {}
+        self._values: Dict[str, List[float]] = {}
+        self._rankings: Dict[str, List[ProcurerProfile]] = {}
+        self._init_db()
+        self._load()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path)
+
+    def _init_db(self):
+        """Initialize profile tables"""
+        conn = self._connect()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS procurer_profile_notices (
+                procurement_id TEXT PRIMARY KEY,
+                procurer TEXT NOT NULL,
+                category TEXT,
+                estimated_value REAL,
+                published TIMESTAMP
+            )
+        ''')
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS procurer_profiles (
+                procurer TEXT PRIMARY KEY,
+                notice_count INTEGER DEFAULT 0,
+                valued_count INTEGER DEFAULT 0,
+                total_value REAL DEFAULT 0,
+                median_value REAL,
+                category_mix TEXT,
+                last_seen TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        conn.commit()
+        conn.close()
+
+    def _load(self):
+        """Load notice contributions and rebuild in-memory profiles"""
+        conn = self._connect()
+        cursor = conn.cursor()
+
+        cursor.execute('SELECT procurement_id, procurer, category, estimated_value, published FROM procurer_profile_notices')
+        rows = cursor.fetchall()
+        backfill = not rows
+
+        if backfill:
+            rows = self._read_procurements(cursor)
+            if rows:
+                logger.info(f"Backfilling procurer profiles from {len(rows)} procurements")
+
+        conn.close()
+
+        notices = (
+            {'id': r[0], 'procurer': r[1], 'category': r[2], 'estimated_value': r[3], 'published': r[4]}
+            for r in rows
+        )
+        # Rows read back from our own table are already persisted
+        self.record_notices(notices, persist=backfill)
+
+    def _read_procurements(self, cursor: sqlite3.Cursor) -> List[Tuple]:
+        """Read existing procurements for the initial backfill"""
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'procurements'")
+        if not cursor.fetchone():
+            return []
+        cursor.execute('SELECT id, procurer, category, estimated_value, published FROM procurements')
+        return cursor.fetchall()
+
+    @staticmethod
+    def _parse_date(value) -> Optional[datetime]:
+        if value is None or isinstance(value, datetime):
+            return value
+        try:
+            return datetime.fromisoformat(str(value))
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _parse_value(value) -> Optional[float]:
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return None
+        return None if value != value else value  # NaN from pandas rows
+
+    def _remove_contribution(self, procurement_id: str):
+        procurer, category, value, published = self._notices.pop(procurement_id)
+        profile = self._profiles[procurer]
+        self._procurer_notices[procurer].discard(procurement_id)
+
+        profile.notice_count -= 1
+        profile.category_mix[category] -= 1
+        if not profile.category_mix[category]:
+            del profile.category_mix[category]
+
+        if value is not None:
+            values = self._values[procurer]
+            del values[bisect_left(values, value)]
+            profile.valued_count -= 1
+            profile.total_value -= value
+
+        if published is not None and published == profile.last_seen:
+            dates = [self._notices[i][3] for i in self._procurer_notices[procurer] if self._notices[i][3] is not None]
+            profile.last_seen = max(dates) if dates else None
+
+    def _add_contribution(self, procurement_id: str, procurer: str, category: str,
+                          value: Optional[float], published: Optional[datetime]):
+        profile = self._profiles.get(procurer)
+        if profile is None:
+            profile = self._profiles[procurer] = ProcurerProfile(procurer=procurer)
+            self._procurer_notices[procurer] = set()
+            self._values[procurer] = []
+
+        self._notices[procurement_id] = (procurer, category, value, published)
+        self._procurer_notices[procurer].add(procurement_id)
+
+        profile.notice_count += 1
+        profile.category_mix[category] = profile.category_mix.get(category, 0) + 1
+
+        if value is not None:
+            insort(self._values[procurer], value)
+            profile.valued_count += 1
+            profile.total_value += value
+
+        if published is not None and (profile.last_seen is None or published > profile.last_seen):
+            profile.last_seen = published
+
+    def _update_median(self, procurer: str):
+        values = self._values[procurer]
+        profile = self._profiles[procurer]
+        n = len(values)
+        if not n:
+            profile.median_value = None
+        elif n % 2:
+            profile.median_value = values[n // 2]
+        else:
+            profile.median_value = (values[n // 2 - 1] + values[n // 2]) / 2
+
+    def record_notices(self, notices: Iterable[Dict[str, Any]], persist: bool = True) -> int:
+        """Fold a batch of notices into the profiles.
+
+        Each notice needs 'id' and 'procurer'; 'category', 'estimated_value'
+        and 'published' are optional. Returns the number of notices that
+        were new or changed.
+        """
+        with self._lock:
+            changed_rows = []
+            touched = set()
+
+            for notice in notices:
+                procurement_id = str(notice['id'])
+                procurer = notice.get('procurer') or 'Unknown'
+                category = notice.get('category') or 'Other'
+                value = self._parse_value(notice.get('estimated_value'))
+                published = self._parse_date(notice.get('published'))
+
+                entry = (procurer, category, value, published)
+                previous = self._notices.get(procurement_id)
+                if previous == entry:
+                    continue
+
+                if previous is not None:
+                    touched.add(previous[0])
+                    self._remove_contribution(procurement_id)
+
+                self._add_contribution(procurement_id, *entry)
+                touched.add(procurer)
+                changed_rows.append((procurement_id, procurer, category, value,
+                                     published.isoformat() if published else None))
+
+            if not changed_rows:
+                return 0
+
+            profile_rows = []
+            deleted = []
+            for procurer in touched:
+                profile = self._profiles[procurer]
+                if not profile.notice_count:
+                    del self._profiles[procurer]
+                    del self._procurer_notices[procurer]
+                    del self._values[procurer]
+                    deleted.append((procurer,))
+                    continue
+                self._update_median(procurer)
+                profile_rows.append((
+                    procurer, profile.notice_count, profile.valued_count, profile.total_value,
+                    profile.median_value, json.dumps(profile.category_mix, ensure_ascii=False),
+                    profile.last_seen.isoformat() if profile.last_seen else None
+                ))
+
+            if persist:
+                self._persist(changed_rows, profile_rows, deleted)
+            self._rankings.clear()
+
+            return len(changed_rows)
+
+    def _persist(self, notice_rows: List[Tuple], profile_rows: List[Tuple], deleted: List[Tuple]):
+        """Write changed notices and profiles in one transaction"""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany('''
+                    INSERT OR REPLACE INTO procurer_profile_notices
+                    (procurement_id, procurer, category, estimated_value, published)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', notice_rows)
+                conn.executemany('''
+                    INSERT OR REPLACE INTO procurer_profiles
+                    (procurer, notice_count, valued_count, total_value, median_value, category_mix, last_seen, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ''', profile_rows)
+                conn.executemany('DELETE FROM procurer_profiles WHERE procurer = ?', deleted)
+        except sqlite3.Error as e:
+            logger.error(f"Error persisting procurer profiles: {str(e)}")
+        finally:
+            conn.close()
+
+    def _ranking(self, metric: str) -> List[ProcurerProfile]:
+        ranking = self._rankings.get(metric)
+        if ranking is None:
+            # Missing medians/dates sort last; ties break on procurer name
+            ranking = sorted(
+                self._profiles.values(),
+                key=lambda p: (getattr(p, metric) is not None, getattr(p, metric) or 0, p.procurer),
+                reverse=True
+            )
+            self._rankings[metric] = ranking
+        return ranking
+
+    def top_procurers(self, metric: str = 'total_value', k: int = 10, ascending: bool = False) -> List[Dict[str, Any]]:
+        """Return the top-K procurer profiles ranked by a metric"""
+        if metric not in PROFILE_METRICS:
+            raise ValueError(f"Unknown profile metric: {metric}")
+
+        with self._lock:
+            ranking = self._ranking(metric)
+            if ascending:
+                ranked = [p for p in reversed(ranking) if getattr(p, metric) is not None][:k]
+            else:
+                ranked = ranking[:k]
+            return [p.to_dict() for p in ranked]
+
+    def get_profile(self, procurer: str) -> Optional[Dict[str, Any]]:
+        """Return the profile for a single procurer"""
+        with self._lock:
+            profile = self._profiles.get(procurer)
+            return profile.to_dict() if profile else None
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+# Process-wide stores so every page sees the same in-memory profiles
+_stores: Dict[str, ProcurerProfileStore] = {}
+_stores_lock = threading.Lock()
+
+def get_profile_store(db_path: str = "procurement_data.db") -> ProcurerProfileStore:
+    """Return the shared profile store for a database"""
+    with _stores_lock:
+        if db_path not in _stores:
+            _stores[db_path] = ProcurerProfileStore(db_path)
+        return _stores[db_path]
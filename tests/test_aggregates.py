@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Aggregates Tests
+Tests aggregate planning and GROUP BY answers for analytical HangeGPT questions
+"""
+
+import json
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path to import modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy.orm import sessionmaker
+
+from agents.aggregates import detect_group_by, fold_groups, plan_aggregate
+from agents.database import create_read_engine
+from agents.response_cache import ResponseCache
+
+CATEGORIES = ["Construction & Infrastructure", "Technology & IT", "Security & Defense"]
+COUNTIES = {"Harjumaa": ["Tallinn"], "Tartumaa": ["Tartu"]}
+
+def test_grouping_questions_are_detected():
+    """Grouping wording selects a dimension; searches are left alone"""
+    assert detect_group_by("What are the most common procurement categories?") == "category"
+    assert detect_group_by("Who are the largest procurers?") == "procurer"
+    assert detect_group_by("Which county has the most IT procurements?") == "county"
+    assert detect_group_by("IT hanked maakondade lõikes") == "county"
+    assert detect_group_by("Monthly construction procurement values") == "month"
+    assert detect_group_by("What are the highest value procurements this month?") is None
+    assert detect_group_by("Show me all construction procurements in Tallinn") is None
+
+    intent = {"intent": "compare", "group_by": "category", "compare": ["Technology & IT", "Construction"]}
+    assert plan_aggregate(intent, "Compare construction vs IT procurement values") == {
+        "group_by": "category", "values": ["Construction", "Technology & IT"]}
+    assert plan_aggregate({"intent": "search", "filters": {}}, "Show me all procurements") is None
+
+def test_compare_wording_is_planned_without_group_by():
+    """"Compare X vs Y" groups by the dimension both names belong to, using the stored values"""
+    from agents.intent_parser import IntentParser
+
+    resolve = IntentParser(COUNTIES, CATEGORIES).resolve_value
+    assert detect_group_by("Compare construction vs IT procurement values", resolve) == "category"
+    assert detect_group_by("Compare construction vs IT procurement values") is None
+    assert plan_aggregate({"intent": "compare", "filters": {}}, "Compare construction vs IT procurement values",
+                          resolve) == {"group_by": "category", "values": ["Construction & Infrastructure",
+                                                                          "Technology & IT"]}
+    assert plan_aggregate({"intent": "compare", "filters": {}}, "Võrdle Harjumaad ja Tartumaad", resolve) == {
+        "group_by": "county", "values": ["Harjumaa", "Tartumaa"]}
+    # Names of different dimensions are not a comparison
+    assert detect_group_by("Compare Harjumaa and IT", resolve) is None
+
+def test_fold_groups_keeps_totals_exact():
+    """Groups beyond the limit are summed into one, and the total covers all of them"""
+    rows = [{"group": f"Procurer {i}", "count": i, "valued_count": i, "total_value": 1000.0 * i,
+             "average_value": 1000.0, "max_value": 1000.0} for i in range(1, 31)]
+    folded = fold_groups(rows, "procurer", max_groups=25)
+
+    assert [group["group"] for group in folded["groups"][:2]] == ["Procurer 30", "Procurer 29"]
+    assert folded["groups"][-1]["group"] == "5 other groups"
+    assert folded["groups"][-1]["count"] == 15
+    assert folded["total"]["count"] == 465
+    assert folded["total"]["average_value"] == 1000.0
+
+class IntentLLM:
+    """Returns a compare intent, then records the response prompt"""
+
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, messages):
+        self.prompts.append(messages[-1].content)
+        if len(self.prompts) == 1:
+            content = json.dumps({"intent": "compare", "data_source": "both",
+                                  "filters": {"category": "Technology & IT"}, "group_by": "category",
+                                  "compare": ["Construction", "IT"], "output_type": "table"})
+        else:
+            content = "Answer"
+        return type("Response", (), {"content": content})()
+
+def test_compare_question_is_answered_over_the_whole_table():
+    """Comparisons aggregate every row with GROUP BY instead of sampling 50"""
+    from agents.chat_agent import HangeGPTAgent
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = str(Path(tmp_dir) / "procurement_data.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("""CREATE TABLE procurements (id TEXT PRIMARY KEY, title TEXT, description TEXT,
+                        clean_description TEXT, link TEXT, published DATETIME, category TEXT,
+                        estimated_value FLOAT, procurer TEXT, county TEXT, created_at DATETIME)""")
+        conn.executemany(
+            "INSERT INTO procurements VALUES (?, ?, '', '', '', '2025-09-01 00:00:00', ?, ?, 'RIA', 'Harjumaa', NULL)",
+            [(str(i), f"Notice {i}", CATEGORIES[i % 3], 1000.0 if i % 3 == 0 else 10.0) for i in range(300)])
+        conn.commit()
+        conn.close()
+        engine = create_read_engine(db_path)
+
+        agent = HangeGPTAgent()
+        agent.llm = IntentLLM()
+        agent.sessions = sessionmaker(bind=engine)
+        agent.response_cache = ResponseCache()
+        try:
+            final_state = agent.graph.invoke(
+                agent._initial_state("Compare construction vs IT procurement values", None, None))
+        finally:
+            agent.close()
+            engine.dispose()
+
+    assert final_state["user_intent"]["data_source"] == "database"
+    groups = {group["group"]: group for group in final_state["query_results"]["aggregates"]["groups"]}
+    assert set(groups) == {"Construction & Infrastructure", "Technology & IT"}
+    assert groups["Construction & Infrastructure"]["count"] == 100
+    assert groups["Construction & Infrastructure"]["total_value"] == 100000.0
+    assert final_state["query_results"]["count"] == 200
+
+    prompt = agent.llm.prompts[-1]
+    assert "Construction & Infrastructure | 100 | 100 | €100,000 | €1,000 | €1,000" in prompt
+    assert "Total | 200 | 200 | €101,000" in prompt
+    assert "Notice" not in prompt
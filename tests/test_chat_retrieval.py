@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Chat Retrieval Tests
+Tests that HangeGPT runs the database and RSS branches concurrently, with per-branch timeouts
+and one RSS feed download shared between questions
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path to import modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents.chat_agent import merge_query_results
+from agents.response_cache import ResponseCache
+
+QUESTION = "Find the latest IT procurements in Harjumaa"
+
+class PromptRecordingLLM:
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, messages):
+        self.prompts.append(messages[-1].content)
+        return type("Response", (), {"content": "Answer"})()
+
+def slow_branch(seconds, query_results):
+    def run(state):
+        time.sleep(seconds)
+        return {"query_results": query_results}
+    return run
+
+def make_agent(monkeypatch, database_seconds, rss_seconds):
+    from agents.chat_agent import HangeGPTAgent
+
+    agent = HangeGPTAgent()
+    agent.llm = PromptRecordingLLM()
+    agent.response_cache = ResponseCache()
+    monkeypatch.setattr(agent, "get_data_version", lambda: None)
+    monkeypatch.setattr(agent, "query_database", slow_branch(database_seconds, {
+        "database": [{"title": "Riigipilve arendus", "estimated_value": 250000.0, "county": "Harjumaa"}],
+        "count": 1}))
+    monkeypatch.setattr(agent, "query_rss_cache", slow_branch(rss_seconds, {
+        "rss": [{"title": "Andmekeskuse teenus", "procurer": "RIT"}], "rss_count": 1}))
+    return agent
+
+def test_merge_query_results():
+    """Branch results are merged, and a step without results keeps the current ones"""
+    assert merge_query_results(None, {"database": [], "count": 0}) == {"database": [], "count": 0}
+    assert merge_query_results({"count": 1}, {"rss_count": 2}) == {"count": 1, "rss_count": 2}
+    assert merge_query_results({"count": 1}, None) == {"count": 1}
+
+def test_both_branches_run_concurrently(monkeypatch):
+    """A "both" question waits for the slower branch only, and the answer sees both sources"""
+    agent = make_agent(monkeypatch, 0.4, 0.4)
+    try:
+        started = time.perf_counter()
+        agent.chat(QUESTION)
+        elapsed = time.perf_counter() - started
+    finally:
+        agent.close()
+
+    assert elapsed < 0.7
+    assert len(agent.llm.prompts) == 1
+    assert "Riigipilve arendus" in agent.llm.prompts[0]
+    assert "Andmekeskuse teenus" in agent.llm.prompts[0]
+
+def test_slow_branch_times_out(monkeypatch):
+    """A branch slower than branch_timeout is reported as an error and does not hold up the answer"""
+    agent = make_agent(monkeypatch, 0.05, 2.0)
+    agent.branch_timeout = 0.3
+    try:
+        started = time.perf_counter()
+        final_state = agent.graph.invoke(agent._initial_state(QUESTION, None, None))
+        elapsed = time.perf_counter() - started
+    finally:
+        agent.close()
+
+    assert elapsed < 1.0
+    assert final_state["query_results"]["count"] == 1
+    assert final_state["query_results"]["rss_error"] == "Timed out after 0.3 seconds"
+    assert "Riigipilve arendus" in agent.llm.prompts[0]
+
+RSS_FEED = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>Riigihanked</title>
+<item><title>Andmekeskuse teenus</title><description>Serverite majutus</description>
+<link>https://riigihanked.riik.ee/1</link><pubDate>Wed, 17 Sep 2025 10:00:00 +0300</pubDate></item>
+</channel></rss>"""
+
+def test_rss_feed_is_shared_between_questions(monkeypatch):
+    """Concurrent and repeated questions reuse one feed download until rss_ttl has passed"""
+    import agents.chat_agent
+    from concurrent.futures import ThreadPoolExecutor
+    from agents.chat_agent import HangeGPTAgent
+
+    downloads = []
+
+    def fake_get(url, timeout=None):
+        downloads.append(url)
+        time.sleep(0.1)
+        return type("Response", (), {"content": RSS_FEED, "raise_for_status": lambda self: None})()
+
+    monkeypatch.setattr(agents.chat_agent.requests, "get", fake_get)
+    agent = HangeGPTAgent()
+    state = {"user_intent": {"filters": {}}}
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: agent.query_rss_cache(state)["query_results"], range(8)))
+        assert len(downloads) == 1
+        assert {r["rss_count"] for r in results} == {1}
+        assert results[0]["rss"][0]["title"] == "Andmekeskuse teenus"
+
+        agent.rss_ttl = 0
+        agent.query_rss_cache(state)
+        assert len(downloads) == 2
+    finally:
+        agent.close()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Chat Stream Tests
+Tests that HangeGPT streams graph progress and response tokens as they are produced
+"""
+
+import sys
+from itertools import cycle
+from pathlib import Path
+
+# Add parent directory to path to import modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from agents.response_cache import ResponseCache
+
+ANSWER = "There are no IT procurements in Harjumaa at the moment."
+
+def test_chat_stream_yields_progress_then_tokens(monkeypatch):
+    """Status events come before the answer, which arrives token by token and then once in full"""
+    from agents.chat_agent import HangeGPTAgent
+
+    agent = HangeGPTAgent()
+    agent.llm = GenericFakeChatModel(messages=cycle([AIMessage(content=ANSWER)]))
+    agent.response_cache = ResponseCache()
+    monkeypatch.setattr(agent, "get_data_version", lambda: "10:2025-09-01")
+    monkeypatch.setattr(agent, "query_rss_cache", lambda state: {"query_results": {"rss": [], "rss_count": 0}})
+
+    try:
+        events = list(agent.chat_stream("Find the latest IT procurements in Harjumaa"))
+        repeated = list(agent.chat_stream("Find the latest IT procurements in Harjumaa"))
+    finally:
+        agent.close()
+
+    types = [event["type"] for event in events]
+    assert types[:3] == ["status", "status", "status"]
+    assert "Harjumaa" in events[0]["message"]
+    assert types.count("token") > 1
+    assert types[-1] == "response"
+    assert "".join(event["content"] for event in events if event["type"] == "token") == ANSWER
+    assert events[-1] == {"type": "response", "content": ANSWER, "cached": False}
+
+    # The repeated question is answered from the cache without streaming
+    assert repeated == [{"type": "response", "content": ANSWER, "cached": True}]
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Conversation Memory Tests
+Tests the bounded HangeGPT conversation memory and its rolling summary
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents.conversation_memory import ConversationMemory
+from agents.result_compactor import estimate_tokens
+
+def answer(turn):
+    return f"Found {turn} IT procurements in Harjumaa. " + "The largest is a data centre framework. " * 20
+
+def test_context_stays_bounded_over_a_long_chat():
+    """Old turns fold into a summary within budget, and the context stops growing"""
+    memory = ConversationMemory(max_turns=4, summary_tokens=120)
+    sizes = []
+    for turn in range(40):
+        memory.add_turn(f"Question {turn} about IT procurements in Harjumaa", answer(turn))
+        sizes.append(memory.token_count)
+
+    assert len(memory) == 40
+    assert len(memory.turns) <= 4
+    assert estimate_tokens(memory.summary) <= 120
+    assert max(sizes) <= 120 + 4 * max(turn.tokens for turn in memory.turns)
+    assert memory.turns[-1].tokens == estimate_tokens("Question 39 about IT procurements in Harjumaa") + \
+        estimate_tokens(answer(39))
+
+    # Recent turns are verbatim, the newest folded turn survives in the summary
+    messages = memory.messages()
+    assert messages[0].type == "system" and "Question 37" not in messages[0].content
+    assert "Q: Question 35 about IT procurements in Harjumaa A: Found 35 IT procurements in Harjumaa." in \
+        messages[0].content
+    assert [message.content for message in messages[-2:]] == ["Question 39 about IT procurements in Harjumaa",
+                                                               answer(39)]
+
+def test_summarizer_runs_once_per_fold():
+    """The summarizer gets the previous summary and a batch of turns; failures fall back to extraction"""
+    calls = []
+
+    def summarize(summary, turns, token_budget):
+        calls.append((summary, [turn.question for turn in turns], token_budget))
+        if len(calls) == 2:
+            raise RuntimeError("rate limited")
+        return f"Summary {len(calls)}"
+
+    memory = ConversationMemory(max_turns=4, summary_tokens=100, summarize=summarize)
+    for turn in range(9):
+        memory.add_turn(f"Q{turn}", f"A{turn}.")
+
+    assert calls[0] == ("", ["Q0", "Q1", "Q2"], 100)
+    assert calls[1] == ("Summary 1", ["Q3", "Q4", "Q5"], 100)
+    assert memory.summary == "Summary 1\n- Q: Q3 A: A3.\n- Q: Q4 A: A4.\n- Q: Q5 A: A5."
+    assert [turn.question for turn in memory.turns] == ["Q6", "Q7", "Q8"]
+
+    memory.clear()
+    assert (memory.summary, memory.turns, len(memory)) == ("", [], 0)
+
+class ContextLLM:
+    """Records prompts and answers the response prompt"""
+
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, messages):
+        self.prompts.append(messages[-1].content)
+        return type("Response", (), {"content": "Answer"})()
+
+def test_agent_sends_memory_with_the_question(monkeypatch):
+    """The response prompt carries the summary and recent turns"""
+    from agents.chat_agent import HangeGPTAgent
+    from agents.response_cache import ResponseCache
+
+    agent = HangeGPTAgent()
+    agent.llm = ContextLLM()
+    agent.response_cache = ResponseCache()
+    monkeypatch.setattr(agent, "get_data_version", lambda: "10:2025-09-01")
+    monkeypatch.setattr(agent, "query_rss_cache", lambda state: {"query_results": {"rss": [], "rss_count": 0}})
+
+    memory = ConversationMemory(max_turns=2)
+    try:
+        agent.chat("Find IT procurements in Harjumaa")
+        for turn in range(3):
+            memory.add_turn(f"Earlier question {turn}", f"Earlier answer {turn}.")
+        # With earlier turns the same question is read by the LLM, not served from the cache
+        assert agent.chat("Find IT procurements in Harjumaa", memory) == "Answer"
+    finally:
+        agent.close()
+
+    assert len(agent.llm.prompts) == 3
+    assert "User: Earlier question 2\nHangeGPT: Earlier answer 2." in agent.llm.prompts[1]
+    prompt = agent.llm.prompts[-1]
+    assert "Summary of the earlier conversation:\n- Q: Earlier question 0 A: Earlier answer 0." in prompt
+    assert "User: Earlier question 2\nHangeGPT: Earlier answer 2." in prompt
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Document Cache Tests
+Tests the memory tier, batched access statistics and eviction of the document cache
+"""
+
+import json
+import sys
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory to path to import modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from enhanced_document_processor import DocumentCache
+
+def sample_result(i, padding=0):
+    return {
+        'document_type': 'docx',
+        'title': f'Dokument {i}',
+        'form_fields': [],
+        'requirements': ['x' * padding],
+        'confidence_score': 0.8,
+    }
+
+def read_rows(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return {h: count for h, count in conn.execute('SELECT content_hash, access_count FROM document_cache')}
+    finally:
+        conn.close()
+
+def test_hits_are_served_from_memory_and_counted_in_batches(tmp_path):
+    """Repeated hits return fresh copies and update access_count in batches"""
+    db_path = str(tmp_path / "cache.db")
+    cache = DocumentCache(db_path, stats_batch_size=10)
+    cache.cache_result("text", "docx", sample_result(1))
+    content_hash = cache.get_content_hash("text")
+
+    for _ in range(5):
+        result = cache.get_cached_result("text")
+        assert result['title'] == 'Dokument 1' and result['cache_hit'] is True
+        result['title'] = 'changed'
+
+    # Buffered hits are not written until a batch fills up or the cache closes
+    assert read_rows(db_path)[content_hash] == 1
+    cache.close()
+    assert read_rows(db_path)[content_hash] == 6
+
+    # A new instance reads through to SQLite
+    reopened = DocumentCache(db_path)
+    assert reopened.get_cached_result("text")['title'] == 'Dokument 1'
+    assert reopened.get_cached_result("missing") is None
+    reopened.close()
+
+def test_unused_caches_are_garbage_collected(tmp_path):
+    """Caches are not pinned until exit, and open ones are still flushed by the exit handler"""
+    import gc
+    import weakref
+    from enhanced_document_processor import _close_open_caches
+
+    unused = weakref.ref(DocumentCache(str(tmp_path / "unused.db")))
+    gc.collect()
+    assert unused() is None
+
+    db_path = str(tmp_path / "cache.db")
+    cache = DocumentCache(db_path, stats_batch_size=10)
+    cache.cache_result("text", "docx", sample_result(1))
+    cache.get_cached_result("text")
+    _close_open_caches()
+    assert read_rows(db_path)[cache.get_content_hash("text")] == 2
+
+def test_eviction_keeps_most_recently_used_entries(tmp_path):
+    """Entries over the count budget are evicted least recently used first"""
+    db_path = str(tmp_path / "cache.db")
+    cache = DocumentCache(db_path, memory_size=2, max_entries=3, stats_batch_size=1000)
+    for i in range(5):
+        cache.cache_result(f"doc {i}", "docx", sample_result(i))
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE document_cache SET last_accessed = datetime('now', '-1 hour')")
+    conn.commit()
+    conn.close()
+    cache.get_cached_result("doc 0")
+    cache.get_cached_result("doc 1")
+
+    assert cache.evict() == 2
+    remaining = set(read_rows(db_path))
+    assert cache.get_content_hash("doc 0") in remaining
+    assert cache.get_content_hash("doc 1") in remaining
+    assert len(remaining) == 3
+    cache.close()
+
+def test_eviction_by_size_and_age(tmp_path):
+    """Old entries and entries beyond the byte budget are removed"""
+    db_path = str(tmp_path / "cache.db")
+    cache = DocumentCache(db_path, max_bytes=5000, max_age_days=30)
+    for i in range(4):
+        cache.cache_result(f"doc {i}", "docx", sample_result(i, padding=2000))
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE document_cache SET created_at = datetime('now', '-60 days') WHERE content_hash = ?",
+                 (cache.get_content_hash("doc 3"),))
+    conn.commit()
+    conn.close()
+
+    assert cache.evict() == 2
+    assert len(read_rows(db_path)) == 2
+    assert cache.get_cached_result("doc 3") is None
+    cache.close()
+
+def test_keys_are_namespaced_by_model_and_prompt(tmp_path):
+    """Results cached under another model or prompt version are not returned"""
+    db_path = str(tmp_path / "cache.db")
+    old = DocumentCache(db_path, namespace="gpt-4.1-mini:old-prompt")
+    old.cache_result("text", "docx", sample_result(1))
+    old.close()
+
+    current = DocumentCache(db_path, namespace="gpt-4.1-mini:new-prompt")
+    assert current.get_cached_result("text") is None
+    current.close()
+
+def test_reupload_skips_text_extraction(tmp_path, monkeypatch):
+    """A second upload of the same file is served from the raw file hash"""
+    from enhanced_document_processor import EnhancedDocumentProcessor
+
+    processor = EnhancedDocumentProcessor()
+    processor.cache = DocumentCache(str(tmp_path / "cache.db"))
+    monkeypatch.setattr(processor, "extract_fields_with_fallback", processor._extract_with_rules)
+
+    upload = tmp_path / "hange.txt"
+    upload.write_text("Ettevõtte nimi: ____\nE-post: ____\nNÕUDED: kehtiv registreering", encoding="utf-8")
+    first = processor.process_document(str(upload))
+    assert first.cache_hit is False
+
+    def fail(*args):
+        raise AssertionError("text was extracted again")
+    monkeypatch.setattr(processor, "preprocess_text", fail)
+
+    second = processor.process_document(str(upload))
+    assert second.cache_hit is True
+    assert [f.field_name for f in second.form_fields] == [f.field_name for f in first.form_fields]
+    processor.cache.close()
+
+def test_batch_processing_runs_documents_concurrently(tmp_path, monkeypatch):
+    """A batch takes about as long as its slowest document and reports cache levels"""
+    from enhanced_document_processor import EnhancedDocumentProcessor
+
+    processor = EnhancedDocumentProcessor()
+    processor.cache = DocumentCache(str(tmp_path / "cache.db"))
+
+    def slow_extraction(content, document_type):
+        time.sleep(0.5)
+        return processor._extract_with_rules(content, document_type)
+    monkeypatch.setattr(processor, "extract_fields_with_fallback", slow_extraction)
+
+    paths = []
+    for i in range(4):
+        path = tmp_path / f"lisa_{i}.txt"
+        path.write_text(f"Lisa {i}\nEttevõtte nimi: ____\nE-post: ____", encoding="utf-8")
+        paths.append(str(path))
+    # Same text as the first attachment, differing only in whitespace
+    copy = tmp_path / "lisa_0_koopia.txt"
+    copy.write_text((tmp_path / "lisa_0.txt").read_text(encoding="utf-8") + "\n\n", encoding="utf-8")
+    processor.process_document(paths[0])
+
+    started = time.perf_counter()
+    results = list(processor.process_documents(paths + [str(copy), str(tmp_path / "missing.txt")],
+                                               llm_workers=4))
+    elapsed = time.perf_counter() - started
+
+    by_name = {Path(r.file_path).name: r for r in results}
+    assert len(results) == 6
+    assert by_name["lisa_0.txt"].cache_level == "file"
+    assert by_name["lisa_0_koopia.txt"].cache_level == "content"
+    assert by_name["missing.txt"].error
+    for name in ("lisa_1.txt", "lisa_2.txt", "lisa_3.txt"):
+        assert by_name[name].cache_hit is False
+        assert by_name[name].analysis.form_fields
+        assert {"text_extraction", "llm_extraction", "total"} <= set(by_name[name].timings)
+    assert elapsed < 1.2
+    processor.cache.close()
+
+class CountingCompletions:
+    """OpenAI stand-in recording how many requests are in flight at once"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = self.peak = self.calls = 0
+
+    def create(self, **kwargs):
+        with self.lock:
+            self.active += 1
+            self.calls += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.05)
+        with self.lock:
+            self.active -= 1
+        content = json.dumps({"title": "Hange", "form_fields": [], "requirements": ["Nõue"],
+                              "sections": [], "key_information": {}})
+        message = type("Message", (), {"content": content})()
+        return type("Response", (), {"choices": [type("Choice", (), {"message": message})()]})()
+
+def test_batch_bounds_openai_requests_and_extracts_duplicates_once(tmp_path, monkeypatch):
+    """Chunk requests share llm_workers slots, and a file repeated in a batch is extracted once"""
+    import enhanced_document_processor
+    from document_chunking import split_into_chunks
+    from enhanced_document_processor import EXTRACTION_CONTENT_LIMIT, EnhancedDocumentProcessor
+
+    completions = CountingCompletions()
+    monkeypatch.setattr(enhanced_document_processor, "client",
+                        type("Client", (), {"chat": type("Chat", (), {"completions": completions})()})())
+    processor = EnhancedDocumentProcessor()
+    processor.cache = DocumentCache(str(tmp_path / "cache.db"))
+
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"hange_{i}.txt"
+        # Three chunks of free text per document, so none is answered by the rules
+        sections = [f"{n}. Osa {i}-{n}\n" + f"Hankija kirjeldus {i} {n}. " * (EXTRACTION_CONTENT_LIMIT // 30)
+                    for n in range(1, 4)]
+        path.write_text("\n\n".join(sections), encoding="utf-8")
+        paths.append(str(path))
+
+    results = list(processor.process_documents(paths + [paths[0]], llm_workers=2, use_processes=False))
+    processor.cache.close()
+
+    assert len(results) == 4 and not any(r.error for r in results)
+    assert completions.peak <= 2
+    # Each distinct document is sent once, however often it appears in the batch
+    chunks = [split_into_chunks(processor.preprocess_text(Path(path).read_text(encoding="utf-8")),
+                                EXTRACTION_CONTENT_LIMIT) for path in paths]
+    assert all(len(document) > 1 for document in chunks)
+    assert completions.calls == sum(len(document) for document in chunks)
+    repeated = [r for r in results if r.file_path == paths[0]]
+    assert [r.cache_level for r in repeated].count("file") == 1
+    assert repeated[0].analysis.title == repeated[1].analysis.title
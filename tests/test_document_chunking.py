@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Document Chunking Tests
+Tests splitting long documents into chunks and merging per-chunk extractions
+"""
+
+import sys
+import zlib
+from pathlib import Path
+
+# Add parent directory to path to import modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from document_chunking import split_into_chunks, merge_extractions
+
+def sample_document(sections=30):
+    parts = ["HANKEDOKUMENDID\nRiigihange: Koolimööbli ostmine\n"]
+    for i in range(1, sections + 1):
+        parts.append(f"{i}. Osa {i} tingimused\n" + "Pakkuja peab esitama kinnituse. " * 20 + "\n")
+        parts.append("Toode | Kogus | Hind\n" + "".join(f"Laud {j} | {j} | ____\n" for j in range(5)))
+    return "".join(parts)
+
+def test_chunks_cover_the_document_and_respect_the_limit():
+    """Chunks reassemble the original text and break at section starts"""
+    text = sample_document()
+    chunks = split_into_chunks(text, 2000)
+
+    assert len(chunks) > 1
+    assert "".join(chunks) == text
+    assert all(len(chunk) <= 2000 for chunk in chunks)
+    # Sections fit the limit, so every chunk starts with a heading or a table
+    assert all(chunk.startswith(("HANKEDOKUMENDID", "Toode | ")) or chunk.split(".")[0].isdigit()
+               for chunk in chunks)
+
+def test_whitespace_collapsed_text_splits_on_markers():
+    """Preprocessed single-line text still splits at headings and oversized sections"""
+    text = " ".join(f"SHEET: Leht {i} HEADERS: Nimi | Kogus DATA SAMPLE: " + "rida " * 150
+                    for i in range(6))
+    chunks = split_into_chunks(text, 1000)
+
+    assert "".join(chunks) == text
+    assert all(len(chunk) <= 1000 for chunk in chunks)
+    # Boundaries fall between words, at a marker where possible
+    assert all(chunk.endswith(" ") for chunk in chunks[:-1])
+    assert all(chunk.startswith(("SHEET:", "HEADERS:", "DATA SAMPLE:", "rida")) for chunk in chunks)
+    assert split_into_chunks("lühike", 1000) == ["lühike"]
+
+def test_merge_deduplicates_and_reconciles_confidence():
+    """Fields are merged by name with noisy-or confidence; other parts dedupe in order"""
+    results = [
+        {
+            "document_type": "hankedokument", "title": "Koolimööbel",
+            "form_fields": [{"field_name": "company_name", "label": "Ettevõtte nimi", "required": False,
+                             "confidence_score": 0.6, "options": None, "validation": None}],
+            "requirements": ["Kehtiv registreering"],
+            "sections": [{"section_title": "Pakkuja andmed", "fields": ["company_name"]}],
+            "key_information": {"deadline": None, "contact_person": "Mari Maasikas"},
+        },
+        None,
+        {
+            "title": "Untitled",
+            "form_fields": [
+                {"field_name": "Company_Name ", "label": "Nimi", "required": True,
+                 "confidence_score": 0.5, "validation": "min_length:2"},
+                {"field_name": "delivery_time", "field_type": "dropdown", "options": ["30", "60"],
+                 "confidence_score": 0.9},
+            ],
+            "requirements": ["kehtiv  registreering", "ISO 9001 sertifikaat"],
+            "sections": [{"section_title": "pakkuja andmed", "fields": ["delivery_time"]}],
+            "key_information": {"deadline": "2025-10-01", "contact_person": "Jüri"},
+        },
+    ]
+
+    merged = merge_extractions(results)
+
+    assert merged["title"] == "Koolimööbel"
+    assert [f["field_name"] for f in merged["form_fields"]] == ["company_name", "delivery_time"]
+    company = merged["form_fields"][0]
+    assert company["confidence_score"] == 0.8
+    assert company["required"] is True
+    assert company["label"] == "Ettevõtte nimi"
+    assert company["validation"] == "min_length:2"
+    assert merged["requirements"] == ["Kehtiv registreering", "ISO 9001 sertifikaat"]
+    assert merged["sections"] == [{"section_title": "Pakkuja andmed", "fields": ["company_name", "delivery_time"]}]
+    assert merged["key_information"] == {"deadline": "2025-10-01", "contact_person": "Mari Maasikas"}
+
+def test_processor_extracts_long_documents_chunk_by_chunk(monkeypatch):
+    """Every chunk of a long document is extracted, concurrently, and merged"""
+    import time
+    from enhanced_document_processor import EnhancedDocumentProcessor, EXTRACTION_CONTENT_LIMIT
+
+    processor = EnhancedDocumentProcessor()
+
+    def fake_extraction(content, document_type):
+        time.sleep(0.3)
+        names = sorted(set(word for word in content.split() if word.startswith("lisa_")))
+        return {"title": "Hange", "form_fields": [{"field_name": name, "confidence_score": 0.7} for name in names]}
+    monkeypatch.setattr(processor, "_extract_chunk_with_openai", fake_extraction)
+
+    text = " ".join(f"SHEET: lisa_{i} " + "sisu " * 1000 for i in range(8))
+    assert len(text) > 3 * EXTRACTION_CONTENT_LIMIT
+
+    started = time.perf_counter()
+    result = processor._extract_with_openai(text, "xlsx")
+    elapsed = time.perf_counter() - started
+
+    assert [f["field_name"] for f in result["form_fields"]] == [f"lisa_{i}" for i in range(8)]
+    assert elapsed < 0.3 * len(split_into_chunks(text, EXTRACTION_CONTENT_LIMIT)) / 2
+
+def test_amended_document_only_reextracts_changed_chunks(tmp_path, monkeypatch):
+    """An amendment to one section re-sends only the chunks around it"""
+    from enhanced_document_processor import EnhancedDocumentProcessor, DocumentCache, EXTRACTION_CONTENT_LIMIT
+
+    processor = EnhancedDocumentProcessor()
+    processor.cache = DocumentCache(str(tmp_path / "cache.db"))
+    extracted = []
+
+    def fake_extraction(content, document_type):
+        extracted.append(content)
+        return {"form_fields": [{"field_name": f"field_{zlib.crc32(content.encode())}", "confidence_score": 0.8}]}
+    monkeypatch.setattr(processor, "_extract_chunk_with_openai", fake_extraction)
+
+    sections = [f"{i}. Osa {i} tingimused\n" + f"Pakkuja esitab dokumendi {i}. " * (30 + i % 50) + "\n"
+                for i in range(1, 100)]
+    original = "".join(sections)
+    processor._extract_with_openai(original, "docx")
+    original_chunks = len(extracted)
+    assert original_chunks == len(split_into_chunks(original, EXTRACTION_CONTENT_LIMIT)) > 5
+
+    sections[40] = sections[40].replace("esitab", "esitab allkirjastatud", 1)
+    extracted.clear()
+    amended = processor._extract_with_openai("".join(sections), "docx")
+
+    assert 1 <= len(extracted) <= 2
+    assert any("allkirjastatud" in chunk for chunk in extracted)
+    assert len(amended["form_fields"]) >= original_chunks - 2
+    processor.cache.close()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Rule-based Extraction Tests
+Tests the compiled single-pass scanner, form template parsing and rule-first extraction
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path to import modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from field_rules import extract_fields, extract_with_coverage, scan
+from text_normalizer import normalize_document_text
+
+TEST_DATA = Path(__file__).parent.parent / "test-data"
+
+def read_sample(name):
+    return normalize_document_text((TEST_DATA / name).read_text(encoding="utf-8"))
+
+SAMPLE_FORM = normalize_document_text("""HANKE TEAVE
+Pakkumuste esitamise tähtaeg: 15.10.2025 kell 10:00
+Kontaktisik: Mari Maasikas, tel. +372 5123 4567, e-post hange@riik.ee
+
+PAKKUJA ANDMED
+Ettevõtte nimi: ____________
+Registrikood: ____________
+KMKR number: ____________
+
+KVALIFITSEERIMISTINGIMUSED:
+- kehtiv registreering äriregistris;
+- ISO 9001 sertifikaat;
+- vähemalt 3 sarnast lepingut viimase 36 kuu jooksul
+TEHNILISED NÕUDED: Mööbel peab vastama standardile EVS-EN 1729. Tarne toimub hotelli.
+Allkiri: ________ Kuupäev: ________
+""")
+
+def test_fields_carry_offsets_and_source_snippets():
+    """Each field is reported once with where it was found"""
+    result = extract_fields(SAMPLE_FORM, "docx")
+    fields = {f["field_name"]: f for f in result["form_fields"]}
+
+    assert list(fields) == ["contact_person", "phone", "email", "company_name", "registration_number",
+                            "vat_number", "signature", "date"]
+    company = fields["company_name"]
+    assert SAMPLE_FORM[company["source_offset"]:].startswith("Ettevõtte nimi")
+    assert company["source_text"].startswith("Ettevõtte nimi: ____")
+    assert len(company["source_text"]) <= 80
+    assert fields["phone"]["field_type"] == "tel"
+    assert fields["registration_number"]["validation"] == "pattern:^[0-9]{8}$"
+
+def test_requirements_and_key_information():
+    """Requirement lists are split into items; dated deadlines and named contacts are key information"""
+    result = extract_fields(SAMPLE_FORM, "docx")
+
+    assert result["requirements"] == [
+        "kehtiv registreering äriregistris",
+        "ISO 9001 sertifikaat",
+        "vähemalt 3 sarnast lepingut viimase 36 kuu jooksul",
+        "Mööbel peab vastama standardile EVS-EN 1729",
+    ]
+    assert result["key_information"] == {"deadline": "15.10.2025 kell 10:00", "contact_person": "Mari Maasikas"}
+
+def test_labels_match_whole_words_only():
+    """Labels inside longer words are not fields"""
+    assert scan("Hotelli teletöö ja amet ning nõuetele vastav pakkumus") == []
+
+def test_scan_is_fast_enough_for_every_document():
+    """A megabyte of text is scanned well within an LLM round-trip"""
+    text = SAMPLE_FORM * (1024 * 1024 // len(SAMPLE_FORM))
+    started = time.perf_counter()
+    matches = scan(text)
+    elapsed = time.perf_counter() - started
+
+    assert len(matches) > 1000
+    assert elapsed < 2.0
+
+def test_placeholder_template_is_parsed_completely():
+    """Placeholders, checkbox groups and numbered headings become typed fields and sections"""
+    extraction = extract_with_coverage(read_sample("sample_it_procurement.txt"), "docx")
+    result = extraction.result
+    fields = {f["field_name"]: f for f in result["form_fields"]}
+
+    assert extraction.uncovered_inputs == 0
+    assert extraction.template_fields == len(fields) == 19
+    assert result["title"] == "RIIGIHANGE - IT TEENUSTE OSUTAMINE"
+    assert [s["section_title"] for s in result["sections"]] == [
+        "ÜLDANDMED", "KONTAKTANDMED", "PROJEKTI KIRJELDUS", "FINANTSINFORMATSIOON", "KVALITEET JA VASTAVUS", "KOGEMUS"]
+
+    assert fields["email"]["label"] == "E-posti aadress"
+    assert fields["projekti_kirjeldus"]["field_type"] == "textarea"
+    assert fields["projekti_kirjeldus"]["validation"] == "min_length:500"
+    assert fields["projekti_kestus"]["field_type"] == "number"
+    assert fields["total_price"]["label"] == "Kogumaksumus"
+    assert fields["maksegraafik"]["field_type"] == "dropdown"
+    assert fields["maksegraafik"]["options"] == ["Kuine", "Kvartaalne", "Etapipõhine"]
+    assert fields["eesti_keele_tugi"]["field_type"] == "checkbox"
+    assert len(result["requirements"]) == 5
+
+def test_spreadsheet_headers_become_fields():
+    """HEADERS columns are fields with their cell validations and formulas"""
+    extraction = extract_with_coverage(read_sample("sample_pricing_form.txt"), "xlsx")
+    fields = {f["field_name"]: f for f in extraction.result["form_fields"]}
+
+    assert list(fields) == ["kirjeldus", "uhik", "kogus", "uhiku_hind_eur", "kokku_eur"]
+    assert fields["kogus"]["field_type"] == "number"
+    assert fields["uhiku_hind_eur"]["validation"] == "formula:>0"
+    assert fields["kokku_eur"]["description"] == "Calculated as =C2*D2"
+    assert fields["kokku_eur"]["required"] is False
+    assert extraction.result["sections"] == [{"section_title": "Hinnapakkumise vorm", "fields": list(fields),
+                                              "description": ""}]
+
+def test_unlabeled_blanks_are_reported_as_uncovered():
+    """A blank without a label is left for the LLM"""
+    extraction = extract_with_coverage("Nimi: ____ Palun kirjutage siia oma ettepanek ____", "docx")
+
+    assert [f["field_name"] for f in extraction.result["form_fields"]] == ["nimi"]
+    assert extraction.uncovered_inputs == 1
+
+def test_rule_first_extraction_skips_openai_for_templates(tmp_path, monkeypatch):
+    """Templates the rules parse completely never reach OpenAI; other documents still do"""
+    from enhanced_document_processor import DocumentCache, EnhancedDocumentProcessor
+
+    processor = EnhancedDocumentProcessor()
+    processor.cache = DocumentCache(str(tmp_path / "cache.db"))
+    calls = []
+
+    def fake_openai(content, document_type):
+        calls.append(document_type)
+        return {"document_type": document_type, "title": "LLM", "form_fields": [], "requirements": [],
+                "sections": [], "key_information": {}}
+    monkeypatch.setattr(processor, "_extract_with_openai", fake_openai)
+
+    for name, document_type in [("sample_it_procurement.txt", "docx"), ("sample_pricing_form.txt", "xlsx")]:
+        result = processor.extract_fields_with_fallback(read_sample(name), document_type)
+        assert result["form_fields"]
+    assert calls == []
+
+    # Keyword hits in free text are not a template
+    processor.extract_fields_with_fallback(
+        "Pakkuja esitab e-posti teel hinnapakkumise koos ettevõtte registrikoodiga.", "pdf")
+    # Nor is a template with a blank the rules cannot attribute
+    processor.extract_fields_with_fallback("Nimi: ____ Palun kirjutage siia oma ettepanek ____", "docx")
+    assert calls == ["pdf", "docx"]
+    processor.cache.close()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Intent Parser Tests
+Tests the deterministic fast path that resolves chat filters without the LLM
+"""
+
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path to import modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents.intent_parser import IntentParser
+
+COUNTIES = {
+    'Harjumaa': ['Tallinn', 'Keila', 'Saue'],
+    'Tartumaa': ['Tartu', 'Elva'],
+    'Ida-Virumaa': ['Narva', 'Jõhvi'],
+    'Raplamaa': ['Rapla', 'Kohila'],
+}
+CATEGORIES = ["Technology & IT", "Healthcare & Medical", "Construction & Infrastructure", "Professional Services",
+              "Energy & Environment", "Maintenance & Cleaning"]
+NOW = datetime(2025, 9, 17)
+
+def parse(message):
+    return IntentParser(COUNTIES, CATEGORIES).parse(message, now=NOW)
+
+def test_formulaic_english_query_is_resolved():
+    """Category, county, value and period are all read from the question"""
+    assert parse("IT procurements in Harjumaa over €100,000 this month") == {
+        "intent": "search",
+        "data_source": "database",
+        "filters": {"category": "Technology & IT", "county": "Harjumaa", "value_min": 100000.0,
+                    "published_from": "2025-09-01 00:00:00"},
+        "output_type": "list",
+    }
+
+def test_estonian_inflections_are_resolved():
+    """Estonian case endings, keyword stems and number formats are understood"""
+    assert parse("Näita ehitushankeid Tartus viimase 7 päeva jooksul")["filters"] == {
+        "category": "Construction & Infrastructure", "city": "Tartu", "days_back": 7}
+    assert parse("hanked vahemikus 50 000 kuni 200 000 eurot Ida-Virumaal")["filters"] == {
+        "county": "Ida-Virumaa", "value_min": 50000.0, "value_max": 200000.0}
+    assert parse("koristusteenused alla 20 tuh € Rapla maakonnas")["filters"] == {
+        "category": "Maintenance & Cleaning", "county": "Raplamaa", "value_max": 20000.0}
+
+def test_calendar_periods_start_at_midnight_on_their_first_day():
+    """"This week" and "this month" reach back to Monday and the 1st, not a day further"""
+    # Wednesday afternoon
+    now = datetime(2025, 9, 17, 15, 30)
+    period = lambda message: IntentParser(COUNTIES, CATEGORIES).parse(message, now=now)["filters"]
+    assert period("IT procurements this month")["published_from"] == "2025-09-01 00:00:00"
+    assert period("IT procurements this week")["published_from"] == "2025-09-15 00:00:00"
+    assert period("IT procurements today")["published_from"] == "2025-09-17 00:00:00"
+    assert period("IT hanked eile")["published_from"] == "2025-09-16 00:00:00"
+    assert period("IT procurements this year")["published_from"] == "2025-01-01 00:00:00"
+    assert period("IT procurements in the last 7 days")["days_back"] == 7
+
+def test_intent_and_output_words():
+    """Summaries, rankings and output formats set intent and output type"""
+    summary = parse("summary of medical tenders in the last 2 weeks")
+    assert (summary["intent"], summary["output_type"], summary["filters"]["days_back"]) == ("summarize", "summary", 14)
+    assert parse("What are the highest value procurements this month?")["intent"] == "analyze"
+    assert parse("IT services between 50k and 1.5m as a table") is None
+    assert parse("IT services between 50k and 1.5m table")["output_type"] == "table"
+
+def test_unresolved_queries_are_left_to_the_llm():
+    """Unknown words, conflicting filters and questions without filters go to the LLM"""
+    assert parse("Compare construction vs IT procurement values") is None
+    assert parse("Show me recent procurements from universities") is None
+    assert parse("What are the most common procurement categories?") is None
+    assert parse("Tallinn or Tartu procurements") is None
+    assert parse("Show me all procurements") is None
+    # "it" the pronoun is not the IT category
+    assert parse("is it in Tallinn?") is None
+    assert parse("Show it in Tallinn") is None
+    assert parse("IT-hanked Harjumaal")["filters"] == {"category": "Technology & IT", "county": "Harjumaa"}
+
+def test_only_recency_questions_use_the_rss_feed():
+    """Resolved queries route to the database branch alone unless they ask for the newest notices"""
+    from agents.chat_agent import HangeGPTAgent
+
+    agent = HangeGPTAgent()
+    try:
+        route = lambda message: agent.route_query({"user_intent": parse(message)})
+        assert route("IT procurements in Tallinn over 50k") == "database"
+        assert route("ehitushanked Tartumaal viimase 7 päeva jooksul") == "database"
+        assert route("latest IT procurements in Tallinn") == ["database", "rss"]
+        assert route("tänased ehitushanked Tartumaal") == ["database", "rss"]
+    finally:
+        agent.close()
+
+class FailingLLM:
+    def invoke(self, messages):
+        raise AssertionError("The LLM should not be called")
+
+def test_agent_skips_llm_for_resolved_intent():
+    """analyze_intent answers formulaic questions without an LLM round-trip"""
+    from langchain_core.messages import HumanMessage
+    from agents.chat_agent import HangeGPTAgent
+
+    agent = HangeGPTAgent()
+    agent.llm = FailingLLM()
+    try:
+        state = agent.analyze_intent({"messages": [HumanMessage(content="Find IT procurements in Harjumaa")],
+                                      "query_results": None, "user_intent": None})
+    finally:
+        agent.close()
+
+    assert state["user_intent"]["filters"] == {"category": "Technology & IT", "county": "Harjumaa"}
+
+class IntentLLM:
+    def __init__(self, intent):
+        self.intent = intent
+        self.prompts = []
+
+    def invoke(self, messages):
+        self.prompts.append(messages[-1].content)
+        return type("Response", (), {"content": json.dumps(self.intent)})()
+
+def test_follow_up_questions_go_to_the_llm():
+    """A follow-up is read with the earlier turns by the LLM, and its answer is kept out of the cache"""
+    from langchain_core.messages import HumanMessage, AIMessage
+    from agents.chat_agent import HangeGPTAgent
+
+    follow_up = {"intent": "search", "data_source": "database", "output_type": "list",
+                 "filters": {"category": "Technology & IT", "city": "Tartu"}}
+    agent = HangeGPTAgent()
+    agent.llm = IntentLLM(follow_up)
+    try:
+        state = agent.analyze_intent({
+            "messages": [HumanMessage(content="Find IT procurements in Harjumaa"),
+                         AIMessage(content="There are 3 IT procurements in Harjumaa."),
+                         HumanMessage(content="and in Tartu?")],
+            "query_results": None, "user_intent": None, "data_version": "3:2025-09-01"})
+    finally:
+        agent.close()
+
+    assert state["user_intent"]["filters"] == follow_up["filters"]
+    assert "Find IT procurements in Harjumaa" in agent.llm.prompts[0]
+    assert state["data_version"] is None
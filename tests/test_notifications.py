@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Email Notification Tests
+Tests subscription matching, digest queueing and SMTP delivery for the notification engine
+"""
+
+import sys
+import random
+import socket
+import smtplib
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path to import modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from notifications.matcher import KeywordAutomaton, Subscription, SubscriptionMatcher, load_active_subscriptions
+from notifications.outbox import NotificationOutbox, SMTPConfig, SMTPDeliverer, LoggingDeliverer
+from notifications.engine import init_email_database, run_notification_check
+from notifications.runner import main as runner_main
+
+SAMPLE_FEED = str(Path(__file__).parent.parent / "data" / "sample.rss")
+
+SECTORS = ["Technology & IT", "Healthcare & Medical", "Construction & Infrastructure", "Transportation"]
+KEYWORDS = ["tarkvara", "arendus", "software", "ehitus", "remont", "buss", "ai", "server"]
+
+def naive_match(subscriptions, category, estimated_value, text):
+    """Reference implementation of the original per-subscription loop"""
+    text = text.lower()
+    matches = []
+    for sub in subscriptions:
+        if category not in sub.sectors:
+            continue
+        if estimated_value < sub.min_value or estimated_value > sub.max_value:
+            continue
+        if sub.keywords and not any(keyword in text for keyword in sub.keywords):
+            continue
+        matches.append(sub.id)
+    return matches
+
+def test_keyword_automaton_finds_overlapping_keywords():
+    """The automaton reports every keyword, including overlapping ones"""
+    automaton = KeywordAutomaton(["he", "she", "his", "hers", "tarkvara", "ar"])
+    assert automaton.find("ushers tarkvara") == {"she", "he", "hers", "tarkvara", "ar"}
+    assert automaton.find("nothing here") == {"he"}
+    assert KeywordAutomaton([]).find("any text") == set()
+
+def test_matcher_agrees_with_per_subscription_loop():
+    """Compiled matching gives the same result as checking each subscription"""
+    rng = random.Random(42)
+    subscriptions = []
+    for i in range(500):
+        min_value = rng.choice([0, 10000, 50000])
+        subscriptions.append(Subscription(
+            id=i,
+            email=f"user{i}@example.ee",
+            sectors=rng.sample(SECTORS, rng.randint(1, 2)),
+            keywords=rng.sample(KEYWORDS, rng.randint(0, 3)),
+            min_value=min_value,
+            max_value=rng.choice([100000, 1000000, 10000000])
+        ))
+    matcher = SubscriptionMatcher(subscriptions)
+
+    for _ in range(200):
+        category = rng.choice(SECTORS + ["Other"])
+        value = rng.choice([0, 5000, 20000, 100000, 500000, 2000000])
+        text = " ".join(rng.sample(KEYWORDS + ["hange", "teenus", "Tallinn"], 3)).upper()
+        expected = naive_match(subscriptions, category, value, text)
+        assert sorted(s.id for s in matcher.match(category, value, text)) == expected
+
+def create_email_database():
+    """In-memory copy of the email notification schema"""
+    conn = sqlite3.connect(":memory:")
+    conn.executescript('''
+        CREATE TABLE email_subscriptions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT UNIQUE NOT NULL,
+            sectors TEXT NOT NULL,
+            keywords TEXT,
+            min_value INTEGER DEFAULT 0,
+            max_value INTEGER DEFAULT 10000000,
+            active BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_notification TIMESTAMP,
+            notification_frequency TEXT DEFAULT 'daily'
+        );
+        CREATE TABLE notification_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            subscription_id INTEGER,
+            procurement_id TEXT,
+            procurement_title TEXT,
+            sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            email_status TEXT DEFAULT 'sent',
+            delivery_attempts INTEGER DEFAULT 0
+        );
+        CREATE TABLE procurement_matches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            procurement_id TEXT UNIQUE,
+            title TEXT,
+            description TEXT,
+            category TEXT,
+            estimated_value INTEGER,
+            deadline DATE,
+            procurer TEXT,
+            url TEXT,
+            processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    ''')
+    return conn
+
+def test_load_active_subscriptions_parses_filters():
+    """Active subscriptions are loaded once with their filters pre-split"""
+    conn = create_email_database()
+    conn.executemany('INSERT INTO email_subscriptions (email, sectors, keywords, active) VALUES (?, ?, ?, ?)', [
+        ("a@example.ee", "Technology & IT, Transportation", "Software, AI", 1),
+        ("b@example.ee", "Technology & IT", "software,", 1),
+        ("c@example.ee", "Technology & IT", None, 0),
+    ])
+
+    subscriptions = load_active_subscriptions(conn)
+    assert [s.email for s in subscriptions] == ["a@example.ee", "b@example.ee"]
+    assert subscriptions[0].sectors == ["Technology & IT", "Transportation"]
+    assert subscriptions[0].keywords == ["software", "ai"]
+    # A trailing comma leaves an empty keyword, which matches everything
+    assert subscriptions[1].keywords == []
+
+def queue_sample_matches(conn):
+    """Two subscriptions, one already notified today, each with queued matches"""
+    yesterday = (datetime.now() - timedelta(days=2)).isoformat(sep=' ')
+    today = datetime.now().isoformat(sep=' ')
+    conn.executemany('''
+        INSERT INTO email_subscriptions (email, sectors, last_notification, notification_frequency)
+        VALUES (?, 'Technology & IT', ?, ?)
+    ''', [("due@example.ee", yesterday, "daily"), ("waiting@example.ee", today, "weekly")])
+    conn.executemany('''
+        INSERT INTO procurement_matches (procurement_id, title, category, estimated_value, procurer, url)
+        VALUES (?, ?, 'Technology & IT', 50000, 'RIA', ?)
+    ''', [(str(i), f"Hange {i}", f"https://riigihanked.riik.ee/rhr-web/#/procurement/{i}") for i in range(3)])
+
+    outbox = NotificationOutbox(conn)
+    for i in range(3):
+        outbox.enqueue(1, str(i), f"Hange {i}")
+    outbox.enqueue(2, "0", "Hange 0")
+    conn.commit()
+    return outbox
+
+def test_outbox_groups_matches_into_due_digests():
+    """Queued matches are grouped per subscription and held back until due"""
+    conn = create_email_database()
+    outbox = queue_sample_matches(conn)
+
+    digests = outbox.due_digests()
+    assert [d.email for d in digests] == ["due@example.ee"]
+    assert [p["title"] for p in digests[0].procurements] == ["Hange 0", "Hange 1", "Hange 2"]
+
+    summary = outbox.flush(LoggingDeliverer())
+    assert summary == {"digests": 1, "sent": 1, "failed": 0, "matches": 3}
+
+    statuses = dict(conn.execute(
+        "SELECT subscription_id, GROUP_CONCAT(DISTINCT email_status) FROM notification_history GROUP BY subscription_id"
+    ).fetchall())
+    assert statuses == {1: "sent", 2: "queued"}
+    # The subscription is not due again until its frequency interval has passed
+    assert outbox.due_digests() == []
+
+class FlakySMTP:
+    """SMTP stand-in that drops the first connection mid-send"""
+    connections = 0
+
+    def __init__(self, host, port, timeout=None):
+        FlakySMTP.connections += 1
+        self.number = FlakySMTP.connections
+        self.sent = []
+
+    def send_message(self, message):
+        if self.number == 1:
+            raise smtplib.SMTPServerDisconnected("connection lost")
+        self.sent.append(message["To"])
+
+    def quit(self):
+        pass
+
+def test_deliverer_reconnects_and_retries_transient_failures():
+    """A dropped connection is replaced and the message retried"""
+    FlakySMTP.connections = 0
+    deliverer = SMTPDeliverer(SMTPConfig(host="localhost", use_tls=False),
+                              retry_delay=0, smtp_factory=FlakySMTP)
+    conn = create_email_database()
+    outbox = queue_sample_matches(conn)
+
+    assert outbox.flush(deliverer)["sent"] == 1
+    assert FlakySMTP.connections == 2
+
+def test_digest_delivery_over_local_smtp_server():
+    """Digests are delivered over one pooled connection to a local SMTP server"""
+    aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+    from aiosmtpd.handlers import Sink
+
+    class RecordingHandler(Sink):
+        def __init__(self):
+            self.recipients = []
+            self.sessions = set()
+
+        async def handle_DATA(self, server, session, envelope):
+            self.sessions.add(id(session))
+            self.recipients.extend(envelope.rcpt_tos)
+            return "250 OK"
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    handler = RecordingHandler()
+    controller = aiosmtpd_controller.Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    try:
+        conn = create_email_database()
+        conn.executemany("INSERT INTO email_subscriptions (email, sectors) VALUES (?, 'Technology & IT')",
+                         [(f"user{i}@example.ee",) for i in range(5)])
+        outbox = NotificationOutbox(conn)
+        for sub_id in range(1, 6):
+            outbox.enqueue(sub_id, "1", "Hange 1")
+        conn.commit()
+
+        config = SMTPConfig(host="127.0.0.1", port=port, use_tls=False)
+        summary = outbox.flush(SMTPDeliverer(config, batch_size=10))
+
+        assert summary["sent"] == 5
+        assert sorted(handler.recipients) == [f"user{i}@example.ee" for i in range(5)]
+        assert len(handler.sessions) == 1
+    finally:
+        controller.stop()
+
+def test_failed_digest_is_delivered_on_next_flush():
+    """A digest the server rejects stays queued, is sent by the next flush, and gives up after max_attempts"""
+    aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+    from aiosmtpd.handlers import Sink
+
+    class OutageHandler(Sink):
+        def __init__(self):
+            self.available = False
+            self.recipients = []
+
+        async def handle_DATA(self, server, session, envelope):
+            if not self.available:
+                return "554 Service unavailable"
+            self.recipients.extend(envelope.rcpt_tos)
+            return "250 OK"
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    handler = OutageHandler()
+    controller = aiosmtpd_controller.Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    try:
+        conn = create_email_database()
+        outbox = queue_sample_matches(conn)
+        config = SMTPConfig(host="127.0.0.1", port=port, use_tls=False)
+        attempts = "SELECT DISTINCT email_status, delivery_attempts FROM notification_history WHERE subscription_id = 1"
+
+        assert outbox.flush(SMTPDeliverer(config, retry_delay=0))["failed"] == 1
+        assert conn.execute(attempts).fetchall() == [("queued", 1)]
+        assert [d.email for d in outbox.due_digests()] == ["due@example.ee"]
+
+        handler.available = True
+        assert outbox.flush(SMTPDeliverer(config, retry_delay=0))["sent"] == 1
+        assert handler.recipients == ["due@example.ee"]
+        assert conn.execute(attempts).fetchall() == [("sent", 2)]
+
+        # A digest that keeps failing is given up once it runs out of attempts
+        handler.available = False
+        outbox = NotificationOutbox(conn, max_attempts=2)
+        outbox.enqueue(1, "1", "Hange 1")
+        conn.execute("UPDATE email_subscriptions SET last_notification = NULL WHERE id = 1")
+        conn.commit()
+        for _ in range(2):
+            assert outbox.flush(SMTPDeliverer(config, retry_delay=0))["failed"] == 1
+        assert conn.execute("SELECT email_status, delivery_attempts FROM notification_history "
+                            "ORDER BY id DESC LIMIT 1").fetchone() == ("failed", 2)
+        assert outbox.due_digests() == []
+    finally:
+        controller.stop()
+
+def keyword_classifier(title, description):
+    """Offline stand-in for the OpenAI classifier"""
+    return "Construction & Infrastructure" if "ehitus" in description.lower() else "Other"
+
+def test_engine_dry_run_then_delivery(tmp_path):
+    """A dry run reports matches without side effects; a real run stores and delivers"""
+    db_path = str(tmp_path / "procurement.db")
+    init_email_database(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO email_subscriptions (email, sectors, min_value) VALUES (?, ?, 0)",
+                 ("ehitus@example.ee", "Construction & Infrastructure"))
+    conn.commit()
+
+    dry = run_notification_check(db_path, SAMPLE_FEED, workers=4, dry_run=True, classify=keyword_classifier)
+    assert dry["feed_entries"] > 0 and dry["matches"] > 0
+    assert dry["delivery"] is None
+    assert conn.execute("SELECT COUNT(*) FROM procurement_matches").fetchone()[0] == 0
+
+    real = run_notification_check(db_path, SAMPLE_FEED, workers=4, deliverer=LoggingDeliverer(),
+                                  classify=keyword_classifier)
+    assert real["matches"] == dry["matches"]
+    assert real["delivery"] == {"digests": 1, "sent": 1, "failed": 0, "matches": real["matches"]}
+    assert set(real["timings"]) == {"fetch_feed", "compile_subscriptions", "lookup_processed",
+                                    "classify", "match", "store", "deliver"}
+
+    # Everything in the feed is now processed
+    again = run_notification_check(db_path, SAMPLE_FEED, deliverer=LoggingDeliverer(), classify=keyword_classifier)
+    assert again["new_procurements"] == 0
+
+def test_dry_run_leaves_the_database_untouched(tmp_path):
+    """A dry run neither creates the database nor adds its tables"""
+    missing = tmp_path / "missing.db"
+    summary = run_notification_check(str(missing), SAMPLE_FEED, dry_run=True, classify=keyword_classifier)
+    assert summary["feed_entries"] > 0 and summary["subscriptions"] == 0 and summary["matches"] == 0
+    assert not missing.exists()
+
+    empty = tmp_path / "empty.db"
+    sqlite3.connect(empty).close()
+    run_notification_check(str(empty), SAMPLE_FEED, dry_run=True, classify=keyword_classifier)
+    assert sqlite3.connect(empty).execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0] == 0
+
+def test_runner_cli_writes_json_summary(tmp_path, monkeypatch):
+    """The CLI runs once and appends a JSON summary"""
+    import json
+    import functools
+    import notifications.runner
+
+    monkeypatch.setattr(notifications.runner, "run_notification_check",
+                        functools.partial(run_notification_check, classify=keyword_classifier))
+    output = tmp_path / "summary.json"
+
+    exit_code = runner_main(["--db", str(tmp_path / "procurement.db"), "--feed-url", SAMPLE_FEED,
+                             "--dry-run", "--output", str(output)])
+
+    assert exit_code == 0
+    summary = json.loads(output.read_text(encoding="utf-8").splitlines()[-1])
+    assert summary["dry_run"] is True
+    assert "classify" in summary["timings"]
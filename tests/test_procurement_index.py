@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Procurement Index Tests
+Tests the local embedding index behind HangeGPT similarity search
+"""
+
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path to import modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+from sqlalchemy.orm import sessionmaker
+
+from agents.database import create_read_engine
+from procurement_index import EMBEDDING_DIM, ProcurementIndex
+
+NOTICES = [
+    {'id': '1', 'title': 'Koolimaja renoveerimine',
+     'clean_description': 'Põhikooli hoone renoveerimistööd ja fassaadi soojustamine'},
+    {'id': '2', 'title': 'Infosüsteemi arendus',
+     'clean_description': 'Tarkvara arendus ja infosüsteemi hooldus riigiasutusele'},
+    {'id': '3', 'title': 'Teede hooldus talvel',
+     'clean_description': 'Kruusateede ja kõnniteede lumetõrje ning libedusetõrje'},
+    {'id': '4', 'title': 'Lasteaia ehitus',
+     'clean_description': 'Uue lasteaiahoone projekteerimine ja ehitus'},
+]
+
+def test_add_skips_unchanged_and_replaces_changed_notices():
+    """Only new or changed notices are embedded, and a changed notice is found by its new text only"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index = ProcurementIndex(tmp_dir)
+        assert index.add(NOTICES) == 4
+        assert index.add(NOTICES) == 0
+
+        changed = dict(NOTICES[2], title='Bussiootepaviljonide paigaldus',
+                       clean_description='Bussiootepaviljonide tarne ja paigaldus')
+        assert index.add([changed]) == 1
+        assert len(index) == 4
+        assert [i for i, _ in index.search('bussiootepaviljonid', k=2)][:1] == ['3']
+        assert '3' not in [i for i, _ in index.search('lumetõrje teedel', k=4)]
+
+        # Reopening maps the same vectors without embedding them again
+        reopened = ProcurementIndex(tmp_dir)
+        assert len(reopened) == 4
+        assert reopened.add(NOTICES[:2] + [changed]) == 0
+        assert reopened.search('bussiootepaviljonid', k=1) == index.search('bussiootepaviljonid', k=1)
+
+def test_torn_append_is_dropped_on_open():
+    """Vectors written without their ids are discarded, so later appends stay aligned"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        ProcurementIndex(tmp_dir).add(NOTICES[:2])
+        with open(Path(tmp_dir) / 'vectors.f32', 'ab') as f:
+            f.write(b'\0' * 100)
+
+        index = ProcurementIndex(tmp_dir)
+        assert len(index) == 2
+        assert index.add(NOTICES[2:]) == 2
+        assert [i for i, _ in index.search('lasteaia ehitus', k=1)] == ['4']
+
+def test_similar_notices_rank_first():
+    """Inflected Estonian wording still finds the notice it describes"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index = ProcurementIndex(tmp_dir)
+        index.add(NOTICES)
+
+        assert index.search('kooli renoveerimine')[0][0] == '1'
+        assert index.search('tarkvara arendamine')[0][0] == '2'
+        assert index.search('lasteaiahoone ehitamine')[0][0] == '4'
+        assert index.search('hange') == []
+
+def test_search_over_100k_notices_takes_milliseconds():
+    """Top-K retrieval over 100k indexed notices answers well within a chat turn"""
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((100_000, EMBEDDING_DIM)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index = ProcurementIndex(tmp_dir)
+        index._append([str(i) for i in range(len(vectors))], [0] * len(vectors), vectors)
+        index.search('koolimaja renoveerimine', k=20)
+
+        timings = []
+        for _ in range(5):
+            started = time.perf_counter()
+            results = index.search('koolimaja renoveerimine', k=20)
+            timings.append(time.perf_counter() - started)
+
+    assert len(results) == 20
+    assert sorted(timings)[2] < 0.05
+
+def test_agent_filters_similar_notices():
+    """The similarity branch returns the best matches that also pass the intent's filters"""
+    from agents.chat_agent import HangeGPTAgent
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = str(Path(tmp_dir) / "procurement_data.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("""CREATE TABLE procurements (id TEXT PRIMARY KEY, title TEXT, description TEXT,
+                        clean_description TEXT, link TEXT, published DATETIME, category TEXT,
+                        estimated_value FLOAT, procurer TEXT, county TEXT, created_at DATETIME)""")
+        conn.executemany(
+            "INSERT INTO procurements VALUES (?, ?, '', ?, '', ?, 'Construction', 1000.0, 'Vald', ?, ?)",
+            [(n['id'], n['title'], n['clean_description'], datetime(2025, 9, 1).isoformat(' '),
+              'Tartumaa' if n['id'] == '4' else 'Harjumaa', datetime(2025, 9, 1).isoformat(' '))
+             for n in NOTICES])
+        conn.commit()
+        conn.close()
+        engine = create_read_engine(db_path)
+
+        agent = HangeGPTAgent()
+        agent.sessions = sessionmaker(bind=engine)
+        agent.similarity_index = ProcurementIndex(str(Path(tmp_dir) / "procurement_data.index"))
+        agent.similarity_index.backfill(db_path)
+        try:
+            state = {"user_intent": {"search_text": "lasteaia või kooli ehitus",
+                                     "filters": {"county": "Harjumaa"}}}
+            results = agent.query_similar(state)["query_results"]
+        finally:
+            agent.close()
+            engine.dispose()
+
+    assert results["similar_count"] == len(results["similar"]) >= 1
+    assert results["similar"][0]["id"] == "1"
+    assert "4" not in [row["id"] for row in results["similar"]]
+    assert float(results["similar"][0]["similarity"]) > 0
+
+def test_described_subjects_route_to_similarity_search():
+    """Questions describing a subject search the index, while aggregates and RSS keep their branches"""
+    from agents.chat_agent import HangeGPTAgent
+    from agents.result_compactor import compact_results
+
+    agent = HangeGPTAgent()
+    try:
+        route = lambda **intent: agent.route_query({"user_intent": intent})
+        assert route(data_source="database", search_text="koolimaja renoveerimine") == "similar"
+        assert route(data_source="both", search_text="koolimaja renoveerimine") == ["similar", "rss"]
+        assert route(data_source="database", search_text="ehitus", aggregate={"group_by": "county"}) == "database"
+        assert route(data_source="database", search_text=None) == "database"
+    finally:
+        agent.close()
+
+    prompt = compact_results({"similar": [dict(NOTICES[0], similarity="0.61")], "similar_count": 1})
+    assert "Similar notices: 1 procurements" in prompt
+    assert "0.61 | Koolimaja renoveerimine" in prompt
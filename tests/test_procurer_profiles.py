@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Procurer Profile Tests
+Tests incremental maintenance and top-K lookups of procurer profiles
+"""
+
+import sys
+import time
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path to import modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from procurer_profiles import ProcurerProfileStore
+
+def sample_notices():
+    return [
+        {'id': '1', 'procurer': 'Tallinna Linnavalitsus', 'category': 'Technology & IT',
+         'estimated_value': 100000.0, 'published': datetime(2025, 9, 1)},
+        {'id': '2', 'procurer': 'Tallinna Linnavalitsus', 'category': 'Construction & Infrastructure',
+         'estimated_value': 300000.0, 'published': datetime(2025, 9, 3)},
+        {'id': '3', 'procurer': 'Tallinna Linnavalitsus', 'category': 'Technology & IT',
+         'estimated_value': None, 'published': datetime(2025, 9, 2)},
+        {'id': '4', 'procurer': 'Tartu Ülikool', 'category': 'Education & Training',
+         'estimated_value': 50000.0, 'published': datetime(2025, 9, 5)},
+    ]
+
+def test_profiles_aggregate_notices(tmp_path):
+    """Profiles carry counts, totals, medians, category mix and last seen"""
+    store = ProcurerProfileStore(str(tmp_path / "profiles.db"))
+    assert store.record_notices(sample_notices()) == 4
+
+    profile = store.get_profile('Tallinna Linnavalitsus')
+    assert profile['notice_count'] == 3
+    assert profile['valued_count'] == 2
+    assert profile['total_value'] == 400000.0
+    assert profile['median_value'] == 200000.0
+    assert profile['category_mix'] == {'Technology & IT': 2, 'Construction & Infrastructure': 1}
+    assert profile['last_seen'] == datetime(2025, 9, 3)
+
+def test_reingested_notice_is_moved_not_double_counted(tmp_path):
+    """A notice re-ingested with changed data replaces its old contribution"""
+    store = ProcurerProfileStore(str(tmp_path / "profiles.db"))
+    store.record_notices(sample_notices())
+
+    # Unchanged notices are skipped
+    assert store.record_notices(sample_notices()) == 0
+
+    store.record_notices([{'id': '2', 'procurer': 'Tartu Ülikool', 'category': 'Education & Training',
+                           'estimated_value': 10000.0, 'published': datetime(2025, 9, 6)}])
+
+    tallinn = store.get_profile('Tallinna Linnavalitsus')
+    assert tallinn['notice_count'] == 2
+    assert tallinn['total_value'] == 100000.0
+    assert tallinn['last_seen'] == datetime(2025, 9, 2)
+
+    tartu = store.get_profile('Tartu Ülikool')
+    assert tartu['notice_count'] == 2
+    assert tartu['median_value'] == 30000.0
+
+def test_top_procurers_by_metric(tmp_path):
+    """Top-K is available for every metric"""
+    store = ProcurerProfileStore(str(tmp_path / "profiles.db"))
+    store.record_notices(sample_notices())
+
+    assert [p['procurer'] for p in store.top_procurers('total_value', 1)] == ['Tallinna Linnavalitsus']
+    assert [p['procurer'] for p in store.top_procurers('last_seen', 1)] == ['Tartu Ülikool']
+    assert [p['procurer'] for p in store.top_procurers('notice_count', 1, ascending=True)] == ['Tartu Ülikool']
+
+def test_profiles_survive_restart_and_backfill(tmp_path):
+    """Profiles reload from disk and backfill from the procurements table"""
+    db_path = str(tmp_path / "profiles.db")
+
+    conn = sqlite3.connect(db_path)
+    conn.execute('CREATE TABLE procurements (id TEXT PRIMARY KEY, procurer TEXT, category TEXT, '
+                 'estimated_value REAL, published TIMESTAMP)')
+    conn.executemany('INSERT INTO procurements VALUES (?, ?, ?, ?, ?)', [
+        (n['id'], n['procurer'], n['category'], n['estimated_value'], n['published'].isoformat())
+        for n in sample_notices()
+    ])
+    conn.commit()
+    conn.close()
+
+    backfilled = ProcurerProfileStore(db_path)
+    assert len(backfilled) == 2
+
+    reloaded = ProcurerProfileStore(db_path)
+    assert reloaded.get_profile('Tallinna Linnavalitsus') == backfilled.get_profile('Tallinna Linnavalitsus')
+
+def test_top_k_lookup_is_fast(tmp_path):
+    """Polling the leaderboard does not rescan the profiles"""
+    store = ProcurerProfileStore(str(tmp_path / "profiles.db"))
+    store.record_notices(
+        {'id': str(i), 'procurer': f'Procurer {i % 5000}', 'category': 'Other',
+         'estimated_value': float(i), 'published': datetime(2025, 1, 1)}
+        for i in range(50000)
+    )
+    store.top_procurers('total_value', 10)
+
+    start = time.perf_counter()
+    for _ in range(100):
+        store.top_procurers('total_value', 10)
+    per_call = (time.perf_counter() - start) / 100
+
+    print(f"⏱️  Top-10 lookup: {per_call * 1000:.3f} ms")
+    assert per_call < 0.001
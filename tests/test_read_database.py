@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Read Database Tests
+Tests the pooled, read-only, statement-limited database sessions used by HangeGPT
+"""
+
+import sqlite3
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path to import modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from agents.database import create_read_engine
+
+def create_database(db_path, rows=3):
+    conn = sqlite3.connect(db_path)
+    conn.execute("""CREATE TABLE procurements (id TEXT PRIMARY KEY, title TEXT, description TEXT,
+                    clean_description TEXT, link TEXT, published DATETIME, category TEXT,
+                    estimated_value FLOAT, procurer TEXT, county TEXT, created_at DATETIME)""")
+    add_procurements(conn, range(rows))
+    conn.close()
+
+def add_procurements(conn, ids):
+    conn.executemany(
+        "INSERT INTO procurements VALUES (?, ?, '', '', '', ?, 'Technology & IT', ?, 'RIA', 'Harjumaa', ?)",
+        [(str(i), f"Hange {i}", datetime(2025, 9, 1).isoformat(' '), 1000.0 * i, datetime(2025, 9, 1).isoformat(' '))
+         for i in ids])
+    conn.commit()
+
+def test_sessions_are_read_only_and_time_limited():
+    """Writes are rejected and a runaway statement is interrupted at the deadline"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = str(Path(tmp_dir) / "procurement data.db")
+        create_database(db_path)
+        engine = create_read_engine(db_path, statement_timeout=0.2)
+        Session = sessionmaker(bind=engine)
+
+        with Session() as session:
+            assert session.execute(text("SELECT COUNT(*) FROM procurements")).scalar() == 3
+            with pytest.raises(OperationalError, match="readonly"):
+                session.execute(text("DELETE FROM procurements"))
+
+        with Session() as session:
+            with pytest.raises(OperationalError, match="interrupted"):
+                session.execute(text("WITH RECURSIVE r(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM r) "
+                                     "SELECT COUNT(*) FROM r")).scalar()
+
+        # The connection goes back to the pool usable
+        with Session() as session:
+            assert session.execute(text("SELECT COUNT(*) FROM procurements")).scalar() == 3
+        engine.dispose()
+
+def test_concurrent_readers_share_a_bounded_pool():
+    """Many concurrent readers queue for a few connections and see newly committed rows"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = str(Path(tmp_dir) / "procurement_data.db")
+        create_database(db_path)
+        engine = create_read_engine(db_path, pool_size=2, max_overflow=0)
+        Session = sessionmaker(bind=engine)
+
+        def count(_):
+            with Session() as session:
+                return session.execute(text("SELECT COUNT(*) FROM procurements")).scalar()
+
+        with ThreadPoolExecutor(max_workers=20) as executor:
+            assert set(executor.map(count, range(200))) == {3}
+        assert engine.pool.checkedout() == 0
+        assert engine.pool.size() == 2
+
+        conn = sqlite3.connect(db_path)
+        add_procurements(conn, [3, 4])
+        conn.close()
+        assert count(None) == 5
+        engine.dispose()
+
+def test_agent_recovers_after_a_failed_query():
+    """A failed query does not break the agent's next one, which sees data committed since"""
+    from agents.chat_agent import HangeGPTAgent
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = str(Path(tmp_dir) / "procurement_data.db")
+        sqlite3.connect(db_path).close()
+        engine = create_read_engine(db_path)
+
+        agent = HangeGPTAgent()
+        agent.sessions = sessionmaker(bind=engine)
+        filters = {"user_intent": {"filters": {"county": "Harjumaa"}}}
+        try:
+            failed = agent.query_database(filters)["query_results"]
+            assert agent.get_data_version() is None
+
+            create_database(db_path)
+            results = agent.query_database(filters)["query_results"]
+            version = agent.get_data_version()
+        finally:
+            agent.close()
+            engine.dispose()
+
+    assert failed["count"] == 0 and "no such table" in failed["error"]
+    assert results["count"] == 3
+    assert version.startswith("3:2025-09-01")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Response Cache Tests
+Tests intent keys, TTL/LRU eviction, data versions and near-duplicate hits of the HangeGPT response cache
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents.response_cache import ResponseCache, intent_key
+
+def it_intent(**filters):
+    return {"intent": "search", "data_source": "both", "output_type": "list",
+            "filters": dict({"category": "Technology & IT", "county": "Harjumaa", "city": None}, **filters)}
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_intent_key_ignores_phrasing_and_empty_filters():
+    """Equivalent intents share a key; intents without filters are told apart by the question"""
+    first = intent_key(it_intent(value_min=100000), "Find IT procurements in Harjumaa over 100k")
+    second = intent_key({"output_type": "list", "intent": "search", "data_source": "both",
+                         "filters": {"county": "harjumaa ", "category": "Technology & IT", "value_min": 100000.0}},
+                        "IT hanked Harjumaal üle 100 000 euro")
+    assert first == second
+
+    assert intent_key({"intent": "analyze", "filters": {}}, "Most common categories?") != \
+        intent_key({"intent": "analyze", "filters": {}}, "Who are the largest procurers?")
+    assert intent_key(dict(it_intent(), search_text="Cloud hosting"), "Cloud hosting in Harjumaa") != \
+        intent_key(dict(it_intent(), search_text="school software"), "School software in Harjumaa")
+
+def test_entries_expire_and_are_evicted_least_recently_used():
+    """Entries live for the TTL and the least recently used entry goes first"""
+    clock = FakeClock()
+    cache = ResponseCache(max_entries=2, ttl_seconds=60, clock=clock)
+    cache.put("q1", it_intent(days_back=1), "v1", "a1")
+    cache.put("q2", it_intent(days_back=2), "v1", "a2")
+    assert cache.get_for_intent(it_intent(days_back=1), "q1", "v1") == "a1"
+
+    cache.put("q3", it_intent(days_back=3), "v1", "a3")
+    assert cache.get_for_question("q2", "v1") is None
+    assert cache.get_for_question("Q1?", "v1") == "a1"
+
+    clock.now = 61
+    assert cache.get_for_question("q1", "v1") is None
+    assert len(cache) == 1
+
+def test_new_data_version_invalidates_answers():
+    """Answers are only served for the data version they were generated from"""
+    cache = ResponseCache()
+    cache.put("Find IT procurements in Harjumaa", it_intent(), "100:2025-09-01", "answer")
+
+    assert cache.get_for_intent(it_intent(), "IT in Harjumaa", "100:2025-09-01") == "answer"
+    assert cache.get_for_intent(it_intent(), "IT in Harjumaa", "101:2025-09-02") is None
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1}
+
+def test_near_duplicate_questions_hit_with_embeddings():
+    """Questions with similar embeddings share an answer, dissimilar ones do not"""
+    vectors = {"show it procurements in harjumaa": [1.0, 0.0, 0.1],
+               "show me it procurements in harjumaa": [0.99, 0.0, 0.12],
+               "show construction procurements": [0.0, 1.0, 0.0]}
+    calls = []
+
+    def embed(text):
+        calls.append(text)
+        return vectors[text]
+
+    cache = ResponseCache(embed=embed, similarity_threshold=0.95)
+    assert cache.get_for_question("Show IT procurements in Harjumaa", "v1") is None
+    cache.put("Show IT procurements in Harjumaa", it_intent(), "v1", "answer")
+    assert calls == ["show it procurements in harjumaa"]
+
+    assert cache.get_for_question("Show me IT procurements in Harjumaa?", "v1") == "answer"
+    assert cache.get_for_question("Show construction procurements", "v1") is None
+    assert cache.get_for_question("Show me IT procurements in Harjumaa", "v2") is None
+
+class CountingLLM:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        return type("Response", (), {"content": f"Answer {self.calls}"})()
+
+def test_agent_answers_repeated_questions_from_cache(monkeypatch):
+    """A repeated question skips both LLM calls and the database until the data version changes"""
+    from agents.chat_agent import HangeGPTAgent
+
+    agent = HangeGPTAgent()
+    agent.llm = CountingLLM()
+    agent.response_cache = ResponseCache()
+    version = {"value": "10:2025-09-01"}
+    monkeypatch.setattr(agent, "get_data_version", lambda: version["value"])
+    queries = []
+    query_database = agent.query_database
+    monkeypatch.setattr(agent, "query_database", lambda state: queries.append(1) or query_database(state))
+    monkeypatch.setattr(agent, "query_rss_cache", lambda state: {"query_results": {"rss": [], "rss_count": 0}})
+    agent.graph = agent._create_graph()
+
+    try:
+        first = agent.chat("What are the most common procurement categories?")
+        assert agent.chat("what are the most common procurement categories") == first
+        # A different phrasing with the same resolved intent hits after analyze_intent
+        answer = agent.chat("Find IT procurements in Harjumaa")
+        assert agent.chat("Show me IT procurements in Harjumaa") == answer
+        calls = agent.llm.calls
+
+        version["value"] = "11:2025-09-02"
+        assert agent.chat("Show me IT procurements in Harjumaa") != answer
+    finally:
+        agent.close()
+
+    # Intent and answer for the first question, answer only for the fast-path intent
+    assert calls == 3
+    assert agent.llm.calls == 4
+    assert len(queries) == 3
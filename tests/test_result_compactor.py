@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Result Compactor Tests
+Tests the aggregated, token-budgeted query results sent to the HangeGPT response prompt
+"""
+
+import json
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents.result_compactor import compact_results, estimate_tokens
+
+def database_rows(count=50):
+    return [{
+        'id': i,
+        'title': f"Infosüsteemi {i} arendus- ja hooldusteenuste raamleping",
+        'clean_description': "Hankija soovib sõlmida raamlepingu infosüsteemi arendamiseks ja hoolduseks. " * 12,
+        'category': ["Technology & IT", "Construction & Infrastructure", "Healthcare & Medical"][i % 3],
+        'county': ["Harjumaa", "Tartumaa"][i % 2],
+        'estimated_value': float(i * 1000) if i % 5 else None,
+        'procurer': "Riigi Infosüsteemi Amet",
+        'published': f"2025-09-{i % 28 + 1:02d}T09:30:00",
+        'link': f"https://riigihanked.riik.ee/rhr-web/#/procurement/{7100000 + i}/general-info",
+    } for i in range(count)]
+
+def rss_rows(count=50):
+    return [{
+        'title': f"Teehoolduse hange {i}",
+        'description': "Riigiteede talihoolduse teenuse tellimine. " * 8,
+        'link': f"https://riigihanked.riik.ee/rhr-web/#/procurement/{7200000 + i}/general-info",
+        'published': "Wed, 17 Sep 2025 10:00:00 +0300",
+        'procurer': "Transpordiamet",
+    } for i in range(count)]
+
+def test_compact_results_fit_the_budget_and_keep_cited_facts():
+    """Fifty rows per source shrink to the budget with exact totals and the top rows intact"""
+    query_results = {'database': database_rows(), 'count': 50, 'rss': rss_rows(), 'rss_count': 50}
+    compact = compact_results(query_results, token_budget=1500)
+
+    assert estimate_tokens(compact) <= 1500
+    assert estimate_tokens(json.dumps(query_results, indent=2)) > 10 * estimate_tokens(compact)
+
+    # Totals are computed over all rows, not only the ones shown
+    total = sum(row['estimated_value'] or 0 for row in database_rows())
+    assert f"Database: 50 procurements, 40 with an estimated value totalling €{total:,.0f}" in compact
+    assert "By county: Harjumaa 25" in compact
+    assert "RSS feed: 50 recent procurements" in compact
+
+    # The highest-value row is listed first with its value, date and link
+    lines = compact.splitlines()
+    top = lines[lines.index("Database procurements, highest estimated value first:") + 2]
+    assert top.startswith("Infosüsteemi 49 arendus- ja hooldusteenuste raamleping | Riigi Infosüsteemi Amet")
+    assert "| €49,000 | 2025-09-22 |" in top
+    assert top.endswith("https://riigihanked.riik.ee/rhr-web/#/procurement/7100049/general-info")
+
+    # Both sources get rows
+    assert "Teehoolduse hange 0 | Transpordiamet | Wed, 17 Sep 2025 |" in compact
+    assert compact.count("more not shown") == 2
+
+def test_small_results_are_listed_in_full():
+    """Results that fit are not cut, and errors and empty results are reported"""
+    compact = compact_results({'database': database_rows(3), 'count': 3})
+    assert "more not shown" not in compact
+    assert compact.count("raamleping |") == 3
+
+    assert compact_results({'database': [], 'error': "no such table: procurements", 'count': 0}) == \
+        "Error querying the database: no such table: procurements\nNo procurements matched the query."
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Shared Agent Tests
+Tests that one HangeGPT agent serves many chat sessions without mixing their conversations
+"""
+
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add parent directory to path to import modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents.response_cache import ResponseCache
+
+QUESTIONS = [
+    "IT procurements in Harjumaa",
+    "construction procurements in Tartumaa",
+    "medical tenders in Tallinn",
+    "IT procurements over €100,000",
+    "cleaning services in Narva",
+    "energy procurements in the last 7 days",
+]
+
+class EchoLLM:
+    """Answers with the question found in the response prompt"""
+
+    def invoke(self, messages):
+        question = re.search(r'User asked: "(.*)"', messages[-1].content).group(1)
+        return type("Response", (), {"content": f"Answer to {question}"})()
+
+def test_chat_agent_is_shared_across_sessions():
+    """Every session gets the same agent, created once"""
+    from agents.chat_agent import get_chat_agent
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        agents = list(executor.map(lambda _: get_chat_agent(), range(16)))
+    assert all(agent is agents[0] for agent in agents)
+
+def test_concurrent_conversations_do_not_mix(monkeypatch):
+    """Concurrent chats on one agent each get the answer to their own question"""
+    from agents.chat_agent import HangeGPTAgent
+
+    agent = HangeGPTAgent()
+    agent.llm = EchoLLM()
+    agent.response_cache = ResponseCache()
+    monkeypatch.setattr(agent, "get_data_version", lambda: None)
+    monkeypatch.setattr(agent, "query_rss_cache", lambda state: {"query_results": {"rss": [], "rss_count": 0}})
+
+    try:
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            answers = list(executor.map(agent.chat, QUESTIONS * 4))
+    finally:
+        agent.close()
+
+    assert answers == [f"Answer to {question}" for question in QUESTIONS * 4]
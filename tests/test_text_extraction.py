@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Text Extraction Tests
+Tests streaming text extraction from XLSX and DOCX attachments
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import openpyxl
+from docx import Document
+from openpyxl.worksheet.datavalidation import DataValidation
+
+# Add parent directory to path to import modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from enhanced_document_processor import EnhancedDocumentProcessor
+
+def create_pricing_workbook(path, rows=5000):
+    """Pricing form with a validated column and one formula per row"""
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Hinnapakkumine"
+    sheet.append(["Pakkuja nimi", None, "Registrikood"])
+    sheet.append([])
+    sheet.append(["Toode", "Kogus", "Ühikuhind", "Summa", "Vastab nõuetele"])
+    for i in range(4, rows + 4):
+        sheet.append([f"Toode {i}", i, 2.5, f"=B{i}*C{i}", "Jah"])
+
+    validation = DataValidation(type="list", formula1='"Jah,Ei"')
+    sheet.add_data_validation(validation)
+    validation.add(f"E4:E{rows + 3}")
+
+    workbook.create_sheet("Tingimused").append(["Tarneaeg", "30 päeva"])
+    workbook.save(path)
+
+def test_xlsx_extraction_streams_values_formulas_and_validations(tmp_path):
+    """Headers, sample rows, validations and formulas are all reported"""
+    path = tmp_path / "hinnad.xlsx"
+    create_pricing_workbook(path)
+
+    text = EnhancedDocumentProcessor.extract_text_from_xlsx(str(path))
+    lines = text.split("\n")
+
+    assert lines[:4] == ["SHEET: Hinnapakkumine", "HEADERS:", "Pakkuja nimi | Registrikood",
+                         "Toode | Kogus | Ühikuhind | Summa | Vastab nõuetele"]
+    assert lines[lines.index("DATA SAMPLE:") + 1] == "Toode 4 | 4 | 2.5 | Jah"
+    assert 'VALIDATION in E4:E5003: "Jah,Ei"' in lines
+    assert [line for line in lines if line.startswith("FORMULA in")] == [
+        f"FORMULA in D{i}: =B{i}*C{i}" for i in range(4, 9)
+    ]
+    assert lines[-3:] == ["SHEET: Tingimused", "HEADERS:", "Tarneaeg | 30 päeva"]
+
+def create_specification_document(path, paragraphs=3, rows=2):
+    """Specification with merged table cells between paragraphs, a header and a footer"""
+    doc = Document()
+    doc.add_paragraph("TEHNILINE KIRJELDUS")
+    table = doc.add_table(rows=3, cols=3)
+    table.cell(0, 0).merge(table.cell(0, 1)).text = "Toode"
+    table.cell(0, 2).text = "Hind"
+    table.cell(1, 0).merge(table.cell(2, 0)).text = "Arvutid"
+    table.cell(1, 1).text = "Sülearvuti"
+    table.cell(1, 2).text = "900"
+    table.cell(2, 1).text = "Monitor"
+    table.cell(2, 2).text = "200"
+    for i in range(paragraphs):
+        doc.add_paragraph(f"{i + 1}. Pakkuja tagab teenuse kättesaadavuse vähemalt 99,5% ajast.")
+    large = doc.add_table(rows=rows, cols=4)
+    for r, row in enumerate(large.rows):
+        for c, cell in enumerate(row.cells):
+            cell.text = f"R{r}C{c}"
+    doc.sections[0].header.paragraphs[0].text = "Riigi Infosüsteemi Amet"
+    doc.sections[0].footer.paragraphs[0].text = "Lehekülg 1"
+    doc.save(path)
+
+def test_docx_extraction_keeps_document_order_and_reads_merged_cells_once(tmp_path):
+    """Tables appear where they are in the document, with each merged cell read once"""
+    path = tmp_path / "kirjeldus.docx"
+    create_specification_document(path)
+
+    text = EnhancedDocumentProcessor.extract_text_from_docx(str(path))
+
+    assert text.split("\n") == [
+        "TEHNILINE KIRJELDUS",
+        "Toode | Hind",
+        "Arvutid | Sülearvuti | 900",
+        "Monitor | 200",
+        "1. Pakkuja tagab teenuse kättesaadavuse vähemalt 99,5% ajast.",
+        "2. Pakkuja tagab teenuse kättesaadavuse vähemalt 99,5% ajast.",
+        "3. Pakkuja tagab teenuse kättesaadavuse vähemalt 99,5% ajast.",
+        "R0C0 | R0C1 | R0C2 | R0C3",
+        "R1C0 | R1C1 | R1C2 | R1C3",
+        "HEADER: Riigi Infosüsteemi Amet",
+        "FOOTER: Lehekülg 1",
+    ]
+
+def test_docx_extraction_is_faster_than_python_docx(tmp_path):
+    """Streaming a large specification beats building the python-docx object tree"""
+    path = tmp_path / "suur.docx"
+    create_specification_document(path, paragraphs=1500, rows=600)
+
+    started = time.perf_counter()
+    doc = Document(str(path))
+    legacy_lines = [p.text.strip() for p in doc.paragraphs if p.text.strip()]
+    for table in doc.tables:
+        for row in table.rows:
+            legacy_lines.append(" | ".join(c.text.strip() for c in row.cells if c.text.strip()))
+    legacy_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    text = EnhancedDocumentProcessor.extract_text_from_docx(str(path))
+    streaming_seconds = time.perf_counter() - started
+
+    assert len(text.split("\n")) == 1 + 3 + 1500 + 600 + 2
+    assert streaming_seconds * 2 < legacy_seconds
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Text Normalizer Tests
+Tests document text normalization against the original multi-pass preprocessing
+"""
+
+import re
+import sys
+import random
+import unicodedata
+from pathlib import Path
+
+# Add parent directory to path to import modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from text_normalizer import normalize_document_text, normalize_description, benchmark
+
+def multi_pass_preprocess(text):
+    """The original preprocess_text passes"""
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x84\x86-\x9f]', '', text)
+    text = re.sub(r'€|EUR|euro', 'EUR', text, flags=re.IGNORECASE)
+    text = re.sub(r'\+372\s*(\d{3,4})\s*(\d{4})', r'+372 \1 \2', text)
+    return text.strip()
+
+def test_matches_multi_pass_preprocessing():
+    """Whitespace, currency and phone handling is unchanged"""
+    rng = random.Random(7)
+    tokens = ["Hange", "maksumus", "125", "000", "EUR", "eur", "Euro", "euroopa", "€", "+372", "5123", "4567",
+              "51234567", "õ", "ä", "ö", "ü", "Šveits", ".", ",", " ", "  ", "\t", "\n", "\r\n", "\xa0", "\x0c"]
+    for _ in range(500):
+        text = "".join(rng.choice(tokens) + rng.choice(["", " ", "\n"]) for _ in range(40))
+        assert normalize_document_text(text) == multi_pass_preprocess(text)
+
+def test_composes_unicode_and_drops_control_characters():
+    """Decomposed Estonian letters are composed and control characters removed"""
+    decomposed = unicodedata.normalize("NFD", "Pakkuja kärje tõendid")
+    assert decomposed != "Pakkuja kärje tõendid"
+    assert normalize_document_text(decomposed + "\x00\x1b\x9f") == "Pakkuja kärje tõendid"
+    assert normalize_document_text("+372\x01 5123\x02 4567 €") == "+372 5123 4567 EUR"
+
+def test_description_is_only_lightly_normalized():
+    """Descriptions keep currency text as written"""
+    assert normalize_description("  Maksumus:\n 100 euro\x07 ") == "Maksumus: 100 euro"
+
+def test_benchmark_reports_throughput():
+    """The benchmark runs on generated input of the requested size"""
+    result = benchmark(size_mb=0.5, repeat=1)
+    assert result["size_mb"] > 0.4 and result["mb_per_second"] > 0